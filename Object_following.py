@@ -1,8 +1,16 @@
-import socket
 import cv2
 import numpy as np
 import time
 
+from control_loop import ControlLoop
+from emergency_stop import stop_tello
+from frame_grabber import create_grabber
+from multi_tracker import MultiObjectTracker
+from target_prediction import TargetPredictor
+from tello_link import TelloCommandLink
+from tello_telemetry import TelloTelemetry
+from rc_output import RcOutput
+
 ######################################################################
 width = 640
 height = 480
@@ -11,20 +19,17 @@ deadZone = 100
 
 startCounter = 0
 dir = 0
+targets = []
 
-def send_command(command, tello_address=('192.168.10.1', 8889)):
-    """Envoie une commande au Tello"""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(('', 9000))
-    sock.sendto(command.encode('utf-8'), tello_address)
-    
-    try:
-        response, _ = sock.recvfrom(1024)
-        sock.close()
-        return response.decode('utf-8').strip()
-    except:
-        sock.close()
-        return None
+# Liaison de commande partagée (un seul socket sur le port 9000)
+link = TelloCommandLink()
+send_command = link.send_command
+rc_output = RcOutput(send_command).start()
+telemetry = TelloTelemetry().start()
+
+# Suivi des contours (vitesse) et compensation de la latence vidéo
+object_tracker = MultiObjectTracker(min_hits=2, max_age=5)
+predictor = TargetPredictor(telemetry, frame_width=width)
 
 # CONNECT TO TELLO
 print("=" * 60)
@@ -44,17 +49,12 @@ send_command('streamon')
 time.sleep(3)
 
 print("\n4. Ouverture du flux...")
-cap = cv2.VideoCapture('udp://0.0.0.0:11111', cv2.CAP_FFMPEG)
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+grabber = create_grabber().start()
 
 # ATTENDRE LES PREMIÈRES FRAMES
 print("   Attente du flux vidéo (10 secondes)...")
-for i in range(50):
-    ret, frame = cap.read()
-    if ret and frame is not None:
-        print(f"   ✓ Flux vidéo OK !")
-        break
-    time.sleep(0.2)
+if grabber.wait_first_frame(timeout=10):
+    print(f"   ✓ Flux vidéo OK !")
 else:
     print("   ✗ ERREUR : Pas de flux vidéo !")
     print("   → Vérifiez que test_video.py fonctionne d'abord")
@@ -140,10 +140,10 @@ def stackImages(scale, imgArray):
     return ver
 
 def getContours(img, imgContour):
-    global dir
+    global targets
     contours, hierarchy = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
     
-    dir = 0
+    targets = []
     
     for cnt in contours:
         area = cv2.contourArea(cnt)
@@ -153,33 +153,36 @@ def getContours(img, imgContour):
             peri = cv2.arcLength(cnt, True)
             approx = cv2.approxPolyDP(cnt, 0.02 * peri, True)
             x, y, w, h = cv2.boundingRect(approx)
-            cx = int(x + (w / 2))
-            cy = int(y + (h / 2))
-
-            if (cx < int(frameWidth/2) - deadZone):
-                cv2.putText(imgContour, " GO LEFT ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
-                cv2.rectangle(imgContour, (0, int(frameHeight/2 - deadZone)), (int(frameWidth/2) - deadZone, int(frameHeight/2) + deadZone), (0, 0, 255), cv2.FILLED)
-                dir = 1
-            elif (cx > int(frameWidth / 2) + deadZone):
-                cv2.putText(imgContour, " GO RIGHT ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
-                cv2.rectangle(imgContour, (int(frameWidth/2 + deadZone), int(frameHeight/2 - deadZone)), (frameWidth, int(frameHeight/2) + deadZone), (0, 0, 255), cv2.FILLED)
-                dir = 2
-            elif (cy < int(frameHeight / 2) - deadZone):
-                cv2.putText(imgContour, " GO UP ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
-                cv2.rectangle(imgContour, (int(frameWidth/2 - deadZone), 0), (int(frameWidth/2 + deadZone), int(frameHeight/2) - deadZone), (0, 0, 255), cv2.FILLED)
-                dir = 3
-            elif (cy > int(frameHeight / 2) + deadZone):
-                cv2.putText(imgContour, " GO DOWN ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
-                cv2.rectangle(imgContour, (int(frameWidth/2 - deadZone), int(frameHeight/2) + deadZone), (int(frameWidth/2 + deadZone), frameHeight), (0, 0, 255), cv2.FILLED)
-                dir = 4
-            else: 
-                dir = 0
-
-            cv2.line(imgContour, (int(frameWidth/2), int(frameHeight/2)), (cx, cy), (0, 0, 255), 3)
+            targets.append(((x, y, w, h), area))
+
             cv2.rectangle(imgContour, (x, y), (x + w, y + h), (0, 255, 0), 5)
             cv2.putText(imgContour, "Points: " + str(len(approx)), (x + w + 20, y + 20), cv2.FONT_HERSHEY_COMPLEX, .7, (0, 255, 0), 2)
             cv2.putText(imgContour, "Area: " + str(int(area)), (x + w + 20, y + 45), cv2.FONT_HERSHEY_COMPLEX, 0.7, (0, 255, 0), 2)
 
+def getDirection(cx, cy, imgContour):
+    """Direction à prendre pour recentrer le point (cx, cy) prédit"""
+    if (cx < int(frameWidth/2) - deadZone):
+        cv2.putText(imgContour, " GO LEFT ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
+        cv2.rectangle(imgContour, (0, int(frameHeight/2 - deadZone)), (int(frameWidth/2) - deadZone, int(frameHeight/2) + deadZone), (0, 0, 255), cv2.FILLED)
+        direction = 1
+    elif (cx > int(frameWidth / 2) + deadZone):
+        cv2.putText(imgContour, " GO RIGHT ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
+        cv2.rectangle(imgContour, (int(frameWidth/2 + deadZone), int(frameHeight/2 - deadZone)), (frameWidth, int(frameHeight/2) + deadZone), (0, 0, 255), cv2.FILLED)
+        direction = 2
+    elif (cy < int(frameHeight / 2) - deadZone):
+        cv2.putText(imgContour, " GO UP ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
+        cv2.rectangle(imgContour, (int(frameWidth/2 - deadZone), 0), (int(frameWidth/2 + deadZone), int(frameHeight/2) - deadZone), (0, 0, 255), cv2.FILLED)
+        direction = 3
+    elif (cy > int(frameHeight / 2) + deadZone):
+        cv2.putText(imgContour, " GO DOWN ", (20, 50), cv2.FONT_HERSHEY_COMPLEX, 1, (0, 0, 255), 3)
+        cv2.rectangle(imgContour, (int(frameWidth/2 - deadZone), int(frameHeight/2) + deadZone), (int(frameWidth/2 + deadZone), frameHeight), (0, 0, 255), cv2.FILLED)
+        direction = 4
+    else: 
+        direction = 0
+
+    cv2.line(imgContour, (int(frameWidth/2), int(frameHeight/2)), (cx, cy), (0, 0, 255), 3)
+    return direction
+
 def display(img):
     cv2.line(img, (int(frameWidth/2) - deadZone, 0), (int(frameWidth/2) - deadZone, frameHeight), (255, 255, 0), 3)
     cv2.line(img, (int(frameWidth/2) + deadZone, 0), (int(frameWidth/2) + deadZone, frameHeight), (255, 255, 0), 3)
@@ -187,19 +190,44 @@ def display(img):
     cv2.line(img, (0, int(frameHeight / 2) - deadZone), (frameWidth, int(frameHeight / 2) - deadZone), (255, 255, 0), 3)
     cv2.line(img, (0, int(frameHeight / 2) + deadZone), (frameWidth, int(frameHeight / 2) + deadZone), (255, 255, 0), 3)
 
-left_right_velocity = 0
-for_back_velocity = 0
-up_down_velocity = 0
-yaw_velocity = 0
+def control_step(now, direction):
+    """Tick à 30 Hz : direction de la dernière image -> consigne rc"""
+    if startCounter == 0:
+        return
+    
+    left_right_velocity = 0
+    for_back_velocity = 0
+    up_down_velocity = 0
+    yaw_velocity = 0
+    
+    if direction == 1:
+        yaw_velocity = -60
+    elif direction == 2:
+        yaw_velocity = 60
+    elif direction == 3:
+        up_down_velocity = 60
+    elif direction == 4:
+        up_down_velocity = -60
+    
+    rc_output.set(left_right_velocity, for_back_velocity, up_down_velocity, yaw_velocity)
+
+def control_stale():
+    """Plus d'image depuis 0.5 s : stationnaire"""
+    if startCounter > 0:
+        rc_output.hover()
+
+control_loop = ControlLoop(control_step, rate_hz=30, watchdog=0.5, on_stale=control_stale).start()
 
 try:
     frame_count = 0
+    last_seq = 0
     
     while True:
-        ret, myFrame = cap.read()
+        seq, frame_time, myFrame = grabber.read(timeout=0.1)
         
-        if not ret or myFrame is None:
+        if myFrame is None or seq == last_seq:
             continue
+        last_seq = seq
         
         frame_count += 1
             
@@ -227,6 +255,17 @@ try:
         kernel = np.ones((5, 5))
         imgDil = cv2.dilate(imgCanny, kernel, iterations=1)
         getContours(imgDil, imgContour)
+        
+        # Plus grosse cible suivie, avancée jusqu'à maintenant (latence vidéo + lacet)
+        dir = 0
+        tracks = object_tracker.update(targets, frame_time)
+        if tracks:
+            target = max(tracks, key=lambda t: t.box[2] * t.box[3])
+            cx, cy = predictor.predict(target.center, target.velocity, frame_time)
+            cx = int(np.clip(cx, 0, frameWidth - 1))
+            cy = int(np.clip(cy, 0, frameHeight - 1))
+            cv2.circle(imgContour, (cx, cy), 8, (0, 0, 255), 2)
+            dir = getDirection(cx, cy, imgContour)
         display(imgContour)
 
         # Empiler les images
@@ -243,47 +282,26 @@ try:
             time.sleep(5)
             print("✓ En vol - Suivi activé")
 
-        # Contrôle de vol
-        if startCounter > 0:
-            if dir == 1:
-                yaw_velocity = -60
-                left_right_velocity = 0
-                for_back_velocity = 0
-                up_down_velocity = 0
-            elif dir == 2:
-                yaw_velocity = 60
-                left_right_velocity = 0
-                for_back_velocity = 0
-                up_down_velocity = 0
-            elif dir == 3:
-                up_down_velocity = 60
-                left_right_velocity = 0
-                for_back_velocity = 0
-                yaw_velocity = 0
-            elif dir == 4:
-                up_down_velocity = -60
-                left_right_velocity = 0
-                for_back_velocity = 0
-                yaw_velocity = 0
-            else:
-                left_right_velocity = 0
-                for_back_velocity = 0
-                up_down_velocity = 0
-                yaw_velocity = 0
-            
-            send_command(f'rc {left_right_velocity} {for_back_velocity} {up_down_velocity} {yaw_velocity}')
+        # Direction transmise à la boucle de contrôle, datée de l'arrivée de l'image
+        control_loop.publish(dir, timestamp=frame_time)
 
         if key == ord('q'):
+            pressed_at = time.monotonic()
             print("\n🛬 Atterrissage...")
-            send_command('land')
+            stop_tello(link, pressed_at, control_loop=control_loop, rc_output=rc_output)
             break
 
 except KeyboardInterrupt:
+    pressed_at = time.monotonic()
     print("\n\n⚠️ ARRÊT D'URGENCE")
-    send_command('land')
+    stop_tello(link, pressed_at, control_loop=control_loop, rc_output=rc_output)
 
 finally:
-    cap.release()
+    control_loop.stop()
+    rc_output.stop()
+    telemetry.stop()
+    grabber.stop()
     send_command('streamoff')
+    link.close()
     cv2.destroyAllWindows()
     print("\n✓ Programme terminé")
\ No newline at end of file
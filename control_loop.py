@@ -0,0 +1,117 @@
+"""
+Boucle de contrôle à fréquence fixe, indépendante de la boucle vidéo
+
+Jusqu'ici les consignes rc n'étaient calculées que dans la boucle qui lit et
+affiche les images : un `ret` raté ou un `imshow` qui bloque, et plus aucune
+consigne ne partait. Ici un thread dédié appelle `step` à cadence fixe
+(30 Hz par défaut) sur des échéances absolues (scheduler.py) :
+- la boucle vidéo (ou le clavier) publie sa dernière sortie avec publish()
+- si cette entrée est plus vieille que `watchdog`, `step` n'est plus appelé
+  et `on_stale` met le drone en stationnaire
+- le retard de chaque réveil sur son échéance est mesuré (gigue)
+
+    loop = ControlLoop(step, rate_hz=30, watchdog=0.5, on_stale=rc_output.hover).start()
+    loop.publish(target)            # dans la boucle vidéo
+    print(loop.jitter())            # {'mean': .., 'p99': .., 'max': ..} en ms
+    loop.stop()
+
+`step(now, value)` reçoit l'instant du tick (time.monotonic()) et la dernière
+valeur publiée ; avec watchdog=None il est appelé à chaque tick (entrées lues
+ailleurs, par exemple l'état des touches).
+"""
+
+import threading
+import time
+
+from scheduler import RateScheduler
+
+
+class ControlLoop:
+    """Appelle step(now, value) à fréquence fixe, stationnaire si l'entrée est périmée"""
+
+    def __init__(self, step, rate_hz=30, watchdog=0.5, on_stale=None):
+        self.step = step
+        self.watchdog = watchdog
+        self.on_stale = on_stale
+
+        self.latest = (None, None)      # (valeur, horodatage) remplacé d'un bloc
+        # Rien de publié au départ : périmé d'emblée, sans compter d'événement ni de on_stale
+        self.stale = True
+        self.enabled = True
+        self.step_lock = threading.Lock()
+
+        self.stale_events = 0
+        self.step_errors = 0
+
+        self.running = False
+        self.thread = None
+        self.wakeup = threading.Event()
+        self.schedule = RateScheduler(rate_hz, stop_event=self.wakeup)
+
+    def publish(self, value, timestamp=None):
+        """Dernière sortie du producteur (tracker, clavier...)"""
+        self.latest = (value, time.monotonic() if timestamp is None else timestamp)
+
+    def suspend(self):
+        """Plus aucun appel à step (atterrissage...) ; attend la fin du tick en cours"""
+        with self.step_lock:
+            self.enabled = False
+
+    def resume(self):
+        self.enabled = True
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="control-loop", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+
+    def _run(self):
+        # Ticks manqués (step trop long) sautés, pas rattrapés
+        for deadline in self.schedule.run():
+            if not self.running:
+                break
+            self._tick(time.monotonic())
+
+    def _tick(self, now):
+        with self.step_lock:
+            if self.enabled:
+                self._step(now)
+
+    def _step(self, now):
+        value, timestamp = self.latest
+        if self.watchdog is not None and (timestamp is None or now - timestamp > self.watchdog):
+            if not self.stale:
+                self.stale = True
+                self.stale_events += 1
+                if self.on_stale:
+                    self.on_stale()
+            return
+        self.stale = False
+
+        try:
+            self.step(now, value)
+        except Exception as e:
+            # Une erreur de calcul ne doit pas arrêter la boucle : stationnaire
+            self.step_errors += 1
+            print(f"⚠️  Boucle de contrôle: {e}")
+            if self.on_stale:
+                self.on_stale()
+
+    @property
+    def ticks(self):
+        return self.schedule.ticks
+
+    @property
+    def overruns(self):
+        return self.schedule.overruns
+
+    def jitter(self):
+        """Retard des réveils sur leur échéance, en ms"""
+        return self.schedule.jitter()
@@ -0,0 +1,317 @@
+"""
+Détection dans des processus séparés (mémoire partagée, résultats asynchrones)
+
+Un passage YOLO de 100-300 ms sur le thread de la boucle vidéo bloque
+l'affichage et l'envoi des commandes rc. Ici chaque détecteur tourne dans son
+propre processus (pas de GIL partagé) :
+- chaque worker possède un emplacement d'image dans un bloc de mémoire
+  partagée : le script y copie l'image, seul un petit message passe par le tube
+- submit() ne bloque jamais : si tous les workers sont occupés, l'image est
+  simplement sautée (on ne garde pas de file de retard)
+- chaque résultat porte le numéro de séquence et l'horodatage de l'image
+  analysée, pour que la boucle de contrôle sache de quand il date
+
+    pool = DetectionPool('yolov4-tiny', workers=2).start()
+    pool.submit(seq, frame_time, frame)
+    result = pool.latest()
+    if result:
+        print(seq - result.seq, result.age, result.detections)
+    pool.stop()
+
+Les workers sont lancés avec `python detection_pool.py --worker ...` (et non
+multiprocessing) : les scripts du dépôt n'ont pas de garde __main__ et
+seraient ré-exécutés par le mode spawn (Windows / macOS).
+"""
+
+import os
+import queue
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+START_TIMEOUT = 30.0    # s, chargement des poids YOLO compris
+
+
+class DetectionResult(namedtuple('DetectionResult', 'seq timestamp detections latency worker')):
+    """Détections de l'image `seq` (horodatage de l'image, pas du résultat)"""
+
+    __slots__ = ()
+
+    @property
+    def age(self):
+        return time.monotonic() - self.timestamp
+
+
+def _attach(name):
+    """Ouvre un bloc existant sans que ce processus ne le détruise à sa sortie"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 : le resource_tracker du worker supprimerait le bloc
+        shm = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+# ============================================================
+#                    PROCESSUS DÉTECTEUR
+# ============================================================
+
+def worker_main(address, authkey, detector_name, input_size, slot):
+    from detectors import create_detector
+
+    conn = connection.Client(address, authkey=authkey)
+    try:
+        detector = create_detector(detector_name, input_size)
+    except Exception as e:
+        conn.send(('error', slot, f"{type(e).__name__}: {e}"))
+        conn.close()
+        return
+    # Les workers se connectent dans n'importe quel ordre : le slot désigne le tube
+    conn.send(('ready', slot, detector.describe()))
+
+    shm = None
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+
+            shm_name, shape, seq, timestamp = message
+            if shm is None or shm.name != shm_name:
+                # Nouveau bloc (taille d'image changée)
+                if shm is not None:
+                    shm.close()
+                shm = _attach(shm_name)
+
+            frames = np.ndarray(shape, np.uint8, buffer=shm.buf)
+            detections = detector.detect(frames[slot])
+            del frames
+            conn.send(('result', seq, timestamp, detections, detector.last_latency))
+    finally:
+        if shm is not None:
+            shm.close()
+        conn.close()
+
+
+# ============================================================
+#                    CÔTÉ SCRIPT
+# ============================================================
+
+class DetectionPool:
+    """Workers de détection alimentés par mémoire partagée"""
+
+    def __init__(self, detector_name, workers=1, input_size=None):
+        self.detector_name = detector_name
+        self.workers = workers
+        self.input_size = input_size
+
+        self.listener = None
+        self.processes = []
+        self.conns = []
+        self.busy = []
+        self.description = None
+
+        self.shm = None
+        self.frames = None          # vue (workers, h, w, c) sur la mémoire partagée
+
+        self.lock = threading.Lock()
+        self.result = None
+        self.running = False
+        self.thread = None
+
+        self.submitted = 0
+        self.skipped = 0            # images non envoyées, tous les workers occupés
+        self.completed = 0
+        self.stale = 0              # résultats arrivés après un plus récent
+
+    def start(self):
+        authkey = secrets.token_bytes(16)
+        self.listener = connection.Listener(('127.0.0.1', 0), authkey=authkey)
+        host, port = self.listener.address
+
+        here = os.path.dirname(os.path.abspath(__file__))
+        for slot in range(self.workers):
+            cmd = [sys.executable, os.path.join(here, 'detection_pool.py'), '--worker',
+                   host, str(port), authkey.hex(), self.detector_name,
+                   str(self.input_size or 0), str(slot)]
+            self.processes.append(subprocess.Popen(cmd, cwd=os.getcwd()))
+
+        try:
+            self._accept_workers()
+        except Exception:
+            self.stop()
+            raise
+
+        self.busy = [False] * self.workers
+        self.running = True
+        self.thread = threading.Thread(target=self._collect, name="detection-pool", daemon=True)
+        self.thread.start()
+        return self
+
+    def _accept_workers(self):
+        """Range chaque worker à son slot ; échec si l'un meurt ou si START_TIMEOUT passe"""
+        # accept() n'a pas de timeout : il tourne dans un thread, surveillé ici
+        accepted = queue.Queue()
+
+        def accept():
+            for _ in range(self.workers):
+                try:
+                    accepted.put(self.listener.accept())
+                except (OSError, EOFError, connection.AuthenticationError) as e:
+                    accepted.put(e)
+                    return
+
+        threading.Thread(target=accept, name="detection-accept", daemon=True).start()
+        deadline = time.monotonic() + START_TIMEOUT
+        self.conns = [None] * self.workers
+        try:
+            for _ in range(self.workers):
+                conn = self._next_worker(accepted, deadline)
+                if not conn.poll(max(deadline - time.monotonic(), 0)):
+                    conn.close()
+                    raise RuntimeError("Worker de détection sans réponse")
+                status, slot, info = conn.recv()
+                self.conns[slot] = conn
+                if status == 'error':
+                    raise RuntimeError(f"Chargement de {self.detector_name} impossible: {info}")
+                self.description = info
+        except Exception:
+            self._wake_accept()
+            self.conns = [conn for conn in self.conns if conn is not None]
+            raise
+
+    def _next_worker(self, accepted, deadline):
+        """Prochaine connexion acceptée, en surveillant les processus lancés"""
+        while True:
+            try:
+                conn = accepted.get(timeout=0.2)
+            except queue.Empty:
+                pass
+            else:
+                if isinstance(conn, Exception):
+                    raise RuntimeError(f"Connexion d'un worker impossible: {conn}")
+                return conn
+            for process in self.processes:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Worker de détection arrêté au démarrage "
+                                       f"(code {process.returncode})")
+            if time.monotonic() > deadline:
+                raise RuntimeError("Worker de détection sans réponse")
+
+    def _wake_accept(self):
+        """Débloque le thread d'acceptation (connexion refusée à l'authentification)"""
+        try:
+            socket.create_connection(self.listener.address, timeout=1).close()
+        except OSError:
+            pass
+
+    # ---------- envoi ----------
+
+    def submit(self, seq, timestamp, frame):
+        """Confie l'image à un worker libre ; False si tous sont occupés"""
+        with self.lock:
+            try:
+                slot = self.busy.index(False)
+            except ValueError:
+                self.skipped += 1
+                return False
+            self.busy[slot] = True
+
+        self._ensure_buffer(frame.shape)
+        self.frames[slot][...] = frame
+        self.conns[slot].send((self.shm.name, self.frames.shape, seq, timestamp))
+        self.submitted += 1
+        return True
+
+    def _ensure_buffer(self, shape):
+        if self.frames is not None and self.frames.shape[1:] == shape:
+            return
+        # Premier appel ou taille d'image changée : nouveau bloc. Les workers
+        # suivent le nom transmis avec chaque image ; un worker encore occupé
+        # sur l'ancien bloc garde son propre accès ouvert jusqu'à la fin.
+        self._release_buffer()
+        shape = (self.workers,) + tuple(shape)
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.frames = np.ndarray(shape, np.uint8, buffer=self.shm.buf)
+
+    def _release_buffer(self):
+        if self.shm is None:
+            return
+        self.frames = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    # ---------- réception ----------
+
+    def _collect(self):
+        while self.running:
+            for conn in connection.wait(self.conns, timeout=0.2):
+                slot = self.conns.index(conn)
+                try:
+                    _, seq, timestamp, detections, latency = conn.recv()
+                except (EOFError, OSError):
+                    self.running = False
+                    break
+
+                with self.lock:
+                    self.busy[slot] = False
+                    self.completed += 1
+                    # Deux workers peuvent finir dans le désordre : on garde le plus récent
+                    if self.result is not None and seq < self.result.seq:
+                        self.stale += 1
+                    else:
+                        self.result = DetectionResult(seq, timestamp, detections, latency, slot)
+
+    def latest(self, newer_than=0):
+        """Dernier résultat (DetectionResult), None si aucun plus récent que `newer_than`"""
+        result = self.result
+        if result is None or result.seq <= newer_than:
+            return None
+        return result
+
+    @property
+    def idle(self):
+        return not all(self.busy)
+
+    # ---------- arrêt ----------
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process in self.processes:
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        for conn in self.conns:
+            conn.close()
+        if self.listener:
+            self.listener.close()
+        self._release_buffer()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 8 and sys.argv[1] == '--worker':
+        _, _, host, port, key, name, size, slot = sys.argv
+        worker_main((host, int(port)), bytes.fromhex(key), name, int(size) or None, int(slot))
+    else:
+        print("Usage interne : lancé par DetectionPool")
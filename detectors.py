@@ -0,0 +1,224 @@
+"""
+Registre de détecteurs : choisir un modèle et sa taille d'entrée par nom
+
+    detector = create_detector('yolov4-tiny', input_size=320)
+    for obj in detector.detect(frame):
+        x, y, w, h = obj['box']
+
+Modèles enregistrés :
+- yolov3, yolov3-tiny, yolov4-tiny : cfg du dépôt + poids .weights (darknet)
+- mobilenet-ssd : deploy.prototxt + caffemodel (téléchargé si absent)
+- haar-face : Haar Cascade d'OpenCV (visages)
+
+Chaque détecteur mesure son temps de chargement et sa latence par image,
+pour choisir un modèle léger sur un portable de terrain et le modèle
+complet hors ligne.
+"""
+
+import os
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from yolo_decode import decode_yolo_outputs
+
+EMA = 0.1
+DETECTORS = {}
+
+
+def register_detector(name, cls, **defaults):
+    """Enregistre une classe de détecteur sous un nom, avec ses paramètres par défaut"""
+    DETECTORS[name] = (cls, defaults)
+
+
+def available_detectors():
+    return sorted(DETECTORS)
+
+
+def create_detector(name, input_size=None, **overrides):
+    """Instancie et charge le détecteur `name`"""
+    if name not in DETECTORS:
+        raise KeyError(f"Détecteur inconnu '{name}' (disponibles: {', '.join(available_detectors())})")
+    cls, defaults = DETECTORS[name]
+    params = dict(defaults, **overrides)
+    if input_size is not None:
+        params['input_size'] = input_size
+    detector = cls(name=name, **params)
+    detector.load()
+    return detector
+
+
+# ============================================================
+#                    CLASSE DE BASE
+# ============================================================
+
+class Detector(ABC):
+    """Interface commune : load() puis detect(frame) -> liste de dicts"""
+
+    classes = []
+
+    def __init__(self, name, input_size=None, conf_threshold=0.5):
+        self.name = name
+        self.input_size = input_size
+        self.conf_threshold = conf_threshold
+
+        self.load_time = None       # s
+        self.last_latency = None    # s
+        self.mean_latency = None    # s, moyenne glissante
+        self.frames = 0
+
+    def load(self):
+        start = time.perf_counter()
+        self._load()
+        self.load_time = time.perf_counter() - start
+        return self
+
+    def detect(self, frame):
+        """Renvoie [{'box': (x, y, w, h), 'class_id', 'label', 'confidence'}]"""
+        start = time.perf_counter()
+        detections = self._detect(frame)
+        latency = time.perf_counter() - start
+
+        self.last_latency = latency
+        self.mean_latency = latency if self.mean_latency is None else \
+            self.mean_latency + EMA * (latency - self.mean_latency)
+        self.frames += 1
+        return detections
+
+    def describe(self):
+        text = f"{self.name} ({self.input_size}) - chargement {self.load_time * 1000:.0f} ms"
+        if self.mean_latency is not None:
+            text += f", {self.mean_latency * 1000:.1f} ms/image"
+        return text
+
+    @abstractmethod
+    def _load(self):
+        """Charge le modèle (appelé par load(), qui le chronomètre)"""
+
+    @abstractmethod
+    def _detect(self, frame):
+        """Détections brutes d'une image (appelé par detect(), qui le chronomètre)"""
+
+    def _result(self, box, class_id, confidence):
+        class_id = int(class_id)
+        return {'box': tuple(int(v) for v in box), 'class_id': class_id,
+                'label': self.classes[class_id], 'confidence': float(confidence)}
+
+
+# ============================================================
+#                    BACKENDS
+# ============================================================
+
+class YoloDetector(Detector):
+    """YOLO darknet via cv2.dnn (sorties décodées par yolo_decode)"""
+
+    def __init__(self, name, cfg, weights, names='coco.names', input_size=416,
+                 conf_threshold=0.5, nms_threshold=0.4, weights_url=None):
+        super().__init__(name, input_size, conf_threshold)
+        self.cfg = cfg
+        self.weights = weights
+        self.names = names
+        self.nms_threshold = nms_threshold
+        self.weights_url = weights_url
+        self.net = None
+        self.output_layers = None
+
+    def _load(self):
+        if not os.path.exists(self.weights):
+            raise FileNotFoundError(f"{self.weights} absent - à télécharger: {self.weights_url}")
+        self.net = cv2.dnn.readNet(self.weights, self.cfg)
+        with open(self.names, "r") as f:
+            self.classes = [line.strip() for line in f.readlines()]
+        self.output_layers = self.net.getUnconnectedOutLayersNames()
+
+    def _detect(self, frame):
+        height, width = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(frame, 0.00392, (self.input_size, self.input_size),
+                                     (0, 0, 0), True, crop=False)
+        self.net.setInput(blob)
+        outs = self.net.forward(self.output_layers)
+        boxes, confidences, class_ids = decode_yolo_outputs(outs, width, height,
+                                                            self.conf_threshold, self.nms_threshold)
+        return [self._result(box, class_id, confidence)
+                for box, confidence, class_id in zip(boxes, confidences, class_ids)]
+
+
+class MobileNetSSDDetector(Detector):
+    """MobileNet-SSD (Caffe, 20 classes VOC)"""
+
+    classes = ["arriere-plan", "avion", "velo", "oiseau", "bateau", "bouteille", "bus",
+               "voiture", "chat", "chaise", "vache", "table", "chien", "cheval",
+               "moto", "personne", "plante", "mouton", "sofa", "train", "tv"]
+
+    MODEL_URL = "https://github.com/chuanqi305/MobileNet-SSD/raw/master/mobilenet_iter_73000.caffemodel"
+    CONFIG_URL = "https://raw.githubusercontent.com/chuanqi305/MobileNet-SSD/master/deploy.prototxt"
+
+    def __init__(self, name, model_file="mobilenet_iter_73000.caffemodel",
+                 config_file="deploy.prototxt", input_size=300, conf_threshold=0.5):
+        super().__init__(name, input_size, conf_threshold)
+        self.model_file = model_file
+        self.config_file = config_file
+        self.net = None
+
+    def _load(self):
+        if not os.path.exists(self.model_file):
+            print("Téléchargement du modèle MobileNet-SSD (23 MB)...")
+            urllib.request.urlretrieve(self.MODEL_URL, self.model_file)
+            print("✓ Modèle téléchargé")
+        if not os.path.exists(self.config_file):
+            print("Téléchargement de la configuration...")
+            urllib.request.urlretrieve(self.CONFIG_URL, self.config_file)
+            print("✓ Configuration téléchargée")
+        self.net = cv2.dnn.readNetFromCaffe(self.config_file, self.model_file)
+
+    def _detect(self, frame):
+        height, width = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(frame, 0.007843, (self.input_size, self.input_size), 127.5)
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+
+        kept = detections[detections[:, 2] > self.conf_threshold]
+        corners = kept[:, 3:7] * np.array([width, height, width, height], np.float32)
+        return [self._result((x1, y1, x2 - x1, y2 - y1), class_id, confidence)
+                for (_, class_id, confidence), (x1, y1, x2, y2) in zip(kept[:, :3], corners)]
+
+
+class HaarFaceDetector(Detector):
+    """Haar Cascade d'OpenCV (input_size = largeur de travail, None = pleine image)"""
+
+    classes = ["Visage"]
+
+    def __init__(self, name, cascade='haarcascade_frontalface_default.xml', input_size=None,
+                 scale_factor=1.3, min_neighbors=5):
+        super().__init__(name, input_size)
+        self.cascade_file = cascade
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.cascade = None
+
+    def _load(self):
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + self.cascade_file)
+        if self.cascade.empty():
+            raise FileNotFoundError(f"Cascade introuvable: {self.cascade_file}")
+
+    def _detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        scale = 1.0
+        if self.input_size and gray.shape[1] > self.input_size:
+            scale = gray.shape[1] / self.input_size
+            gray = cv2.resize(gray, (self.input_size, int(gray.shape[0] / scale)))
+        faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+        return [self._result(np.asarray(box) * scale, 0, 1.0) for box in faces]
+
+
+register_detector('yolov3', YoloDetector, cfg='yolov3.cfg', weights='yolov3.weights',
+                  weights_url='https://pjreddie.com/media/files/yolov3.weights')
+register_detector('yolov3-tiny', YoloDetector, cfg='yolov3-tiny.cfg', weights='yolov3-tiny.weights',
+                  weights_url='https://pjreddie.com/media/files/yolov3-tiny.weights')
+register_detector('yolov4-tiny', YoloDetector, cfg='yolov4-tiny.cfg', weights='yolov4-tiny.weights',
+                  weights_url='https://github.com/AlexeyAB/darknet/releases/download/darknet_yolo_v4_pre/yolov4-tiny.weights')
+register_detector('mobilenet-ssd', MobileNetSSDDetector)
+register_detector('haar-face', HaarFaceDetector)
@@ -0,0 +1,92 @@
+"""
+Arrêt d'urgence : consigne nulle puis land (ou emergency), sans aucune attente
+
+Ce qui compte est le temps entre l'appui sur la touche (ESC, Ctrl+C) et le
+départ du dernier paquet vers le dernier drone. Avant, les scripts
+attendaient 0.3 s entre 'rc 0 0 0 0' et 'land', et le contrôleur dual
+n'atterrissait que le Tello. Ici :
+- la boucle de contrôle est suspendue et la sortie rc coupée (plus aucune
+  consigne ne repart derrière l'arrêt)
+- 'rc 0 0 0 0' et 'land' partent d'un bloc, hors de la file des requêtes
+- chaque arrêt est mesuré et affiché (objectif : moins de 100 ms pour une
+  flotte de 4 drones) ; TELLO_STOP_LOG=emergency_stops.csv l'ajoute aussi
+  à ce fichier CSV
+
+Script mono-drone (threads) :
+    pressed_at = time.monotonic()               # dès la lecture de la touche
+    stop_tello(link, pressed_at, control_loop=control_loop, rc_output=rc_output)
+
+Flotte asyncio : `await fleet.stop_all('land', pressed_at)` (fleet.py) envoie à
+tous les drones en parallèle avec le même enregistrement.
+"""
+
+import os
+import time
+from collections import deque
+
+TARGET_LATENCY = 0.1        # s, touche -> dernier paquet
+STOP_LOG = os.environ.get('TELLO_STOP_LOG', '')      # vide : aucun fichier écrit
+HISTORY = 50
+
+
+class StopRecorder:
+    """Mesure et journalise la latence de chaque arrêt d'urgence"""
+
+    def __init__(self, path=STOP_LOG):
+        self.path = path
+        self.latencies = deque(maxlen=HISTORY)
+
+    def record(self, mode, pressed_at, sent):
+        """`sent` : {drone: instant d'émission du dernier paquet, None si échec}
+
+        Renvoie la latence touche -> dernier paquet en s (None si rien n'est parti).
+        """
+        times = [t for t in sent.values() if t is not None]
+        failed = [name for name, t in sent.items() if t is None]
+        latency = max(times) - pressed_at if times else None
+
+        if latency is None:
+            print(f"✗ Arrêt ({mode}): aucun paquet envoyé")
+        else:
+            self.latencies.append(latency)
+            flag = "✓" if latency < TARGET_LATENCY else "⚠️ "
+            print(f"{flag} Arrêt ({mode}) envoyé à {len(times)} drone(s) en {latency * 1000:.1f} ms")
+        for name in failed:
+            print(f"✗ [{name}] Arrêt non envoyé")
+
+        self._append(mode, pressed_at, sent, latency)
+        return latency
+
+    def _append(self, mode, pressed_at, sent, latency):
+        if not self.path:
+            return
+        per_drone = " ".join(f"{name}={(t - pressed_at) * 1000:.1f}" if t is not None else f"{name}=échec"
+                             for name, t in sent.items())
+        try:
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if new_file:
+                    f.write("date,mode,drones,latence_ms,detail_ms\n")
+                latency_ms = f"{latency * 1000:.1f}" if latency is not None else ""
+                f.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')},{mode},{len(sent)},"
+                        f"{latency_ms},{per_drone}\n")
+        except OSError as e:
+            print(f"⚠️  Journal d'arrêt: {e}")
+
+
+def stop_tello(link, pressed_at=None, mode='land', control_loop=None, rc_output=None,
+               recorder=None, name="TELLO"):
+    """Arrêt d'un Tello depuis un script synchrone (TelloCommandLink)
+
+    Renvoie la latence touche -> dernier paquet en s.
+    """
+    pressed_at = time.monotonic() if pressed_at is None else pressed_at
+    # Plus aucune consigne ne doit repartir derrière l'arrêt
+    if control_loop is not None:
+        control_loop.suspend()
+    if rc_output is not None:
+        rc_output.release()
+
+    sent = link.send_now(['rc 0 0 0 0', mode])
+    recorder = StopRecorder() if recorder is None else recorder
+    return recorder.record(mode, pressed_at, {name: sent})
@@ -1,11 +1,25 @@
-import socket
 import cv2
-import time
 import threading
+import time
 import os
-import sys
-import numpy as np
 import pickle
+import numpy as np
+
+from control_loop import ControlLoop
+from emergency_stop import stop_tello
+from flight_recorder import create_recorder
+from frame_grabber import create_grabber
+from hud import HudPanel
+from hybrid_detector import HybridDetector
+from multi_tracker import MultiObjectTracker
+from pid_control import FaceFollowController
+from profiler import PROFILE, StageProfiler
+from roi_cascade import RoiCascadeSearch
+from target_prediction import TargetPredictor
+from tello_link import TelloCommandLink
+from tello_telemetry import TelloTelemetry
+from viewer import create_display
+from rc_output import RcOutput
 
 os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;udp'
 os.environ['OPENCV_LOG_LEVEL'] = 'FATAL'
@@ -14,49 +28,66 @@ print("=" * 60)
 print("  TELLO - SUIVI DE VISAGE FLUIDE")
 print("=" * 60)
 
-command_socket = None
-socket_lock = threading.Lock()
+# Liaison de commande partagée (socket persistant, rc jamais bloqués)
+link = None
+send_command = None
+
+# Journal de vol (TELLO_FLIGHT_LOG=flights -> flights/<date>/, désactivé par défaut)
+recorder = create_recorder()
+
+# Durée de chaque étape du pipeline (HUD avec TELLO_PROFILE=1, CSV avec TELLO_PROFILE_LOG)
+profiler = StageProfiler(recorder=recorder)
 
 def init_socket():
-    global command_socket
-    command_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    command_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    command_socket.bind(('', 9000))
-    command_socket.settimeout(2)
-
-def send_command(command, tello_address=('192.168.10.1', 8889), wait_response=True):
-    global command_socket
-    with socket_lock:
-        try:
-            command_socket.sendto(command.encode('utf-8'), tello_address)
-            if wait_response:
-                try:
-                    response, _ = command_socket.recvfrom(1024)
-                    return response.decode('utf-8').strip()
-                except socket.timeout:
-                    return None
-            return None
-        except Exception as e:
-            print(f"Erreur: {e}")
-            return None
+    global link, send_command
+    link = TelloCommandLink(recorder=recorder)
+    send_command = link.send_command
 
 # Détecteur Haar Cascade (RAPIDE - utilisé par tous les projets Tello qui marchent)
 print("\n📦 Chargement détecteur Haar Cascade...")
 face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
 print("✓ Détecteur chargé (même technologie que les projets GitHub Tello)")
 
-def display_frame_with_text(cap, text, duration):
+# Verrouillage : recherche autour du dernier visage, balayage complet après 3 échecs
+face_search = RoiCascadeSearch(face_cascade, 1.3, 5, max_misses=3)
+
+def detect_faces(frame, gray):
+    # Recentrer la fenêtre sur la position suivie depuis la dernière détection
+    if face_search.last_box is not None and face_detector.tracks:
+        lx, ly, lw, lh = face_search.last_box
+        face_search.last_box = min((box for box, _ in face_detector.tracks),
+                                   key=lambda b: abs(b[0] - lx) + abs(b[1] - ly))
+    return [(box, None) for box in face_search.detect(gray)]
+
+# Détection Haar périodique, flux optique entre deux détections
+face_detector = HybridDetector(detect_faces)
+
+# Fenêtre cv2, ou viewer web sans écran (TELLO_HEADLESS=1)
+display = create_display("Tello - Suivi Visage")
+
+# Fenêtre agrandie : l'image est mise à l'échelle dans un tampon réutilisé
+# (le navigateur met lui-même à l'échelle en mode sans écran).
+# L'image lue reste à nous jusqu'au read() suivant : on dessine directement dessus.
+DISPLAY_SIZE = (1440, 960)
+display_buffer = np.empty((DISPLAY_SIZE[1], DISPLAY_SIZE[0], 3), np.uint8)
+
+def upscale(frame):
+    if display.headless:
+        return frame
+    return cv2.resize(frame, DISPLAY_SIZE, dst=display_buffer)
+
+def display_frame_with_text(grabber, text, duration):
     start_time = time.time()
     while time.time() - start_time < duration:
-        ret, frame = cap.read()
-        if ret and frame is not None:
-            display_frame = frame.copy()
-            cv2.putText(display_frame, text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 3)
-            display_frame = cv2.resize(display_frame, (1440, 960))
-            cv2.imshow("Tello - Suivi Visage", display_frame)
-            cv2.waitKey(1)
+        seq, frame_time, frame = grabber.read(timeout=0.1)
+        if frame is not None:
+            cv2.putText(frame, text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 3)
+            display.show(upscale(frame))
+            display.poll_key()
 
 init_socket()
+telemetry = TelloTelemetry(recorder=recorder).start()
+rc_output = RcOutput(profiler.wrap('send', send_command)).start()
 
 print("\n1. Connexion au Tello...")
 response = send_command('command')
@@ -77,20 +108,11 @@ time.sleep(3)
 
 print("\n4. Ouverture du flux...")
 
-stderr_backup = sys.stderr
-sys.stderr = open(os.devnull, 'w')
-cap = cv2.VideoCapture('udp://0.0.0.0:11111', cv2.CAP_FFMPEG)
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-sys.stderr.close()
-sys.stderr = stderr_backup
+grabber = create_grabber().start()
 
 print("   Attente du flux vidéo...")
-for i in range(30):
-    ret, frame = cap.read()
-    if ret and frame is not None:
-        print("   ✓ Flux vidéo OK !")
-        break
-    time.sleep(0.2)
+if grabber.wait_first_frame():
+    print("   ✓ Flux vidéo OK !")
 
 print("\n" + "=" * 60)
 print("COMMANDES:")
@@ -103,64 +125,88 @@ print("\n✓ SOLUTION OPTIMALE : Haar Cascade")
 print("  (Même technologie que tous les projets GitHub Tello)")
 print("  → Fluide et efficace pour le suivi en temps réel\n")
 
-w, h = 360, 240
 fbRange = [6200, 6800]
-pid = [0.4, 0.4, 0]
-pError = 0
 running = True
+stop_pressed_at = None     # instant de la demande d'arrêt (q, ESC, Ctrl+C)
 flying = False
+landing = False
 tracking_enabled = False
 last_led_command = ""
 
 # Tracking
 tracked_faces = []
 
-def track_target(center, area, w, pid, pError):
-    if center is None:
-        send_command('rc 0 0 0 0', wait_response=False)
-        return 0
-    
-    x, y = center
-    fb = 0
-    
-    error = x - w // 2
-    speed = pid[0] * error + pid[1] * (error - pError)
-    speed = int(np.clip(speed, -100, 100))
-    
-    if area > fbRange[0] and area < fbRange[1]:
-        fb = 0
-    elif area > fbRange[1]:
-        fb = -25
-    elif area < fbRange[0] and area != 0:
-        fb = 25
+# Pistes des visages (vitesse) et prédiction compensant la latence
+face_tracker = MultiObjectTracker(min_hits=2, max_age=5)
+predictor = TargetPredictor(telemetry, frame_width=960)
+
+# PID lacet / montée / avant-arrière cadencé par l'horodatage des images
+controller = FaceFollowController(rc_output, (960, 720), target_area=sum(fbRange) / 2,
+                                  area_tolerance=(fbRange[1] - fbRange[0]) / sum(fbRange))
+controller_target = None
+
+# Textes d'état sans fond : rendus une fois par changement
+info_panel = HudPanel((0, 0), (420, 145), alpha=0)
+
+def control_step(now, target):
+    """Tick à 30 Hz : cible prédite à l'instant du tick puis PID"""
+    global controller_target
+    if not (flying and tracking_enabled):
+        controller_target = None
+        return
+    if target is None:
+        controller_target = None
+        controller.lost()
+        return
     
-    send_command(f'rc 0 {fb} 0 {speed}', wait_response=False)
-    return error
+    # Position avancée jusqu'à maintenant (latence vidéo + lacet du drone)
+    box, velocity, frame_time = target
+    controller_target = predictor.predict_box(box, velocity, frame_time, now)
+    controller.update(controller_target, now)
+
+def control_stale():
+    """Plus d'image depuis 0.5 s : stationnaire"""
+    if flying:
+        print("⚠️  Vidéo figée : stationnaire")
+        controller.lost()
+
+control_loop = ControlLoop(profiler.wrap('control', control_step), rate_hz=30, watchdog=0.5, on_stale=control_stale).start()
 
 try:
     print("✓ Système prêt\n")
+    last_seq = 0
     
     while running:
-        ret, frame = cap.read()
+        with profiler.stage('capture'):
+            seq, frame_time, frame = grabber.read(timeout=0.1)
         
-        if ret and frame is not None:
-            display_frame = frame.copy()
+        # Pas d'image neuve : rien à publier, le chien de garde fera le reste
+        if frame is not None and seq != last_seq:
+            last_seq = seq
+            display_frame = frame
+            target = None
             
             # Suivi de visage
             if tracking_enabled:
-                # Détection RAPIDE avec Haar Cascade
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+                # Haar Cascade toutes les N images, suivi entre deux
+                with profiler.stage('cvtColor'):
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                with profiler.stage('detect'):
+                    faces = face_detector.update(frame, gray)
                 
-                # Créer détections
+                # Pistes Kalman : vitesse de chaque visage pour la prédiction
+                with profiler.stage('track'):
+                    tracks = face_tracker.update(faces, frame_time)
+                if recorder is not None:
+                    recorder.detections(frame_time, seq, tracks)
                 current_detections = []
-                for (x, y, w, h) in faces:
-                    center = (x + w//2, y + h//2)
-                    area = w * h
+                for track in tracks:
+                    x, y, w, h = track.box
                     current_detections.append({
-                        'box': (x, y, w, h),
-                        'center': center,
-                        'area': area
+                        'box': track.box,
+                        'center': track.center,
+                        'area': w * h,
+                        'velocity': track.velocity
                     })
                 
                 tracked_faces = current_detections.copy()
@@ -172,7 +218,8 @@ try:
                     # Trouver le visage le plus proche du centre
                     closest_face = min(tracked_faces, key=lambda f: abs(f['center'][0] - frame_center_x))
                     
-                    pError = track_target(closest_face['center'], closest_face['area'], frame.shape[1], pid, pError)
+                    # Cible transmise à la boucle de contrôle (30 Hz, indépendante de la vidéo)
+                    target = (closest_face['box'], closest_face['velocity'], frame_time)
                     face_locked = True
                     
                     # LED verte pour cible
@@ -185,114 +232,169 @@ try:
                         new_led = 'EXT led 0 0 255'  # Bleu
                 
                 if new_led != last_led_command:
-                    send_command(new_led, wait_response=False)
+                    with profiler.stage('send'):
+                        send_command(new_led, wait_response=False)
                     last_led_command = new_led
             
             # Dessiner visages
-            for i, obj in enumerate(tracked_faces):
-                x, y, w, h = obj['box']
+            with profiler.stage('draw'):
+                for i, obj in enumerate(tracked_faces):
+                    x, y, w, h = obj['box']
                 
-                # Couleur : vert pour le visage suivi, bleu pour les autres
-                if tracking_enabled and flying and i == 0:
-                    # Le premier visage (celui suivi)
-                    frame_center_x = frame.shape[1] // 2
-                    closest_face = min(tracked_faces, key=lambda f: abs(f['center'][0] - frame_center_x))
-                    if obj == closest_face:
+                    # Couleur : vert pour le visage suivi, bleu pour les autres
+                    if tracking_enabled and flying and i == 0:
+                        # Le premier visage (celui suivi)
+                        frame_center_x = frame.shape[1] // 2
+                        closest_face = min(tracked_faces, key=lambda f: abs(f['center'][0] - frame_center_x))
+                        if obj == closest_face:
+                            color = (0, 255, 0)  # Vert
+                            thickness = 3
+                        else:
+                            color = (255, 165, 0)  # Orange
+                            thickness = 2
+                    else:
                         color = (0, 255, 0)  # Vert
                         thickness = 3
-                    else:
-                        color = (255, 165, 0)  # Orange
-                        thickness = 2
-                else:
-                    color = (0, 255, 0)  # Vert
-                    thickness = 3
                 
-                cv2.rectangle(display_frame, (x, y), (x+w, y+h), color, thickness)
+                    cv2.rectangle(display_frame, (x, y), (x+w, y+h), color, thickness)
                 
-                label = f"Visage {i+1}"
-                label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                cv2.rectangle(display_frame, (x, y - label_size[1] - 10), (x + label_size[0] + 5, y), color, -1)
-                cv2.putText(display_frame, label, (x + 3, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                    label = f"Visage {i+1}"
+                    label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+                    cv2.rectangle(display_frame, (x, y - label_size[1] - 10), (x + label_size[0] + 5, y), color, -1)
+                    cv2.putText(display_frame, label, (x + 3, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
                 
-                cv2.circle(display_frame, obj['center'], 4, color, -1)
+                    cv2.circle(display_frame, obj['center'], 4, color, -1)
+            
+            # Horodatage de l'image, pas de la boucle : un flux figé déclenche le chien de garde
+            control_loop.publish(target, timestamp=frame_time)
+            
+            # Position prédite de la cible suivie
+            predicted_box = controller_target
+            if tracking_enabled and flying and predicted_box is not None:
+                px, py, pw, ph = predicted_box
+                cv2.circle(display_frame, (px + pw // 2, py + ph // 2), 6, (0, 0, 255), 2)
             
             # Reset si désactivé
             if not tracking_enabled:
                 tracked_faces = []
+                face_detector.reset()
+                face_search.reset()
+                face_tracker.reset()
             
-            # Infos
-            if flying:
-                status = "EN VOL"
-                status_color = (0, 255, 0)
-            else:
-                status = "AU SOL - Appuyez sur T"
-                status_color = (255, 255, 0)
+            with profiler.stage('hud'):
+                # Infos
+                if flying:
+                    status = "EN VOL"
+                    status_color = (0, 255, 0)
+                else:
+                    status = "AU SOL - Appuyez sur T"
+                    status_color = (255, 255, 0)
             
-            cv2.putText(display_frame, status, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-            cv2.putText(display_frame, f"Batterie: {battery}%", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                info_panel.text('status', status, (10, 30), 0.7, status_color)
+                info_panel.text('battery', f"Batterie: {battery}%", (10, 60), 0.6, (0, 255, 0))
             
-            if tracking_enabled:
-                track_text = f"Suivi: ON [{len(tracked_faces)} visage(s)]"
-                track_color = (0, 255, 0)
-            else:
-                track_text = "Suivi: OFF (R pour activer)"
-                track_color = (128, 128, 128)
-            cv2.putText(display_frame, track_text, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.5, track_color, 2)
+                if tracking_enabled:
+                    track_text = f"Suivi: ON [{len(tracked_faces)} visage(s)]"
+                    track_color = (0, 255, 0)
+                else:
+                    track_text = "Suivi: OFF (R pour activer)"
+                    track_color = (128, 128, 128)
+                info_panel.text('tracking', track_text, (10, 90), 0.5, track_color)
+            
+                if tracking_enabled and flying:
+                    fb, ud, yaw = controller.command
+                    info_panel.text('rc', f"rc fb:{fb} ud:{ud} yaw:{yaw}", (10, 115), 0.5, (255, 255, 255), 1)
+                    info_panel.text('age', f"Age cible: {predictor.age * 1000:.0f} ms", (10, 135),
+                                    0.5, (255, 255, 255), 1)
+                else:
+                    info_panel.remove('rc')
+                    info_panel.remove('age')
+                info_panel.draw(display_frame)
+            
+            profiler.draw(display_frame)
             
             # Afficher
-            display_frame = cv2.resize(display_frame, (1440, 960))
-            cv2.imshow("Tello - Suivi Visage", display_frame)
+            with profiler.stage('resize'):
+                display_frame = upscale(display_frame)
+            with profiler.stage('show'):
+                display.show(display_frame)
+            profiler.frame()
         
-        key = cv2.waitKey(1) & 0xFF
+        # Fenêtre cv2 : l'affichage HighGUI se fait réellement ici
+        with profiler.stage('keys'):
+            key = display.poll_key()
         
         if key == ord('r') or key == ord('R'):
             tracking_enabled = not tracking_enabled
+            if flying and not tracking_enabled:
+                controller.lost()
             print(f"🎯 Suivi: {'ACTIVÉ' if tracking_enabled else 'DÉSACTIVÉ'}")
         
         elif (key == ord('t') or key == ord('T')) and not flying:
             print("\n🚁 Décollage...")
-            send_command('takeoff')
-            display_frame_with_text(cap, "DÉCOLLAGE...", 6)
-            send_command('rc 0 0 0 0', wait_response=False)
-            display_frame_with_text(cap, "STABILISATION...", 2)
+            # 'ok' seulement en fin de décollage (jusqu'à 20 s) : hors de la boucle vidéo
+            threading.Thread(target=lambda: send_command('takeoff'), daemon=True).start()
+            display_frame_with_text(grabber, "DÉCOLLAGE...", 6)
+            rc_output.hover()
+            display_frame_with_text(grabber, "STABILISATION...", 2)
             flying = True
             print("✓ En vol !")
         
-        elif (key == ord('l') or key == ord('L')) and flying:
+        elif (key == ord('l') or key == ord('L')) and flying and not landing:
             print("\n🛬 Atterrissage...")
-            send_command('rc 0 0 0 0', wait_response=False)
-            time.sleep(0.3)
-            send_command('EXT led 0 0 0', wait_response=False)
-            send_command('land')
-            time.sleep(3)
-            flying = False
-            tracking_enabled = False
-            print("✓ Au sol !")
+            landing = True
+            
+            def land_thread():
+                global flying, landing, tracking_enabled
+                control_loop.suspend()
+                rc_output.release()
+                send_command('rc 0 0 0 0', wait_response=False)
+                send_command('EXT led 0 0 0', wait_response=False)
+                send_command('land')
+                time.sleep(3)
+                flying = False
+                landing = False
+                tracking_enabled = False
+                control_loop.resume()
+                print("✓ Au sol !")
+            
+            threading.Thread(target=land_thread, daemon=True).start()
         
         elif key == ord('q') or key == 27:
+            stop_pressed_at = time.monotonic()
             print("\n⚠️  Sortie...")
             running = False
             break
 
 except KeyboardInterrupt:
+    stop_pressed_at = time.monotonic()
     print("\n\n⚠️ ARRÊT D'URGENCE")
     running = False
 
 finally:
     if flying:
         print("🛬 Atterrissage automatique...")
-        send_command('rc 0 0 0 0', wait_response=False)
-        time.sleep(0.3)
-        send_command('land')
+        stop_tello(link, stop_pressed_at, control_loop=control_loop, rc_output=rc_output)
         time.sleep(3)
+    control_loop.stop()
     
+    rc_output.stop()
+    telemetry.stop()
     send_command('EXT led 0 0 0', wait_response=False)
-    cap.release()
+    grabber.stop()
     send_command('streamoff', wait_response=False)
-    if command_socket:
-        command_socket.close()
-    cv2.destroyAllWindows()
+    if link:
+        link.close()
+    if recorder is not None:
+        recorder.close()
+        print(f"📼 Journal de vol: {recorder.describe()}")
+    if PROFILE:
+        print(f"  Profil du pipeline: {profiler.describe()}")
+    display.close()
     print("\n✓ Programme terminé")
+    jitter = control_loop.jitter()
+    print(f"  Boucle de contrôle: {control_loop.ticks} ticks, gigue p99 {jitter['p99']:.1f} ms, "
+          f"{control_loop.overruns} dépassements, {control_loop.stale_events} vidéo figée")
     print("\nℹ️  Note: Tous les projets Tello sur GitHub utilisent")
     print("   Haar Cascade pour le suivi fluide en temps réel.")
     print("   La reconnaissance avec noms nécessite un GPU dédié.")
\ No newline at end of file
@@ -0,0 +1,533 @@
+"""
+Flotte de N drones (Tello et Mambo) pilotés depuis une seule boucle asyncio
+
+Chaque drone expose la même interface asynchrone (FleetDrone) :
+- connect / disconnect / takeoff / land / emergency / flat_trim
+- rc(lr, fb, ud, yaw) : consigne non bloquante, conventions du Tello
+- forward(cm) / rotate(degrés) : déplacements en boucle fermée côté Tello
+  (commandes SDK), impulsions rc de `duration` s côté Mambo
+Chaque commande renvoie l'instant (time.monotonic()) où elle est réellement
+partie : émission UDP côté Tello, trame PCMD suivante côté Mambo.
+
+Une chorégraphie est une liste d'étapes datées par rapport à un départ
+commun ; toutes les commandes d'une étape visent la même échéance absolue
+et l'écart réel entre drones (skew) est mesuré à chaque étape. Avec
+compensate=True, chaque drone est déclenché en avance de sa latence
+médiane d'émission pour garder la flotte synchronisée.
+
+    fleet = Fleet([TelloDrone("tello"), MamboDrone("mambo")])
+    await fleet.connect()
+    await fleet.play(square())
+    print(fleet.describe())
+
+En ligne de commande (drones « tello[:ip] » ou « mambo[:adresse] ») :
+    python fleet.py carre tello:192.168.10.2 tello:192.168.10.3 mambo
+"""
+
+import asyncio
+import signal
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque, namedtuple
+
+from emergency_stop import StopRecorder
+from scheduler import AsyncRateScheduler, LoopLagMonitor, percentile
+from tello_link import LOCAL_PORT, TELLO_ADDRESS, AsyncTello
+
+HISTORY = 200           # mesures de skew / retard conservées
+START_LEAD = 0.5        # s, délai entre play() et la première étape
+MAX_COMPENSATION = 0.1  # s, avance maximale accordée à un drone lent
+SEND_TIMEOUT = 1.0      # s, attente maximale de l'émission d'une consigne
+
+
+def _clamp(value):
+    return max(-100, min(100, int(value)))
+
+
+# ============================================================
+#                    INTERFACE COMMUNE
+# ============================================================
+
+class FleetDrone(ABC):
+    """Interface commune d'un drone de la flotte (backend incomplet : refusé à la création)"""
+
+    kind = "drone"
+
+    def __init__(self, name):
+        self.name = name
+        self.latency = deque(maxlen=HISTORY)    # appel -> émission, en s
+        self.lateness = deque(maxlen=HISTORY)   # émission - échéance, en s
+
+    @abstractmethod
+    async def connect(self):
+        """True une fois le drone prêt"""
+
+    async def disconnect(self):
+        pass
+
+    @abstractmethod
+    async def takeoff(self):
+        pass
+
+    @abstractmethod
+    async def land(self):
+        pass
+
+    @abstractmethod
+    async def emergency(self):
+        pass
+
+    async def flat_trim(self):
+        """Calibration au sol (sans objet pour certains drones)"""
+        return time.monotonic()
+
+    @abstractmethod
+    async def rc(self, lr=0, fb=0, ud=0, yaw=0):
+        pass
+
+    async def hover(self):
+        return await self.rc()
+
+    @abstractmethod
+    async def forward(self, cm, duration=2.0):
+        """Avance de `cm` ; `duration` : temps accordé au mouvement"""
+
+    @abstractmethod
+    async def rotate(self, degrees, duration=1.5):
+        """Rotation horaire de `degrees`"""
+
+    @abstractmethod
+    async def stop(self, mode='land'):
+        """Arrêt d'urgence : consigne nulle puis land/emergency ; instant du dernier paquet"""
+
+    @property
+    def battery(self):
+        return None
+
+    def median_latency(self):
+        return percentile(self.latency, 50) if self.latency else 0.0
+
+    def median_lateness(self):
+        return percentile(self.lateness, 50) if self.lateness else 0.0
+
+
+class TelloDrone(FleetDrone):
+    """Tello via le client asyncio (tello_link.py)
+
+    En vol, hors commande SDK en cours (décollage, forward, cw...), la consigne
+    rc et la compensation de dérive sont renvoyées à cadence fixe, comme
+    l'ancien stabilize_tello ; au sol rien n'est envoyé.
+    """
+
+    kind = "tello"
+
+    def __init__(self, name, host=TELLO_ADDRESS[0], local_port=LOCAL_PORT, trim=(0, 0), rc_rate=20):
+        super().__init__(name)
+        self.driver = AsyncTello(host, local_port)
+        self.trim = trim                        # (lr, fb) de compensation de dérive
+        self.setpoint = (0, 0, 0, 0)            # (lr, fb, ud, yaw) remplacé d'un bloc
+        self.rc_schedule = AsyncRateScheduler(rc_rate)
+        self.rc_task = None
+        self.airborne = False                   # décollage confirmé, atterrissage pas encore lancé
+        self.landing = False
+
+    async def connect(self):
+        print(f"📡 [{self.name}] Connexion...")
+        try:
+            battery = await self.driver.connect()
+        except Exception as e:
+            print(f"✗ [{self.name}] Erreur: {e}")
+            return False
+        print(f"✓ [{self.name}] Connecté - Batterie: {battery}%")
+        self.rc_task = asyncio.create_task(self._rc_loop())
+        return True
+
+    async def disconnect(self):
+        if self.rc_task:
+            self.rc_task.cancel()
+            try:
+                await self.rc_task
+            except asyncio.CancelledError:
+                pass
+        await self.driver.close()
+
+    async def _rc_loop(self):
+        """Maintient la consigne (et la compensation) tant que le drone est en vol"""
+        async for deadline in self.rc_schedule.run():
+            if self.airborne and not self._busy():
+                self._send_rc()
+
+    def _busy(self):
+        """Commande SDK en attente de son 'ok' : un rc l'interromprait"""
+        pending = self.driver.pending
+        return pending is not None and not pending.done()
+
+    def _send_rc(self):
+        lr, fb, ud, yaw = self.setpoint
+        if self.airborne:
+            lr, fb = lr + self.trim[0], fb + self.trim[1]
+        return self.driver.rc(_clamp(lr), _clamp(fb), _clamp(ud), _clamp(yaw))
+
+    def _takeoff_done(self, task):
+        self.airborne = (not task.cancelled() and task.exception() is None
+                         and not self.landing)
+
+    async def rc(self, lr=0, fb=0, ud=0, yaw=0):
+        self.setpoint = (lr, fb, ud, yaw)
+        return self._send_rc()      # sendto UDP : immédiat
+
+    async def takeoff(self):
+        print(f"🚁 [{self.name}] Décollage...")
+        self.landing = False
+        sent = await self.driver.start('takeoff')
+        if self.driver.pending is not None:
+            # En vol (compensation active) seulement une fois le 'ok' reçu
+            self.driver.pending.add_done_callback(self._takeoff_done)
+        return sent
+
+    async def forward(self, cm, duration=2.0):
+        return await self.driver.start(f'forward {int(cm)}')
+
+    async def rotate(self, degrees, duration=1.5):
+        return await self.driver.start(f'cw {int(degrees)}')
+
+    def _grounded(self):
+        self.setpoint = (0, 0, 0, 0)
+        self.airborne = False
+        self.landing = True
+
+    async def land(self):
+        print(f"🛬 [{self.name}] Atterrissage...")
+        self._grounded()
+        return await self.driver.start('land')
+
+    async def emergency(self):
+        print(f"🚨 [{self.name}] Urgence!")
+        self._grounded()
+        return self.driver.emergency()
+
+    async def stop(self, mode='land'):
+        # Deux datagrammes hors file d'attente : rien ne patiente derrière un takeoff en cours
+        self._grounded()
+        if self.rc_task:
+            self.rc_task.cancel()
+        self.driver.rc(0, 0, 0, 0)
+        return self.driver.send_nowait(mode)
+
+    @property
+    def battery(self):
+        return self.driver.battery
+
+
+class MamboDrone(FleetDrone):
+    """Mambo via MamboController ; une consigne part avec la trame PCMD suivante
+
+    Pas de déplacement en distance sur le Mambo : forward / rotate sont des
+    impulsions pitch / yaw de `duration` s suivies d'un stationnaire.
+    """
+
+    kind = "mambo"
+    move_speed = 40
+    yaw_speed = 60
+
+    def __init__(self, name, address=None, pcmd_rate=20):
+        super().__init__(name)
+        # Import local : bleak n'est requis que si un Mambo fait partie de la flotte
+        from mambo_controller import MamboController
+        self.controller = MamboController(address, pcmd_rate)
+        self.pulse_end = None                   # stationnaire programmé en fin d'impulsion
+
+    async def connect(self):
+        return await self.controller.connect()
+
+    async def disconnect(self):
+        await self.controller.disconnect()
+
+    async def takeoff(self):
+        return await self.controller.takeoff()
+
+    async def land(self):
+        self._cancel_pulse()
+        self.controller.hover()
+        return await self.controller.land()
+
+    async def emergency(self):
+        self._cancel_pulse()
+        return await self.controller.emergency()
+
+    async def flat_trim(self):
+        return await self.controller.flat_trim()
+
+    async def stop(self, mode='land'):
+        self._cancel_pulse()
+        return await self.controller.stop(mode)
+
+    def _cancel_pulse(self):
+        if self.pulse_end is not None:
+            self.pulse_end.cancel()
+            self.pulse_end = None
+
+    async def _pulse(self, duration, **axes):
+        self._cancel_pulse()
+        sent = await self.rc(**axes)
+        self.pulse_end = asyncio.get_running_loop().call_later(duration, self.controller.hover)
+        return sent
+
+    async def forward(self, cm, duration=2.0):
+        return await self._pulse(duration, fb=self.move_speed)
+
+    async def rotate(self, degrees, duration=1.5):
+        return await self._pulse(duration, yaw=self.yaw_speed)
+
+    async def rc(self, lr=0, fb=0, ud=0, yaw=0):
+        sent = self.controller.next_pcmd()
+        self.controller.move(roll=lr, pitch=fb, yaw=yaw, gaz=ud)
+        try:
+            return await asyncio.wait_for(sent, SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+
+    async def hover(self):
+        sent = self.controller.next_pcmd()
+        self.controller.hover()
+        try:
+            return await asyncio.wait_for(sent, SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+
+    @property
+    def battery(self):
+        return self.controller.battery
+
+
+# ============================================================
+#                    CHORÉGRAPHIES
+# ============================================================
+
+# at : secondes depuis le départ commun ; drones : noms visés (None = tous)
+Step = namedtuple('Step', 'at action args drones label', defaults=((), None, None))
+
+
+def takeoff_hold_land(hold=5.0):
+    """Calibration, décollage synchronisé, stationnaire `hold` s, atterrissage"""
+    return [
+        Step(0.0, 'flat_trim'),
+        Step(2.0, 'takeoff', label="🚁 DÉCOLLAGE SYNCHRONISÉ"),
+        Step(6.0, 'hover', label=f"🔄 STABILISATION {hold:g} SECONDES"),
+        Step(6.0 + hold, 'land', label="🛬 ATTERRISSAGE SYNCHRONISÉ"),
+    ]
+
+
+def square(distance=50, side=2.0, turn=1.5):
+    """Carré : forward `distance` cm, pause, cw 90, pause (x4)
+
+    Le Tello garde ses commandes SDK en boucle fermée ; `side` et `turn`
+    sont les durées accordées à chaque mouvement (impulsions du Mambo).
+    """
+    steps = [Step(0.0, 'flat_trim'),
+             Step(2.0, 'takeoff', label="🚁 DÉCOLLAGE")]
+    at = 6.0
+    for i in range(4):
+        steps.append(Step(at, 'forward', (distance, side), label=f"→ Côté {i + 1}/4"))
+        steps.append(Step(at + side + 1.0, 'rotate', (90, turn)))
+        at += side + turn + 2.0
+    steps.append(Step(at, 'land', label="🛬 ATTERRISSAGE"))
+    return steps
+
+
+CHOREOGRAPHIES = {
+    'simple': takeoff_hold_land,
+    'carre': square,
+}
+
+
+# ============================================================
+#                    COORDINATEUR
+# ============================================================
+
+class Fleet:
+    """Coordonne N drones sur une horloge commune et mesure leur désynchronisation"""
+
+    def __init__(self, drones, compensate=True):
+        self.drones = list(drones)
+        self.compensate = compensate
+        self.skews = deque(maxlen=HISTORY)      # max - min des émissions d'une étape, en s
+        self.failures = 0
+        self.stopped = False                    # après stop_all : plus aucune commande
+        self.stop_recorder = StopRecorder()
+        self.stop_requests = 0
+        self.stop_tasks = []
+        self.play_task = None                   # chorégraphie en cours, annulée par l'arrêt
+
+    def __getitem__(self, name):
+        for drone in self.drones:
+            if drone.name == name:
+                return drone
+        raise KeyError(name)
+
+    async def connect(self):
+        """Connecte tous les drones en parallèle ; False si l'un d'eux échoue"""
+        results = await asyncio.gather(*(d.connect() for d in self.drones),
+                                       return_exceptions=True)
+        ok = True
+        for drone, result in zip(self.drones, results):
+            if result is not True:
+                print(f"✗ [{drone.name}] Non connecté ({result})")
+                ok = False
+        return ok
+
+    async def disconnect(self):
+        await asyncio.gather(*(d.disconnect() for d in self.drones), return_exceptions=True)
+
+    async def broadcast(self, action, *args, deadline=None, drones=None):
+        """Même commande à tous (ou aux drones nommés), visant une échéance commune
+
+        Renvoie {nom: instant d'émission} ; None pour un drone en échec.
+        """
+        if self.stopped:
+            return {}
+        deadline = time.monotonic() if deadline is None else deadline
+        targets = [d for d in self.drones if drones is None or d.name in drones]
+        results = await asyncio.gather(*(self._fire(d, action, args, deadline) for d in targets),
+                                       return_exceptions=True)
+
+        sent = {}
+        for drone, result in zip(targets, results):
+            if isinstance(result, Exception) or result is None:
+                self.failures += 1
+                print(f"✗ [{drone.name}] {action}: {result}")
+                sent[drone.name] = None
+                continue
+            drone.lateness.append(result - deadline)
+            sent[drone.name] = result
+
+        times = [t for t in sent.values() if t is not None]
+        if len(times) > 1:
+            self.skews.append(max(times) - min(times))
+        return sent
+
+    async def _fire(self, drone, action, args, deadline):
+        """Attend l'échéance (avancée de la latence du drone) puis envoie"""
+        start = deadline
+        if self.compensate:
+            start -= min(drone.median_latency(), MAX_COMPENSATION)
+        delay = start - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        called = time.monotonic()
+        sent = await getattr(drone, action)(*args)
+        if sent is not None:
+            drone.latency.append(max(sent - called, 0.0))
+        return sent
+
+    async def play(self, steps, lead=START_LEAD):
+        """Joue une chorégraphie ; les étapes sont datées depuis un départ commun"""
+        self.play_task = asyncio.current_task()
+        origin = time.monotonic() + lead
+        for step in steps:
+            if self.stopped:
+                break
+            if step.label:
+                print(f"\n{step.label}")
+            await self.broadcast(step.action, *step.args,
+                                 deadline=origin + step.at, drones=step.drones)
+
+    async def stop_all(self, mode='land', pressed_at=None):
+        """Arrêt d'urgence de toute la flotte, en parallèle
+
+        Consigne nulle puis land (ou 'emergency' : moteurs coupés) vers chaque
+        drone ; la latence touche -> dernier paquet est mesurée et journalisée.
+        """
+        pressed_at = time.monotonic() if pressed_at is None else pressed_at
+        self.stopped = True
+        results = await asyncio.gather(*(d.stop(mode) for d in self.drones),
+                                       return_exceptions=True)
+        sent = {drone.name: (None if isinstance(result, BaseException) else result)
+                for drone, result in zip(self.drones, results)}
+        return self.stop_recorder.record(mode, pressed_at, sent)
+
+    def install_stop_handler(self):
+        """Ctrl+C : 1er appui land, 2e appui emergency (moteurs coupés), toute la flotte"""
+        loop = asyncio.get_running_loop()
+        try:
+            # Le gestionnaire s'exécute dans la boucle : l'arrêt part directement de là
+            loop.add_signal_handler(signal.SIGINT, self._stop_from_signal)
+        except NotImplementedError:
+            # Windows : pas de add_signal_handler, on repasse par la boucle
+            signal.signal(signal.SIGINT,
+                          lambda sig, frame: loop.call_soon_threadsafe(self._stop_from_signal))
+
+    def _stop_from_signal(self):
+        pressed_at = time.monotonic()
+        self.stop_requests += 1
+        mode = 'land' if self.stop_requests == 1 else 'emergency'
+        print(f"\n\n🚨 ARRÊT D'URGENCE - TOUTE LA FLOTTE ({mode}) 🚨\n")
+        self.stop_tasks.append(asyncio.ensure_future(self._stop_and_cancel(mode, pressed_at)))
+
+    async def _stop_and_cancel(self, mode, pressed_at):
+        await self.stop_all(mode, pressed_at)
+        if self.play_task is not None and not self.play_task.done():
+            self.play_task.cancel()
+
+    def skew(self):
+        """Désynchronisation entre drones par étape, en ms"""
+        samples = list(self.skews)
+        if not samples:
+            return {'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {'mean': sum(samples) / len(samples) * 1000,
+                'p50': percentile(samples, 50) * 1000,
+                'p99': percentile(samples, 99) * 1000,
+                'max': max(samples) * 1000}
+
+    def describe(self):
+        stats = self.skew()
+        lines = [f"Skew flotte: moyen {stats['mean']:.1f} ms, p99 {stats['p99']:.1f} ms, "
+                 f"max {stats['max']:.1f} ms ({len(self.skews)} étapes, {self.failures} échecs)"]
+        for drone in self.drones:
+            lines.append(f"  {drone.name:>10} ({drone.kind}): latence médiane "
+                         f"{drone.median_latency() * 1000:.1f} ms, retard médian "
+                         f"{drone.median_lateness() * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
+def parse_drone(spec, index):
+    """« tello[:ip] » ou « mambo[:adresse] » -> FleetDrone"""
+    kind, _, target = spec.partition(':')
+    name = f"{kind}{index}"
+    if kind == 'tello':
+        # Un port local par Tello : chaque drone répond au port qui l'a contacté
+        return TelloDrone(name, target or TELLO_ADDRESS[0], local_port=LOCAL_PORT + index)
+    if kind == 'mambo':
+        return MamboDrone(name, target or None)
+    raise ValueError(f"Drone inconnu: {spec}")
+
+
+async def main(choreography, specs):
+    fleet = Fleet([parse_drone(spec, i + 1) for i, spec in enumerate(specs)])
+    monitor = LoopLagMonitor().start()
+    fleet.install_stop_handler()
+    try:
+        if not await fleet.connect():
+            print("\n✗ Échec de l'initialisation")
+            return
+        print(f"\n✓ {len(fleet.drones)} drones prêts - départ dans 3 s (Ctrl+C = arrêt d'urgence)")
+        await asyncio.sleep(3)
+        try:
+            await asyncio.create_task(fleet.play(CHOREOGRAPHIES[choreography]()))
+        except asyncio.CancelledError:
+            print("🚨 Chorégraphie interrompue")
+            await asyncio.gather(*fleet.stop_tasks)
+            await asyncio.sleep(3)      # laisse les drones se poser avant de fermer les liaisons
+        print("\n" + fleet.describe())
+    finally:
+        await fleet.disconnect()
+        monitor.stop()
+        print(monitor.describe())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in CHOREOGRAPHIES:
+        print(f"Usage: python fleet.py {{{'|'.join(CHOREOGRAPHIES)}}} tello[:ip] mambo[:adresse] ...")
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,330 @@
+"""
+Enregistreur de vol : journal binaire en colonnes, lisible instantanément par mmap
+
+Jusqu'ici rien ne restait d'un vol à part les print. Ici chaque flux
+(télémétrie, commandes, rc, détections, temps par étape) est un tableau
+structuré NumPy pré-alloué :
+- append() remplit la ligne suivante du tampon (aucune allocation, ~1 µs)
+- un tampon plein part au thread d'écriture, un tampon libre prend le
+  relais : le disque n'est jamais touché depuis la boucle de contrôle
+- chaque flux est un fichier en ajout seul : en-tête (dtype en JSON) puis
+  les enregistrements bruts à la suite ; un vol interrompu reste lisible
+  jusqu'au dernier bloc écrit
+
+Les scripts n'enregistrent que sur demande (TELLO_FLIGHT_LOG=dossier) :
+    TELLO_FLIGHT_LOG=flights python keyboard.py
+
+    recorder = FlightRecorder().start()         # flights/2026-10-17_14-03-12/
+    recorder.append('rc', (time.monotonic(), 0, 20, 0, 0))
+    recorder.close()
+
+    log = FlightLog('flights/2026-10-17_14-03-12')
+    log.telemetry['bat']                        # np.memmap, rien n'est lu d'avance
+    print(log.summary())
+
+En ligne de commande :
+    python flight_recorder.py flights/2026-10-17_14-03-12   # résumé d'un vol
+    python flight_recorder.py --bench                        # coût d'un append()
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+FLIGHT_LOG_DIR = os.environ.get('TELLO_FLIGHT_LOG', '')   # vide = pas d'enregistrement
+DEFAULT_DIR = 'flights'  # FlightRecorder() créé explicitement sans TELLO_FLIGHT_LOG
+CHUNK = 1024            # enregistrements par bloc écrit
+SPARE_BUFFERS = 2       # tampons d'avance par flux (écriture disque en retard)
+MAGIC = b'FDR1'
+HEADER_SIZE = 512       # octets, en-tête JSON complété d'espaces
+
+# Un flux = un fichier <nom>.fdr ; t = time.monotonic() partout
+STREAMS = {
+    'telemetry': np.dtype([('t', 'f8'), ('pitch', 'i2'), ('roll', 'i2'), ('yaw', 'i2'),
+                           ('vgx', 'i2'), ('vgy', 'i2'), ('vgz', 'i2'),
+                           ('templ', 'i2'), ('temph', 'i2'), ('tof', 'i2'), ('h', 'i2'),
+                           ('bat', 'i2'), ('baro', 'f4'), ('time', 'i4'),
+                           ('agx', 'f4'), ('agy', 'f4'), ('agz', 'f4')]),
+    # latency : envoi -> réponse en s (NaN si aucune réponse attendue ou reçue)
+    'commands': np.dtype([('t', 'f8'), ('command', 'S24'), ('latency', 'f4'), ('ok', '?')]),
+    'rc': np.dtype([('t', 'f8'), ('lr', 'i1'), ('fb', 'i1'), ('ud', 'i1'), ('yaw', 'i1')]),
+    'detections': np.dtype([('t', 'f8'), ('seq', 'u4'), ('track', 'i4'),
+                            ('x', 'i2'), ('y', 'i2'), ('w', 'i2'), ('h', 'i2'),
+                            ('vx', 'f4'), ('vy', 'f4')]),
+    'timings': np.dtype([('t', 'f8'), ('stage', 'S16'), ('ms', 'f4')]),
+}
+
+
+def _header(stream, dtype):
+    meta = json.dumps({'stream': stream, 'dtype': dtype.descr,
+                       'wall_time': time.time(), 'monotonic': time.monotonic()})
+    raw = MAGIC + meta.encode('utf-8')
+    if len(raw) > HEADER_SIZE:
+        raise ValueError(f"En-tête trop long pour {stream}")
+    return raw.ljust(HEADER_SIZE, b' ')
+
+
+def _dtype_from_descr(descr):
+    """dtype.descr relu depuis le JSON (listes -> tuples)"""
+    return np.dtype([tuple(field) for field in descr])
+
+
+# ============================================================
+#                    ENREGISTREMENT
+# ============================================================
+
+class _Stream:
+    """Tampon courant d'un flux + tampons libres, rempli sous verrou"""
+
+    def __init__(self, name, dtype, path, chunk):
+        self.name = name
+        self.dtype = dtype
+        self.file = open(path, 'wb')
+        self.file.write(_header(name, dtype))
+        self.chunk = chunk
+        self.buffer = np.zeros(chunk, dtype)
+        self.free = [np.zeros(chunk, dtype) for _ in range(SPARE_BUFFERS)]
+        self.count = 0
+        self.lock = threading.Lock()
+        self.records = 0
+
+
+class FlightRecorder:
+    """Journal de vol multi-flux, append() sans allocation et écriture en tâche de fond"""
+
+    def __init__(self, directory=None, chunk=CHUNK):
+        if directory is None:
+            directory = os.path.join(FLIGHT_LOG_DIR or DEFAULT_DIR, time.strftime('%Y-%m-%d_%H-%M-%S'))
+        self.directory = directory
+        self.chunk = chunk
+        self.streams = {}
+        self.pending = queue.Queue()
+        self.thread = None
+
+        self.extra_buffers = 0      # tampons alloués faute de tampon libre
+        self.write_errors = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name, dtype in STREAMS.items():
+            path = os.path.join(self.directory, f"{name}.fdr")
+            self.streams[name] = _Stream(name, dtype, path, self.chunk)
+        self.thread = threading.Thread(target=self._write_loop, name="flight-recorder", daemon=True)
+        self.thread.start()
+        return self
+
+    def append(self, stream, values):
+        """Ajoute un enregistrement (tuple dans l'ordre des champs du flux)"""
+        s = self.streams[stream]
+        with s.lock:
+            s.buffer[s.count] = values
+            s.count += 1
+            if s.count == s.chunk:
+                self._swap(s)
+
+    def _swap(self, s):
+        """Bloc plein (ou flush) : au thread d'écriture, un tampon libre prend le relais"""
+        self.pending.put((s, s.buffer, s.count))
+        if s.free:
+            s.buffer = s.free.pop()
+        else:
+            s.buffer = np.zeros(s.chunk, s.dtype)
+            self.extra_buffers += 1
+        s.count = 0
+
+    def _write_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            s, buffer, count = item
+            try:
+                s.file.write(buffer[:count].tobytes())
+                s.records += count
+            except (OSError, ValueError):
+                self.write_errors += 1
+            with s.lock:
+                if len(s.free) < SPARE_BUFFERS:
+                    s.free.append(buffer)
+
+    def flush(self):
+        """Envoie les blocs partiels à l'écriture (fin de vol, arrêt d'urgence...)"""
+        for s in self.streams.values():
+            with s.lock:
+                if s.count:
+                    self._swap(s)
+
+    # --- raccourcis typés -------------------------------------------------
+
+    def telemetry(self, state):
+        """TelloState (tello_telemetry.py)"""
+        self.append('telemetry', state)
+
+    def command(self, command, sent, latency=float('nan'), ok=False):
+        self.append('commands', (sent, command.encode('ascii', 'replace')[:24], latency, ok))
+
+    def rc(self, t, lr, fb, ud, yaw):
+        self.append('rc', (t, lr, fb, ud, yaw))
+
+    def detections(self, t, seq, tracks):
+        """Pistes multi_tracker.Track d'une image"""
+        for track in tracks:
+            x, y, w, h = track.box
+            self.append('detections', (t, seq, track.id, x, y, w, h,
+                                       track.velocity[0], track.velocity[1]))
+
+    def timing(self, stage, ms, t=None):
+        self.append('timings', (time.monotonic() if t is None else t,
+                                stage.encode('ascii', 'replace')[:16], ms))
+
+    def close(self):
+        """Vide les tampons, attend l'écriture et ferme les fichiers"""
+        if self.thread is None:
+            return
+        self.flush()
+        self.pending.put(None)
+        self.thread.join(timeout=5)
+        self.thread = None
+        for s in self.streams.values():
+            s.file.close()
+
+    def describe(self):
+        total = sum(s.records for s in self.streams.values())
+        return f"{total} enregistrements dans {self.directory}"
+
+
+def create_recorder():
+    """Enregistreur démarré, ou None sans TELLO_FLIGHT_LOG ou si le dossier est inaccessible"""
+    if not FLIGHT_LOG_DIR:
+        return None
+    try:
+        return FlightRecorder().start()
+    except OSError as e:
+        print(f"⚠️  Enregistreur de vol désactivé: {e}")
+        return None
+
+
+# ============================================================
+#                    RELECTURE
+# ============================================================
+
+def open_stream(path):
+    """Flux .fdr en np.memmap lecture seule (dernier enregistrement partiel ignoré)"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if not header.startswith(MAGIC):
+        raise ValueError(f"{path} n'est pas un journal de vol")
+    meta = json.loads(header[len(MAGIC):].decode('utf-8').rstrip())
+    dtype = _dtype_from_descr(meta['dtype'])
+
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype), meta
+    return np.memmap(path, dtype, mode='r', offset=HEADER_SIZE, shape=(count,)), meta
+
+
+class FlightLog:
+    """Vol enregistré ; chaque flux est ouvert par mmap au premier accès"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._streams = {}
+        self.meta = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in STREAMS:
+            raise AttributeError(name)
+        if name not in self._streams:
+            path = os.path.join(self.directory, f"{name}.fdr")
+            if os.path.exists(path):
+                self._streams[name], self.meta[name] = open_stream(path)
+            else:
+                self._streams[name] = np.zeros(0, STREAMS[name])
+        return self._streams[name]
+
+    def flight_time(self, min_height=10):
+        """Secondes passées au-dessus de `min_height` cm (télémétrie)"""
+        tel = self.telemetry
+        if len(tel) < 2:
+            return 0.0
+        dt = np.diff(tel['t'])
+        airborne = tel['h'][1:] > min_height
+        return float(dt[airborne & (dt < 1.0)].sum())
+
+    def battery_curve(self, bin_seconds=10.0):
+        """(secondes depuis le début, batterie médiane %) par tranche de `bin_seconds`"""
+        tel = self.telemetry
+        if len(tel) == 0:
+            return np.zeros(0), np.zeros(0)
+        t = tel['t'] - tel['t'][0]
+        bins = (t // bin_seconds).astype(np.int64)
+        edges = np.flatnonzero(np.diff(bins)) + 1
+        groups = np.split(np.asarray(tel['bat']), edges)
+        starts = np.concatenate(([0], edges))
+        return bins[starts] * bin_seconds, np.array([np.median(g) for g in groups])
+
+    def command_latency(self):
+        """Latences (ms) des commandes avec réponse : dict percentiles"""
+        latency = np.asarray(self.commands['latency'], np.float64)
+        latency = latency[np.isfinite(latency)] * 1000
+        if len(latency) == 0:
+            return {'count': 0}
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+        return {'count': len(latency), 'p50': p50, 'p95': p95, 'p99': p99,
+                'max': float(latency.max())}
+
+    def summary(self):
+        lines = [f"Vol {self.directory}"]
+        counts = ", ".join(f"{name} {len(getattr(self, name))}" for name in STREAMS)
+        lines.append(f"  Enregistrements: {counts}")
+        lines.append(f"  Temps de vol: {self.flight_time():.1f} s")
+        times, battery = self.battery_curve(60.0)
+        if len(battery):
+            drain = battery[0] - battery[-1]
+            lines.append(f"  Batterie: {battery[0]:.0f}% -> {battery[-1]:.0f}% "
+                         f"({drain:.0f} points sur {times[-1] / 60:.0f} min)")
+        latency = self.command_latency()
+        if latency['count']:
+            lines.append(f"  Latence commandes ({latency['count']}): p50 {latency['p50']:.1f} ms, "
+                         f"p95 {latency['p95']:.1f} ms, p99 {latency['p99']:.1f} ms")
+        stages = self.timings
+        if len(stages):
+            for stage in np.unique(stages['stage']):
+                ms = stages['ms'][stages['stage'] == stage]
+                lines.append(f"  {stage.decode():>12}: p50 {np.median(ms):.2f} ms, "
+                             f"p99 {np.percentile(ms, 99):.2f} ms")
+        return "\n".join(lines)
+
+
+def benchmark(records=200000):
+    """µs par append() au rythme de la boucle de contrôle (rc) et de la télémétrie"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = FlightRecorder(directory).start()
+        start = time.perf_counter()
+        for i in range(records):
+            recorder.rc(i * 0.033, 10, -20, 0, 5)
+        elapsed = (time.perf_counter() - start) / records * 1e6
+        recorder.close()
+
+        start = time.perf_counter()
+        log = FlightLog(directory)
+        count = len(log.rc)
+        open_ms = (time.perf_counter() - start) * 1000
+    return elapsed, count, open_ms
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] != '--bench':
+        print(FlightLog(sys.argv[1]).summary())
+    else:
+        us, count, open_ms = benchmark()
+        print("=" * 60)
+        print(f"  append(): {us:.2f} µs/enregistrement")
+        print(f"  Relecture de {count} enregistrements par mmap: {open_ms:.2f} ms")
+        print("=" * 60)
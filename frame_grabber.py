@@ -0,0 +1,128 @@
+"""
+Lecture vidéo Tello dans un thread dédié (dernière image uniquement)
+
+cv2.VideoCapture ignore CAP_PROP_BUFFERSIZE avec FFmpeg : si la boucle
+principale lit trop lentement, les images s'accumulent et l'affichage prend
+du retard. Ici un thread draine le décodeur en continu et ne garde que la
+dernière image ; les images jamais consommées sont comptées comme perdues.
+
+    grabber = create_grabber().start()
+    seq, timestamp, frame = grabber.read()
+
+TELLO_VIDEO_DECODER=pyav sélectionne le décodage direct (h264_stream.py).
+"""
+
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+VIDEO_URL = 'udp://0.0.0.0:11111'
+DECODER = os.environ.get('TELLO_VIDEO_DECODER', 'ffmpeg')
+
+
+def open_capture(url=VIDEO_URL):
+    """Ouvre le flux FFmpeg en masquant ses messages d'erreur"""
+    os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS', 'rtsp_transport;udp')
+    os.environ.setdefault('OPENCV_LOG_LEVEL', 'FATAL')
+
+    stderr_backup = sys.stderr
+    sys.stderr = open(os.devnull, 'w')
+    try:
+        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr_backup
+    return cap
+
+
+class FrameGrabber:
+    """Décode le flux dans son thread et remet toujours l'image la plus récente"""
+
+    def __init__(self, url=VIDEO_URL, capture=None):
+        self.url = url
+        self.cap = capture
+        self.cond = threading.Condition()
+
+        self.frame = None
+        self.seq = 0              # numéro de la dernière image décodée
+        self.timestamp = 0.0      # time.monotonic() à l'arrivée de l'image
+        self.last_read_seq = 0
+
+        self.decoded = 0
+        self.dropped = 0          # images écrasées avant d'être lues
+        self.read_errors = 0
+
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.cap is None:
+            self.cap = open_capture(self.url)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            timestamp = time.monotonic()
+            if not ret or frame is None:
+                self.read_errors += 1
+                time.sleep(0.005)
+                continue
+
+            with self.cond:
+                if self.seq > self.last_read_seq:
+                    self.dropped += 1
+                self.frame = frame
+                self.seq += 1
+                self.timestamp = timestamp
+                self.decoded += 1
+                self.cond.notify_all()
+
+    def read(self, timeout=None, wait_new=True):
+        """Renvoie (seq, timestamp, frame) ; (0, 0.0, None) si rien avant timeout
+
+        Avec wait_new=True, attend une image plus récente que la dernière lue
+        (jamais l'ancienne image : un flux figé ne doit pas passer pour vivant).
+        """
+        with self.cond:
+            if wait_new:
+                self.cond.wait_for(lambda: self.seq > self.last_read_seq or not self.running,
+                                   timeout)
+                if self.seq <= self.last_read_seq:
+                    return 0, 0.0, None
+            if self.frame is None:
+                return 0, 0.0, None
+            self.last_read_seq = self.seq
+            return self.seq, self.timestamp, self.frame
+
+    def wait_first_frame(self, timeout=6.0):
+        """Attend la première image (remplace la boucle 30 x 0.2 s)"""
+        seq, _, frame = self.read(timeout=timeout)
+        return frame is not None
+
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1)
+        if self.cap is not None:
+            self.cap.release()
+
+
+def create_grabber(decoder=DECODER):
+    """Source vidéo selon le mode choisi : 'ffmpeg' (VideoCapture) ou 'pyav'"""
+    if decoder == 'pyav':
+        try:
+            from h264_stream import H264Grabber
+            return H264Grabber()
+        except ImportError:
+            print("⚠️  PyAV absent (pip install av) : retour à cv2.VideoCapture")
+    return FrameGrabber()
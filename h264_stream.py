@@ -0,0 +1,277 @@
+"""
+Réception H.264 directe (UDP 11111) sans cv2.VideoCapture
+
+- Lecture des datagrammes bruts du Tello dans un tampon réutilisé
+- Réassemblage des unités NAL (Annex-B) puis des images complètes
+- Décodage en processus via PyAV (nombre de threads du décodeur réglable)
+- Conversion YUV -> BGR dans un petit pool de tableaux NumPy préalloués
+
+Même interface que FrameGrabber (read / wait_first_frame / stop), avec la
+règle suivante : une image rendue par read() reste valide jusqu'au read()
+suivant (le tampon est ensuite recyclé).
+
+    pip install av
+    TELLO_VIDEO_DECODER=pyav python keyboard.py
+"""
+
+import socket
+import threading
+import time
+
+import cv2
+import numpy as np
+
+VIDEO_PORT = 11111
+START_CODE = b'\x00\x00\x01'
+NAL_SLICE = 1
+NAL_IDR = 5
+POOL_SIZE = 3
+VIDEO_CHUNK = 1460   # le Tello découpe chaque image en datagrammes de 1460 octets
+
+
+# ============================================================
+#                    ANNEX-B / NAL
+# ============================================================
+
+def split_annexb(data):
+    """Découpe un flux Annex-B en unités NAL (avec leur code de départ)"""
+    starts = []
+    i = data.find(START_CODE)
+    while i >= 0:
+        start = i - 1 if i > 0 and data[i - 1] == 0 else i
+        starts.append(start)
+        i = data.find(START_CODE, i + 3)
+    starts.append(len(data))
+    return [bytes(data[a:b]) for a, b in zip(starts, starts[1:])]
+
+
+def nal_header_offset(nal):
+    """Position de l'octet d'en-tête NAL (après 00 00 01 ou 00 00 00 01)"""
+    return 3 if nal[2] == 1 else 4
+
+
+def nal_type(nal):
+    return nal[nal_header_offset(nal)] & 0x1F
+
+
+def starts_new_picture(nal):
+    """Vrai si la slice commence une image (first_mb_in_slice == 0)"""
+    offset = nal_header_offset(nal)
+    return len(nal) > offset + 1 and bool(nal[offset + 1] & 0x80)
+
+
+class NalAssembler:
+    """Reconstitue NAL puis images complètes à partir des datagrammes"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.picture = []          # NAL de l'image en cours
+        self.has_slice = False
+
+    def feed(self, data):
+        """Ajoute un datagramme ; renvoie la liste des images terminées"""
+        self.buffer += data
+        pictures = []
+
+        # On garde le dernier NAL (peut-être incomplet) dans le tampon
+        last = self.buffer.rfind(START_CODE)
+        if last <= 0:
+            return pictures
+        if self.buffer[last - 1] == 0:
+            last -= 1
+        if last == 0:
+            return pictures
+
+        for nal in split_annexb(self.buffer[:last]):
+            picture = self._push_nal(nal)
+            if picture is not None:
+                pictures.append(picture)
+        del self.buffer[:last]
+        return pictures
+
+    def flush(self):
+        """Fin d'image signalée par le transport : vide le tampon et ferme l'image"""
+        pictures = []
+        start = self.buffer.find(START_CODE)
+        if 0 <= start <= 1 and len(self.buffer) > start + 3:
+            picture = self._push_nal(bytes(self.buffer))
+            if picture is not None:
+                pictures.append(picture)
+        self.buffer.clear()
+        if self.has_slice:
+            pictures.append(b''.join(self.picture))
+            self.picture = []
+            self.has_slice = False
+        return pictures
+
+    def _push_nal(self, nal):
+        kind = nal_type(nal)
+        is_slice = kind in (NAL_SLICE, NAL_IDR)
+        finished = None
+
+        # Un nouveau NAL de paramètres, ou une nouvelle première slice, ferme l'image
+        if self.has_slice and (not is_slice or starts_new_picture(nal)):
+            finished = b''.join(self.picture)
+            self.picture = []
+            self.has_slice = False
+
+        self.picture.append(nal)
+        self.has_slice = self.has_slice or is_slice
+        return finished
+
+
+# ============================================================
+#                    DÉCODAGE DANS UN POOL
+# ============================================================
+
+class H264Grabber:
+    """Réception + décodage PyAV dans un thread, images dans un pool préalloué"""
+
+    def __init__(self, port=VIDEO_PORT, decoder_threads=2, pool_size=POOL_SIZE):
+        import av
+
+        self.av = av
+        self.port = port
+        self.codec = av.CodecContext.create('h264', 'r')
+        self.codec.thread_type = 'AUTO' if decoder_threads > 1 else 'NONE'
+        self.codec.thread_count = decoder_threads
+        self.assembler = NalAssembler()
+        self.pool_size = max(3, pool_size)
+
+        self.pool = None           # alloués à la première image (taille connue)
+        self.i420 = None
+        self.published = -1        # index du tampon de la dernière image
+        self.reading = -1          # index du tampon rendu au consommateur
+
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.timestamp = 0.0
+        self.last_read_seq = 0
+
+        self.decoded = 0
+        self.dropped = 0
+        self.decode_errors = 0
+        self.started_at = 0.0
+        self.first_frame_delay = None   # temps avant la première image (s)
+
+        self.sock = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.sock.bind(('', self.port))
+        self.sock.settimeout(0.5)
+
+        self.started_at = time.monotonic()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="h264-grabber", daemon=True)
+        self.thread.start()
+        return self
+
+    def _allocate(self, width, height):
+        self.pool = [np.empty((height, width, 3), np.uint8) for _ in range(self.pool_size)]
+        self.i420 = np.empty((height * 3 // 2, width), np.uint8)
+
+    def _free_slot(self):
+        for i in range(self.pool_size):
+            if i != self.published and i != self.reading:
+                return i
+
+    def _convert(self, frame, dst):
+        """yuv420p (plans séparés, avec pas de ligne) -> BGR dans dst"""
+        w, h = frame.width, frame.height
+        y_plane, u_plane, v_plane = frame.planes
+        i420 = self.i420
+
+        y = np.frombuffer(y_plane, np.uint8, count=h * y_plane.line_size).reshape(h, -1)
+        i420[:h] = y[:, :w]
+        # U et V : (h/2, w/2) rangés à la suite sous Y, comme le veut COLOR_YUV2BGR_I420
+        chroma = i420[h:].reshape(h, w // 2)
+        u = np.frombuffer(u_plane, np.uint8, count=h // 2 * u_plane.line_size).reshape(h // 2, -1)
+        v = np.frombuffer(v_plane, np.uint8, count=h // 2 * v_plane.line_size).reshape(h // 2, -1)
+        chroma[:h // 2] = u[:, :w // 2]
+        chroma[h // 2:] = v[:, :w // 2]
+        cv2.cvtColor(i420, cv2.COLOR_YUV2BGR_I420, dst=dst)
+
+    def _run(self):
+        packet_buffer = bytearray(65536)
+        view = memoryview(packet_buffer)
+
+        while self.running:
+            try:
+                size = self.sock.recv_into(packet_buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            arrival = time.monotonic()
+
+            pictures = self.assembler.feed(view[:size])
+            # Un datagramme incomplet termine l'image : pas besoin d'attendre la suivante
+            if size < VIDEO_CHUNK:
+                pictures += self.assembler.flush()
+
+            for picture in pictures:
+                try:
+                    frames = self.codec.decode(self.av.Packet(picture))
+                except (ValueError, self.av.error.FFmpegError):
+                    self.decode_errors += 1
+                    continue
+                for frame in frames:
+                    self._publish(frame, arrival)
+
+    def _publish(self, frame, arrival):
+        if frame.format.name != 'yuv420p':
+            frame = frame.reformat(format='yuv420p')
+        if self.pool is None or self.pool[0].shape[:2] != (frame.height, frame.width):
+            with self.cond:
+                self._allocate(frame.width, frame.height)
+                self.published = self.reading = -1
+
+        with self.cond:
+            slot = self._free_slot()
+        self._convert(frame, self.pool[slot])
+
+        with self.cond:
+            if self.seq > self.last_read_seq:
+                self.dropped += 1
+            if self.first_frame_delay is None:
+                self.first_frame_delay = arrival - self.started_at
+            self.published = slot
+            self.seq += 1
+            self.timestamp = arrival
+            self.decoded += 1
+            self.cond.notify_all()
+
+    def read(self, timeout=None, wait_new=True):
+        """Renvoie (seq, timestamp, frame) ; l'image est valide jusqu'au read() suivant
+
+        Avec wait_new=True, (0, 0.0, None) si aucune nouvelle image avant timeout.
+        """
+        with self.cond:
+            if wait_new:
+                self.cond.wait_for(lambda: self.seq > self.last_read_seq or not self.running,
+                                   timeout)
+                if self.seq <= self.last_read_seq:
+                    return 0, 0.0, None
+            if self.published < 0:
+                return 0, 0.0, None
+            self.reading = self.published
+            self.last_read_seq = self.seq
+            return self.seq, self.timestamp, self.pool[self.reading]
+
+    def wait_first_frame(self, timeout=6.0):
+        seq, _, frame = self.read(timeout=timeout)
+        return frame is not None
+
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1)
+        if self.sock:
+            self.sock.close()
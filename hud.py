@@ -0,0 +1,185 @@
+"""
+Panneaux HUD composés en place, texte mis en cache
+
+Les scripts assombrissaient un petit panneau en copiant toute l'image puis
+en la mélangeant entière :
+    overlay = frame.copy()                                  # 2 Mo alloués
+    cv2.rectangle(overlay, (5, 5), (300, 180), (0, 0, 0), -1)
+    frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0)   # 2 Mo de plus, 960x720 mélangés
+    cv2.putText(frame, ...)                                 # texte re-rastérisé à chaque image
+
+Ici le panneau garde un calque (texte, barres) de sa seule taille :
+- un champ n'est redessiné dans le calque que si son contenu change
+- à chaque image : assombrissement de la seule zone du panneau, dans
+  l'image même, puis copie masquée du calque (aucune allocation plein cadre)
+
+Rendu identique à l'ancien code, à un niveau d'arrondi près (noir à
+`alpha`, texte non lissé par-dessus ; alpha=0 : texte seul sans fond) :
+
+    panel = HudPanel((5, 5), (300, 180), alpha=0.7)
+    ...
+    panel.text('bat', f"Batterie: {bat}%", (15, 60), 0.7, color)  # coordonnées image
+    panel.draw(frame)
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def _intersects(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class HudPanel:
+    """Panneau semi-transparent dont le contenu est rendu une fois par changement"""
+
+    def __init__(self, top_left, bottom_right, alpha=0.7):
+        self.x1, self.y1 = top_left
+        self.x2, self.y2 = bottom_right[0] + 1, bottom_right[1] + 1   # coin inclus, comme cv2.rectangle
+        height, width = self.y2 - self.y1, self.x2 - self.x1
+        self.layer = np.zeros((height, width, 3), np.uint8)
+        self.mask = np.zeros((height, width), np.uint8)
+        # addWeighted(noir, alpha, image, 1 - alpha) == image x (1 - alpha) arrondi
+        self.lut = None
+        if alpha > 0:
+            self.lut = np.clip(np.round(np.arange(256) * (1.0 - alpha)), 0, 255).astype(np.uint8)
+
+        self.fields = {}        # clé -> (contenu, boîte dans le calque, fonction de dessin)
+        self.renders = 0        # champs redessinés (pour vérifier que le cache sert)
+
+    # --- champs --------------------------------------------------------------
+
+    def text(self, key, text, org, scale, color, thickness=2):
+        """Texte cv2.putText aux coordonnées image `org` (ligne de base)"""
+        content = (text, org, scale, color, thickness)
+        field = self.fields.get(key)
+        if field is not None and field[0] == content:
+            return
+        (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+        x, y = org[0] - self.x1, org[1] - self.y1
+        box = (x - thickness, y - h - thickness, x + w + thickness, y + baseline + thickness)
+
+        def draw(img, mask):
+            cv2.putText(img, text, (x, y), FONT, scale, color, thickness)
+            cv2.putText(mask, text, (x, y), FONT, scale, 255, thickness)
+        self._update(key, content, box, draw)
+
+    def rect(self, key, pt1, pt2, color, thickness=-1):
+        """Rectangle cv2.rectangle aux coordonnées image"""
+        content = (pt1, pt2, color, thickness)
+        field = self.fields.get(key)
+        if field is not None and field[0] == content:
+            return
+        p1 = (pt1[0] - self.x1, pt1[1] - self.y1)
+        p2 = (pt2[0] - self.x1, pt2[1] - self.y1)
+        margin = max(thickness, 0)
+        box = (min(p1[0], p2[0]) - margin, min(p1[1], p2[1]) - margin,
+               max(p1[0], p2[0]) + margin + 1, max(p1[1], p2[1]) + margin + 1)
+
+        def draw(img, mask):
+            cv2.rectangle(img, p1, p2, color, thickness)
+            cv2.rectangle(mask, p1, p2, 255, thickness)
+        self._update(key, content, box, draw)
+
+    def _update(self, key, content, box, draw):
+        """Efface l'ancienne zone du champ, puis redessine ce qui la recouvrait"""
+        old = self.fields.get(key)
+        self.fields[key] = (content, box, draw)
+        dirty = [box] if old is None else [old[1], box]
+
+        if old is not None:
+            x1, y1, x2, y2 = self._clip(old[1])
+            self.layer[y1:y2, x1:x2] = 0
+            self.mask[y1:y2, x1:x2] = 0
+        # Ordre d'insertion conservé : un champ ajouté plus tard reste au-dessus
+        for _, other_box, other_draw in self.fields.values():
+            if any(_intersects(other_box, d) for d in dirty):
+                other_draw(self.layer, self.mask)
+                self.renders += 1
+
+    def _clip(self, box):
+        height, width = self.mask.shape
+        return (max(box[0], 0), max(box[1], 0), min(box[2], width), min(box[3], height))
+
+    def remove(self, key):
+        """Retire un champ (ex: ligne affichée seulement en vol)"""
+        field = self.fields.pop(key, None)
+        if field is None:
+            return
+        x1, y1, x2, y2 = self._clip(field[1])
+        self.layer[y1:y2, x1:x2] = 0
+        self.mask[y1:y2, x1:x2] = 0
+        for _, other_box, other_draw in self.fields.values():
+            if _intersects(other_box, field[1]):
+                other_draw(self.layer, self.mask)
+
+    def clear(self):
+        self.fields.clear()
+        self.layer[:] = 0
+        self.mask[:] = 0
+
+    # --- composition ---------------------------------------------------------
+
+    def draw(self, frame):
+        """Assombrit la zone du panneau et y colle le calque, en place ; renvoie `frame`"""
+        roi = frame[self.y1:self.y2, self.x1:self.x2]
+        layer, mask = self.layer, self.mask
+        if roi.shape[:2] != mask.shape:
+            # Panneau partiellement hors de l'image
+            h, w = roi.shape[:2]
+            layer, mask = layer[:h, :w], mask[:h, :w]
+        if self.lut is not None:
+            cv2.LUT(roi, self.lut, dst=roi)
+        cv2.copyTo(layer, mask, dst=roi)
+        return frame
+
+
+def benchmark(frames=500):
+    """µs par image : ancien rendu (copie + addWeighted + putText) contre HudPanel"""
+    frame = np.random.randint(0, 255, (720, 960, 3), np.uint8)
+    lines = [("CONTROLE + DETECTION", (15, 30), 0.6, (0, 255, 255)),
+             ("Batterie: 87%", (15, 60), 0.7, (0, 255, 0)),
+             ("Status: EN VOL", (15, 90), 0.6, (0, 255, 0)),
+             ("Detection: ON (2)", (15, 120), 0.5, (0, 255, 0)),
+             ("Vitesse: 50", (15, 150), 0.5, (0, 255, 255))]
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        image = frame.copy()
+        overlay = image.copy()
+        cv2.rectangle(overlay, (5, 5), (300, 180), (0, 0, 0), -1)
+        image = cv2.addWeighted(overlay, 0.7, image, 0.3, 0)
+        for text, org, scale, color in lines:
+            cv2.putText(image, text, org, FONT, scale, color, 2)
+    legacy = (time.perf_counter() - start) / frames * 1e6
+    reference = image
+
+    panel = HudPanel((5, 5), (300, 180), alpha=0.7)
+    start = time.perf_counter()
+    for _ in range(frames):
+        image = frame.copy()
+        for i, (text, org, scale, color) in enumerate(lines):
+            panel.text(i, text, org, scale, color)
+        panel.draw(image)
+    cached = (time.perf_counter() - start) / frames * 1e6
+
+    # La copie de l'image source (commune aux deux boucles) est retirée
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame.copy()
+    base = (time.perf_counter() - start) / frames * 1e6
+    diff = int(np.abs(reference.astype(np.int16) - image.astype(np.int16)).max())
+    return legacy - base, cached - base, diff
+
+
+if __name__ == "__main__":
+    legacy, cached, diff = benchmark()
+    print("=" * 60)
+    print(f"  copie + addWeighted + putText: {legacy:.0f} µs/image")
+    print(f"  HudPanel (calque en cache):    {cached:.0f} µs/image")
+    print(f"  Écart maximal de pixel:        {diff}")
+    print("=" * 60)
@@ -0,0 +1,190 @@
+"""
+Détection périodique + suivi léger entre deux détections
+
+Le détecteur coûteux (Haar, DNN) ne tourne que toutes les N images, ou à la
+demande ; entre deux, les boîtes sont propagées par un suivi bon marché :
+- 'flow' : flux optique Lucas-Kanade (OpenCV de base, par défaut)
+- 'kcf' / 'csrt' / 'mil' : trackers OpenCV si disponibles dans l'installation
+
+N s'adapte au temps mesuré de la détection et du suivi : le coût moyen par
+image reste sous `load` x la période du flux (target_fps), pour que le suivi
+tienne la cadence du flux sur un portable.
+
+    hybrid = HybridDetector(lambda frame, gray: [(tuple(b), None) for b in ...])
+    for box, info in hybrid.update(frame):
+        ...
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+EMA = 0.2   # lissage des mesures de temps
+
+
+def _create_cv_tracker(name):
+    """Fabrique un tracker OpenCV (module principal ou legacy selon la version)"""
+    factory_name = f"Tracker{name.upper()}_create"
+    for module in (cv2, getattr(cv2, 'legacy', None)):
+        factory = getattr(module, factory_name, None) if module else None
+        if factory is not None:
+            return factory()
+    raise ValueError(f"Tracker '{name}' indisponible dans cette version d'OpenCV")
+
+
+class HybridDetector:
+    """Détecte toutes les N images et suit les boîtes entre deux détections"""
+
+    def __init__(self, detect_fn, tracker='flow', min_interval=1, max_interval=15,
+                 target_fps=30, load=0.5):
+        self.detect_fn = detect_fn
+        self.tracker = tracker
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = load / target_fps
+
+        self.tracks = []            # [(box, info)] ; box = (x, y, w, h)
+        self.cv_trackers = []
+        self.prev_gray = None
+
+        self.interval = min_interval
+        self.frames_since_detection = 0
+        self.detect_time = None     # s, moyenne glissante
+        self.track_time = 0.0
+        self.detections = 0
+        self.last_was_detection = False
+
+    # ---------- interface ----------
+
+    def request_detection(self):
+        """Force une détection à la prochaine image"""
+        self.frames_since_detection = self.interval
+
+    def reset(self):
+        self.tracks = []
+        self.cv_trackers = []
+        self.prev_gray = None
+        self.frames_since_detection = 0
+
+    def update(self, frame, gray=None):
+        """Renvoie les boîtes [(box, info)] pour cette image"""
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # Sans cible suivie, on détecte à chaque image pour la retrouver au plus vite
+        need_detection = not self.tracks or self.frames_since_detection >= self.interval
+
+        start = time.perf_counter()
+        if need_detection:
+            self._detect(frame, gray)
+            self._smooth('detect_time', time.perf_counter() - start)
+            self.frames_since_detection = 0
+            self.detections += 1
+        else:
+            self._track(frame, gray)
+            self._smooth('track_time', time.perf_counter() - start)
+            self.frames_since_detection += 1
+
+        self.last_was_detection = need_detection
+        self.prev_gray = gray
+        self._adapt_interval()
+        return self.tracks
+
+    # ---------- détection / suivi ----------
+
+    def _detect(self, frame, gray):
+        self.tracks = [(tuple(int(v) for v in box), info) for box, info in self.detect_fn(frame, gray)]
+        if self.tracker != 'flow':
+            self.cv_trackers = []
+            for box, _ in self.tracks:
+                tracker = _create_cv_tracker(self.tracker)
+                tracker.init(frame, box)
+                self.cv_trackers.append(tracker)
+
+    def _track(self, frame, gray):
+        if self.tracker == 'flow':
+            self._track_flow(gray)
+        else:
+            self._track_cv(frame)
+
+    def _track_cv(self, frame):
+        tracks, trackers = [], []
+        for (box, info), tracker in zip(self.tracks, self.cv_trackers):
+            ok, new_box = tracker.update(frame)
+            if ok:
+                tracks.append((tuple(int(v) for v in new_box), info))
+                trackers.append(tracker)
+        self.tracks, self.cv_trackers = tracks, trackers
+
+    def _track_flow(self, gray):
+        """Un seul appel Lucas-Kanade pour les points de toutes les boîtes"""
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            self.tracks = []
+            return
+
+        height, width = gray.shape[:2]
+        points, owners = [], []
+        for i, ((x, y, w, h), _) in enumerate(self.tracks):
+            x0, y0 = max(0, x), max(0, y)
+            roi = self.prev_gray[y0:min(height, y + h), x0:min(width, x + w)]
+            if roi.size == 0:
+                continue
+            corners = cv2.goodFeaturesToTrack(roi, maxCorners=25, qualityLevel=0.01, minDistance=4)
+            if corners is None:
+                continue
+            corners = corners.reshape(-1, 2) + (x0, y0)
+            points.append(corners)
+            owners.append(np.full(len(corners), i))
+
+        if not points:
+            self.tracks = []
+            return
+
+        p0 = np.concatenate(points).astype(np.float32)
+        owner = np.concatenate(owners)
+        p1, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, p0.reshape(-1, 1, 2), None,
+                                                 winSize=(15, 15), maxLevel=2)
+        p1 = p1.reshape(-1, 2)
+        good = status.ravel() == 1
+
+        tracks = []
+        for i, ((x, y, w, h), info) in enumerate(self.tracks):
+            mask = good & (owner == i)
+            if mask.sum() < 3:
+                continue
+            old, new = p0[mask], p1[mask]
+            dx, dy = np.median(new - old, axis=0)
+
+            # Échelle : rapport des distances médianes au centroïde
+            old_spread = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+            new_spread = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+            scale = new_spread / old_spread if old_spread > 1e-3 else 1.0
+            scale = float(np.clip(scale, 0.8, 1.25))
+
+            cx, cy = x + w / 2 + dx, y + h / 2 + dy
+            nw, nh = w * scale, h * scale
+            nx = int(np.clip(cx - nw / 2, 0, width - 1))
+            ny = int(np.clip(cy - nh / 2, 0, height - 1))
+            tracks.append(((nx, ny, int(nw), int(nh)), info))
+
+        self.tracks = tracks
+
+    # ---------- cadence adaptative ----------
+
+    def _smooth(self, name, value):
+        current = getattr(self, name)
+        setattr(self, name, value if current is None else current + EMA * (value - current))
+
+    def _adapt_interval(self):
+        """Plus petit N tel que (détection + (N-1) x suivi) / N <= budget"""
+        if self.detect_time is None:
+            return
+        budget = self.budget
+        if self.detect_time <= budget:
+            interval = self.min_interval
+        elif self.track_time >= budget:
+            interval = self.max_interval
+        else:
+            interval = int(np.ceil((self.detect_time - self.track_time) / (budget - self.track_time)))
+        self.interval = max(self.min_interval, min(self.max_interval, interval))
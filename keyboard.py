@@ -1,10 +1,21 @@
-import socket
 import cv2
 import time
 import threading
 import os
-import sys
-from pynput import keyboard
+try:
+    from pynput import keyboard
+except ImportError:
+    keyboard = None     # station sans écran : touches reçues par le viewer (TELLO_HEADLESS=1)
+
+from control_loop import ControlLoop
+from emergency_stop import stop_tello
+from flight_recorder import create_recorder
+from frame_grabber import create_grabber
+from hud import HudPanel
+from tello_link import TelloCommandLink
+from tello_telemetry import TelloTelemetry
+from viewer import HEADLESS, create_display, is_escape
+from rc_output import RcOutput
 
 # Masquer les messages d'erreur FFmpeg
 os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;udp'
@@ -14,33 +25,21 @@ print("=" * 60)
 print("  CONTRÔLE MANUEL DJI TELLO - TYPE FPS")
 print("=" * 60)
 
-command_socket = None
-socket_lock = threading.Lock()
+# Liaison de commande partagée (socket persistant, rc jamais bloqués)
+link = None
+send_command = None
 
-def init_socket():
-    global command_socket
-    command_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    command_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    command_socket.bind(('', 9000))
-    command_socket.settimeout(2)
+# Journal de vol (TELLO_FLIGHT_LOG=flights -> flights/<date>/, désactivé par défaut)
+recorder = create_recorder()
 
-def send_command(command, tello_address=('192.168.10.1', 8889), wait_response=True):
-    global command_socket
-    with socket_lock:
-        try:
-            command_socket.sendto(command.encode('utf-8'), tello_address)
-            if wait_response:
-                try:
-                    response, _ = command_socket.recvfrom(1024)
-                    return response.decode('utf-8').strip()
-                except socket.timeout:
-                    return None
-            return None
-        except Exception as e:
-            print(f"Erreur: {e}")
-            return None
+def init_socket():
+    global link, send_command
+    link = TelloCommandLink(recorder=recorder)
+    send_command = link.send_command
 
 init_socket()
+telemetry = TelloTelemetry(recorder=recorder).start()
+rc_output = RcOutput(send_command).start()
 
 print("\n1. Connexion au Tello...")
 response = send_command('command')
@@ -61,24 +60,12 @@ time.sleep(3)
 
 print("\n4. Ouverture du flux...")
 
-# Rediriger stderr pour masquer les erreurs FFmpeg
-stderr_backup = sys.stderr
-sys.stderr = open(os.devnull, 'w')
-
-cap = cv2.VideoCapture('udp://0.0.0.0:11111', cv2.CAP_FFMPEG)
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-
-# Restaurer stderr après l'ouverture
-sys.stderr.close()
-sys.stderr = stderr_backup
+# Décodage dans un thread dédié : on lit toujours la dernière image
+grabber = create_grabber().start()
 
 print("   Attente du flux vidéo...")
-for i in range(30):
-    ret, frame = cap.read()
-    if ret and frame is not None:
-        print("   ✓ Flux vidéo OK !")
-        break
-    time.sleep(0.2)
+if grabber.wait_first_frame():
+    print("   ✓ Flux vidéo OK !")
 
 print("\n" + "=" * 60)
 print("COMMANDES (TYPE FPS):")
@@ -91,8 +78,8 @@ print("  1=Lent(30) 2=Normal(50) 3=Rapide(70) 4=Max(100)")
 print("  H=Masquer/Afficher HUD")
 print("=" * 60 + "\n")
 print("")
-print("Batterie:", tello.get_battery(), "%")
-print("Température:", tello.get_temperature(), "°C")
+print("Batterie:", telemetry.get('bat', battery), "%")
+print("Température:", telemetry.get('temperature'), "°C")
 
 speed = 100
 flying = False
@@ -104,6 +91,13 @@ takeoff_start_time = 0
 running = True
 show_hud = True  # Toggle pour afficher/masquer l'interface
 
+# Panneaux HUD : texte rendu une fois par changement, fond assombri en place
+info_panel = HudPanel((5, 5), (220, 125), alpha=0.6)
+help_panel = HudPanel((5, 680), (955, 715), alpha=0.5)
+help_panel.text('help', "T:Decol L:Atterir ZQSD:Deplac PM:Haut/Bas AE:Rot SPACE:Stop 1-4:Vitesse H:HUD ESC:Quit",
+                (10, 700), 0.45, (200, 200, 200), 1)
+minimal_panel = HudPanel((5, 5), (150, 65), alpha=0.6)
+
 # Dictionnaire pour maintenir l'état des touches
 keys_pressed = {
     'z': False, 's': False,  # Avant/Arrière
@@ -112,10 +106,54 @@ keys_pressed = {
     'a': False, 'e': False   # Rotation
 }
 
+def control_step(now, _):
+    """Consigne rc selon les touches maintenues (30 Hz, même si la vidéo se fige)"""
+    if not ((flying or (taking_off and time.time() - takeoff_start_time > 1)) and not landing):
+        rc_output.release()
+        return
+    
+    left_right_velocity = 0
+    for_back_velocity = 0
+    up_down_velocity = 0
+    yaw_velocity = 0
+    
+    if keys_pressed['z']:
+        for_back_velocity = speed
+    if keys_pressed['s']:
+        for_back_velocity = -speed
+    if keys_pressed['q']:
+        left_right_velocity = -speed
+    if keys_pressed['d']:
+        left_right_velocity = speed
+    if keys_pressed['p']:
+        up_down_velocity = speed
+    if keys_pressed['m']:
+        up_down_velocity = -speed
+    if keys_pressed['a']:
+        yaw_velocity = -speed
+    if keys_pressed['e']:
+        yaw_velocity = speed
+    
+    rc_output.set(left_right_velocity, for_back_velocity, up_down_velocity, yaw_velocity)
+
+# Les touches sont lues directement : pas de chien de garde sur une entrée publiée
+control_loop = ControlLoop(control_step, rate_hz=30, watchdog=None).start()
+
 # Gestionnaire de clavier avec pynput
 def on_press(key):
     global flying, taking_off, landing, takeoff_start_time, running, speed, show_hud
     
+    # Touche spéciale : ESC de pynput ou du navigateur (viewer)
+    if is_escape(key):
+        pressed_at = time.monotonic()
+        print("\n⚠️  Sortie...")
+        if flying or taking_off:
+            print("🛬 Atterrissage automatique...")
+            stop_tello(link, pressed_at, control_loop=control_loop, rc_output=rc_output)
+            time.sleep(3)
+        running = False
+        return
+    
     try:
         # Touches de caractères
         k = key.char.lower() if hasattr(key, 'char') and key.char else None
@@ -132,12 +170,14 @@ def on_press(key):
             
             def land_thread():
                 global flying, landing
+                control_loop.suspend()
+                rc_output.release()
                 send_command('rc 0 0 0 0', wait_response=False)
-                time.sleep(0.3)
                 send_command('land')
                 time.sleep(3)
                 flying = False
                 landing = False
+                control_loop.resume()
                 print("✓ Au sol !")
             
             threading.Thread(target=land_thread, daemon=True).start()
@@ -184,16 +224,7 @@ def on_press(key):
             keys_pressed['e'] = True
     
     except (AttributeError, TypeError):
-        # Touches spéciales
-        if key == keyboard.Key.esc:
-            print("\n⚠️  Sortie...")
-            if flying or taking_off:
-                print("🛬 Atterrissage automatique...")
-                send_command('rc 0 0 0 0', wait_response=False)
-                time.sleep(0.3)
-                send_command('land')
-                time.sleep(3)
-            running = False
+        pass
 
 def on_release(key):
     try:
@@ -219,24 +250,34 @@ def on_release(key):
     except (AttributeError, TypeError):
         pass
 
-# Démarrer le listener clavier dans un thread
-listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-listener.start()
+# Fenêtre cv2 + pynput, ou viewer web qui fournit aussi les touches (TELLO_HEADLESS=1)
+headless = HEADLESS
+if keyboard is None and not headless:
+    # Sans pynput, la fenêtre cv2 ne donne pas l'appui/relâchement des touches
+    print("⚠️  pynput absent (pip install pynput) : touches et vidéo via le viewer web")
+    headless = True
+display = create_display("Tello - Controle FPS", headless=headless, topmost=True)
+if display.headless:
+    display.listen(on_press, on_release)
+    listener = None
+else:
+    listener = keyboard.Listener(on_press=on_press, on_release=on_release)
+    listener.start()
 
 try:
     print("✓ Système prêt\n")
     
     while running:
-        ret, frame = cap.read()
+        seq, frame_time, frame = grabber.read(timeout=0.1)
         
-        if ret and frame is not None:
+        if frame is not None:
             frame_count += 1
             frame = cv2.resize(frame, (960, 720))
             
-            if frame_count % 100 == 0:
-                bat = send_command('battery?')
-                if bat:
-                    current_battery = bat
+            # Batterie lue dans la télémétrie (aucune requête UDP)
+            bat = telemetry.get('bat')
+            if bat is not None:
+                current_battery = bat
             
             try:
                 battery_int = int(current_battery)
@@ -264,41 +305,11 @@ try:
             else:
                 status, status_color = "SOL", (128, 128, 128)
             
-            # Calculer les vélocités selon les touches maintenues
-            left_right_velocity = 0
-            for_back_velocity = 0
-            up_down_velocity = 0
-            yaw_velocity = 0
-            
-            if (flying or (taking_off and time.time() - takeoff_start_time > 1)) and not landing:
-                if keys_pressed['z']:
-                    for_back_velocity = speed
-                if keys_pressed['s']:
-                    for_back_velocity = -speed
-                if keys_pressed['q']:
-                    left_right_velocity = -speed
-                if keys_pressed['d']:
-                    left_right_velocity = speed
-                if keys_pressed['p']:
-                    up_down_velocity = speed
-                if keys_pressed['m']:
-                    up_down_velocity = -speed
-                if keys_pressed['a']:
-                    yaw_velocity = -speed
-                if keys_pressed['e']:
-                    yaw_velocity = speed
-            
             # ========== INTERFACE OPTIMISÉE ==========
             if show_hud:
                 # --- COIN SUPÉRIEUR GAUCHE : Infos essentielles ---
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (5, 5), (220, 125), (0, 0, 0), -1)
-                frame = cv2.addWeighted(overlay, 0.6, frame, 0.4, 0)
-                
-                cv2.putText(frame, f"BAT: {current_battery}%", (15, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, battery_color, 2)
-                cv2.putText(frame, f"Status: {status}", (15, 60), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
+                info_panel.text('battery', f"BAT: {current_battery}%", (15, 30), 0.7, battery_color)
+                info_panel.text('status', f"Status: {status}", (15, 60), 0.6, status_color)
                 
                 # Vitesse avec icône
                 if speed <= 30:
@@ -310,63 +321,58 @@ try:
                 else:
                     speed_label = "MAX"
                 
-                cv2.putText(frame, f"Vitesse: {speed_label}", (15, 90), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 255), 2)
+                info_panel.text('speed', f"Vitesse: {speed_label}", (15, 90), 0.55, (0, 255, 255))
                 
                 # Barre de vitesse compacte
                 bar_width = int((speed / 100) * 200)
-                cv2.rectangle(frame, (15, 100), (215, 115), (50, 50, 50), -1)
-                cv2.rectangle(frame, (15, 100), (15 + bar_width, 115), (0, 255, 255), -1)
-                cv2.rectangle(frame, (15, 100), (215, 115), (150, 150, 150), 1)
+                info_panel.rect('bar_background', (15, 100), (215, 115), (50, 50, 50))
+                info_panel.rect('bar', (15, 100), (15 + bar_width, 115), (0, 255, 255))
+                info_panel.rect('bar_border', (15, 100), (215, 115), (150, 150, 150), 1)
+                info_panel.draw(frame)
                 
                 # --- BAS DE L'ÉCRAN : Aide compacte (toggle avec H) ---
-                overlay3 = frame.copy()
-                cv2.rectangle(overlay3, (5, 680), (955, 715), (0, 0, 0), -1)
-                frame = cv2.addWeighted(overlay3, 0.5, frame, 0.5, 0)
-                
-                cv2.putText(frame, "T:Decol L:Atterir ZQSD:Deplac PM:Haut/Bas AE:Rot SPACE:Stop 1-4:Vitesse H:HUD ESC:Quit", 
-                           (10, 700), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1)
+                help_panel.draw(frame)
             else:
                 # Mode minimal : juste batterie et status
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (5, 5), (150, 65), (0, 0, 0), -1)
-                frame = cv2.addWeighted(overlay, 0.6, frame, 0.4, 0)
-                
-                cv2.putText(frame, f"BAT: {current_battery}%", (15, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, battery_color, 2)
-                cv2.putText(frame, status, (15, 55), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, status_color, 2)
+                minimal_panel.text('battery', f"BAT: {current_battery}%", (15, 30), 0.6, battery_color)
+                minimal_panel.text('status', status, (15, 55), 0.5, status_color)
+                minimal_panel.draw(frame)
             
-            cv2.imshow("Tello - Controle FPS", frame)
-            cv2.setWindowProperty("Tello - Controle FPS", cv2.WND_PROP_TOPMOST, 1)
-        
-        # Envoyer les commandes RC en continu
-        if (flying or (taking_off and time.time() - takeoff_start_time > 1)) and not landing:
-            send_command(f'rc {left_right_velocity} {for_back_velocity} {up_down_velocity} {yaw_velocity}', wait_response=False)
+            display.show(frame)
         
         # Petite pause pour ne pas surcharger
-        cv2.waitKey(1)
+        display.poll_key()
 
 except KeyboardInterrupt:
+    pressed_at = time.monotonic()
     print("\n\n⚠️ ARRÊT D'URGENCE (Ctrl+C)")
     running = False
     if flying or taking_off:
-        send_command('rc 0 0 0 0', wait_response=False)
-        time.sleep(0.3)
-        send_command('land')
+        stop_tello(link, pressed_at, control_loop=control_loop, rc_output=rc_output)
         time.sleep(3)
+    control_loop.stop()
 
 finally:
     running = False
-    listener.stop()
-    listener.join(timeout=1)
+    if listener is not None:
+        listener.stop()
+        listener.join(timeout=1)
+    control_loop.stop()
+    jitter = control_loop.jitter()
+    rc_output.stop()
     send_command('rc 0 0 0 0', wait_response=False)
-    cap.release()
+    grabber.stop()
     send_command('streamoff', wait_response=False)
-    if command_socket:
-        command_socket.close()
-    cv2.destroyAllWindows()
+    telemetry.stop()
+    if link:
+        link.close()
+    if recorder is not None:
+        recorder.close()
+        print(f"📼 Journal de vol: {recorder.describe()}")
+    display.close()
     print("\n✓ Programme terminé")
-    print("Batterie:", tello.get_battery(), "%")    
-    print("Temps de vol:", tello.get_flight_time(), "secondes")
-    print("Température:", tello.get_temperature(), "°C")
\ No newline at end of file
+    print("Batterie:", telemetry.get('bat'), "%")
+    print("Temps de vol:", telemetry.get('time'), "secondes")
+    print("Température:", telemetry.get('temperature'), "°C")
+    print(f"Boucle de contrôle: {control_loop.ticks} ticks, gigue p99 {jitter['p99']:.1f} ms, "
+          f"{control_loop.overruns} dépassements")
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Contrôleur Parrot Mambo (Bluetooth BLE)
+
+- trames ARCommands pré-allouées (mambo_protocol.py)
+- boucle PCMD à cadence fixe (scheduler.py) : la consigne de move() part à
+  chaque tick, la connexion est maintenue même en stationnaire
+- notifications des deux canaux décodées en télémétrie (mambo_telemetry.py)
+
+    mambo = MamboController()
+    if await mambo.connect():
+        await mambo.takeoff()
+        mambo.move(pitch=40)
+        sent = await mambo.next_pcmd()     # instant d'émission de la consigne
+        await mambo.land()
+        await mambo.disconnect()
+"""
+
+import asyncio
+import time
+
+from bleak import BleakClient, BleakScanner
+
+from mambo_protocol import CommandBuffer, PcmdFrame
+from mambo_telemetry import MamboTelemetry
+from scheduler import AsyncRateScheduler
+
+# ============================================================
+#                    CLASSE MAMBO CONTROLLER
+# ============================================================
+
+class MamboController:
+    """Contrôleur pour le drone Parrot Mambo (BLE)"""
+    
+    CHAR_SEND_NOACK = "9a66fa0a-0800-9191-11e4-012d1540cb8e"
+    CHAR_SEND_ACK = "9a66fa0b-0800-9191-11e4-012d1540cb8e"
+    CHAR_RECV_NOACK = "9a66fb0f-0800-9191-11e4-012d1540cb8e"
+    CHAR_RECV_ACK = "9a66fb0e-0800-9191-11e4-012d1540cb8e"
+    
+    def __init__(self, address=None, pcmd_rate=20):
+        self.address = address
+        self.client = None
+        self.connected = False
+        self.pcmd_task = None
+        self.pcmd_schedule = AsyncRateScheduler(pcmd_rate)  # PCMD sur échéances absolues
+        self.pcmd_waiters = []      # futures résolues à l'émission de la prochaine trame
+        
+        # Trames pré-allouées, une par caractéristique d'envoi (mambo_protocol.py)
+        self.pcmd = PcmdFrame()
+        self.ack_frames = CommandBuffer()
+        self.ack_lock = asyncio.Lock()
+        
+        # État décodé des deux canaux de notification (mambo_telemetry.py)
+        self.telemetry = MamboTelemetry(on_change=self._state_changed)
+        self.debug_mode = False
+    
+    async def find_mambo(self):
+        """Recherche un Mambo à proximité"""
+        print("🔍 [MAMBO] Recherche...")
+        devices = await BleakScanner.discover(timeout=5.0)
+        
+        for device in devices:
+            if device.name and "Mambo" in device.name:
+                print(f"✓ [MAMBO] Trouvé: {device.name} ({device.address})")
+                return device.address
+        
+        print("✗ [MAMBO] Non trouvé")
+        return None
+    
+    @property
+    def battery(self):
+        return self.telemetry.get('battery', 0)
+    
+    @property
+    def flying_state(self):
+        return self.telemetry.get('flying_state', "unknown")
+    
+    def _state_changed(self, name, values):
+        """Affiche les changements d'état de vol, d'alerte et de batterie"""
+        if 'flying_state' in values:
+            print(f"✈️  [MAMBO] État: {values['flying_state']}")
+        elif 'alert' in values:
+            print(f"⚠️  [MAMBO] Alerte: {values['alert']}")
+        elif 'battery' in values:
+            print(f"🔋 [MAMBO] Batterie: {values['battery']}%")
+    
+    async def _pcmd_loop(self):
+        """Boucle PCMD pour maintenir la connexion"""
+        self.pcmd_schedule.reset()
+        async for deadline in self.pcmd_schedule.run():
+            if not (self.connected and self.client and self.client.is_connected):
+                break
+            try:
+                frame = self.pcmd.build(int(time.time() * 1000))
+                await self.client.write_gatt_char(self.CHAR_SEND_NOACK, frame, response=False)
+                if self.pcmd_waiters:
+                    self._pcmd_sent(time.monotonic())
+            except Exception as e:
+                if self.debug_mode:
+                    print(f"⚠️  [MAMBO] Erreur PCMD: {e}")
+                break
+    
+    def _pcmd_sent(self, timestamp):
+        waiters, self.pcmd_waiters = self.pcmd_waiters, []
+        for future in waiters:
+            if not future.done():
+                future.set_result(timestamp)
+    
+    def next_pcmd(self):
+        """Future résolue (time.monotonic()) quand la prochaine trame PCMD est partie"""
+        future = asyncio.get_running_loop().create_future()
+        self.pcmd_waiters.append(future)
+        return future
+    
+    async def _send_command(self, project, class_id, cmd, data=b'', settle=0.1):
+        """Envoie une commande avec ACK ; renvoie l'instant d'émission"""
+        # Le tampon est réutilisé : une seule commande en cours d'écriture
+        async with self.ack_lock:
+            frame = self.ack_frames.build(project, class_id, cmd, data)
+            await self.client.write_gatt_char(self.CHAR_SEND_ACK, frame, response=False)
+            sent = time.monotonic()
+        if settle:
+            await asyncio.sleep(settle)
+        return sent
+    
+    async def connect(self):
+        """Connexion au Mambo"""
+        if not self.address:
+            self.address = await self.find_mambo()
+            if not self.address:
+                return False
+        
+        print(f"📡 [MAMBO] Connexion à {self.address}...")
+        await asyncio.sleep(2)
+        
+        self.client = BleakClient(self.address, timeout=30.0)
+        
+        try:
+            await self.client.connect()
+            print("✓ [MAMBO] Connecté!")
+            
+            await self.client.start_notify(self.CHAR_RECV_ACK, self.telemetry.notification)
+            await self.client.start_notify(self.CHAR_RECV_NOACK, self.telemetry.notification)
+            
+            self.connected = True
+            self.pcmd_task = asyncio.create_task(self._pcmd_loop())
+            
+            await asyncio.sleep(1)
+            
+            # Initialisation
+            datetime_str = time.strftime("%Y-%m-%dT%H:%M:%S+0000")
+            data = datetime_str.encode('utf-8') + b'\x00'
+            await self._send_command(0, 4, 1, data)
+            await self._send_command(0, 4, 0)
+            
+            await asyncio.sleep(1)
+            print("✓ [MAMBO] Prêt!")
+            return True
+            
+        except Exception as e:
+            print(f"✗ [MAMBO] Erreur: {e}")
+            return False
+    
+    async def disconnect(self):
+        """Déconnexion"""
+        self.connected = False
+        
+        if self.pcmd_task:
+            self.pcmd_task.cancel()
+            try:
+                await self.pcmd_task
+            except asyncio.CancelledError:
+                pass
+        self._pcmd_sent(None)   # plus aucune trame ne partira
+        
+        if self.client and self.client.is_connected:
+            await self.client.disconnect()
+        
+        print("📴 [MAMBO] Déconnecté")
+    
+    async def flat_trim(self):
+        """Calibration"""
+        print("🎯 [MAMBO] Calibration...")
+        return await self._send_command(2, 0, 0)
+    
+    async def takeoff(self):
+        """Décollage"""
+        print("🚁 [MAMBO] Décollage...")
+        return await self._send_command(2, 0, 1)
+    
+    async def land(self):
+        """Atterrissage"""
+        print("🛬 [MAMBO] Atterrissage...")
+        return await self._send_command(2, 0, 3)
+    
+    async def emergency(self):
+        """Coupure immédiate des moteurs"""
+        print("🚨 [MAMBO] Urgence!")
+        self.pcmd.hover()
+        return await self._send_command(2, 0, 4)
+    
+    async def stop(self, mode='land'):
+        """Arrêt d'urgence : consigne nulle et land (ou emergency) sans pause"""
+        self.pcmd.hover()
+        if not (self.connected and self.client and self.client.is_connected):
+            return None
+        return await self._send_command(2, 0, 4 if mode == 'emergency' else 3, settle=0)
+    
+    def move(self, roll=0, pitch=0, yaw=0, gaz=0):
+        """Déplacement (consigne remplacée d'un bloc, lue par la boucle PCMD)"""
+        self.pcmd.set(roll, pitch, yaw, gaz)
+    
+    def hover(self):
+        """Hover (arrêt)"""
+        self.pcmd.hover()
@@ -0,0 +1,126 @@
+"""
+Trames ARCommands du Parrot Mambo, construites sans allocation
+
+Chaque envoi BLE est une trame :
+    type (1 o) | séquence (1 o) | projet (1 o) | classe (1 o) | commande (2 o) | arguments
+L'ancienne boucle PCMD enchaînait trois struct.pack et deux concaténations
+toutes les 50 ms (cinq objets bytes par trame). Ici :
+- les formats sont des struct.Struct compilés une fois
+- chaque caractéristique d'envoi a son bytearray réutilisé (pack_into)
+- l'en-tête PCMD constant est écrit une seule fois, seuls la séquence et
+  les arguments sont réécrits
+- la consigne est un tuple remplacé d'un bloc par move() : la boucle PCMD
+  ne lit jamais un roll neuf avec un pitch ancien
+
+    pcmd = PcmdFrame()
+    pcmd.set(pitch=40)                      # depuis n'importe quel thread
+    frame = pcmd.build(timestamp_ms)        # dans la boucle d'envoi
+    await client.write_gatt_char(CHAR_SEND_NOACK, frame, response=False)
+
+Comparer avec l'ancienne construction :
+    python mambo_protocol.py
+"""
+
+import struct
+import time
+
+FRAME_DATA = 2              # type de trame « données »
+MAX_FRAME = 128             # o, plus grande commande envoyée (date ISO comprise)
+
+HEADER = struct.Struct('<BBBBH')        # type, séquence, projet, classe, commande
+PCMD_ARGS = struct.Struct('<BbbbbI')    # flag, roll, pitch, yaw, gaz, horodatage (ms)
+PCMD_COMMAND = (2, 0, 2)                # minidrone / Piloting / PCMD
+
+HOVER = (0, 0, 0, 0, 0)
+
+
+def _clamp(value):
+    return max(-100, min(100, int(value)))
+
+
+class CommandBuffer:
+    """Tampon réutilisé d'une caractéristique d'envoi et son numéro de séquence"""
+
+    def __init__(self, size=MAX_FRAME):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.sequence = 0
+
+    def build(self, project, class_id, cmd, data=b''):
+        """Trame (vue sur le tampon) valable jusqu'au prochain build()"""
+        end = HEADER.size + len(data)
+        if end > len(self.buffer):
+            raise ValueError(f"Commande trop longue ({end} o > {len(self.buffer)} o)")
+        HEADER.pack_into(self.buffer, 0, FRAME_DATA, self.sequence, project, class_id, cmd)
+        self.view[HEADER.size:end] = data
+        self.sequence = (self.sequence + 1) % 256
+        return self.view[:end]
+
+
+class PcmdFrame:
+    """Trame PCMD pré-allouée et consigne courante (dernière gagnante)"""
+
+    def __init__(self):
+        self.buffer = bytearray(HEADER.size + PCMD_ARGS.size)
+        HEADER.pack_into(self.buffer, 0, FRAME_DATA, 0, *PCMD_COMMAND)
+        self.sequence = 0
+        self.setpoint = HOVER       # (flag, roll, pitch, yaw, gaz) remplacé d'un bloc
+
+    def set(self, roll=0, pitch=0, yaw=0, gaz=0):
+        roll, pitch, yaw, gaz = _clamp(roll), _clamp(pitch), _clamp(yaw), _clamp(gaz)
+        flag = 1 if (roll or pitch or yaw or gaz) else 0
+        self.setpoint = (flag, roll, pitch, yaw, gaz)
+
+    def hover(self):
+        self.setpoint = HOVER
+
+    def build(self, timestamp_ms):
+        """Réécrit séquence et arguments dans le tampon et le renvoie"""
+        flag, roll, pitch, yaw, gaz = self.setpoint
+        self.buffer[1] = self.sequence
+        PCMD_ARGS.pack_into(self.buffer, HEADER.size, flag, roll, pitch, yaw, gaz,
+                            timestamp_ms & 0xFFFFFFFF)
+        self.sequence = (self.sequence + 1) % 256
+        return self.buffer
+
+
+def build_pcmd_concat(sequence, setpoint, timestamp_ms):
+    """Ancienne construction (trois pack + deux concaténations), pour comparaison"""
+    flag, roll, pitch, yaw, gaz = setpoint
+    data = struct.pack('<BbbbbI', flag, roll, pitch, yaw, gaz, timestamp_ms % (2**32))
+    payload = struct.pack('<BBH', 2, 0, 2) + data
+    return struct.pack('<BB', 2, sequence) + payload
+
+
+def benchmark(frames=200000):
+    """ns par trame PCMD : construction par concaténation vs tampon pré-alloué"""
+    pcmd = PcmdFrame()
+    pcmd.set(roll=-10, pitch=40, yaw=5, gaz=-3)
+    setpoint = pcmd.setpoint
+    timestamp = int(time.time() * 1000)
+
+    # Les deux constructions doivent produire exactement les mêmes octets
+    assert bytes(pcmd.build(timestamp)) == build_pcmd_concat(0, setpoint, timestamp)
+
+    results = {}
+    start = time.perf_counter_ns()
+    for i in range(frames):
+        build_pcmd_concat(i & 0xFF, setpoint, timestamp + i)
+    results['concaténation'] = (time.perf_counter_ns() - start) / frames
+
+    start = time.perf_counter_ns()
+    for i in range(frames):
+        pcmd.build(timestamp + i)
+    results['pack_into'] = (time.perf_counter_ns() - start) / frames
+    return results
+
+
+if __name__ == "__main__":
+    timings = benchmark()
+    print("=" * 60)
+    print(f"  Trame PCMD ({HEADER.size + PCMD_ARGS.size} o)")
+    for name, ns in timings.items():
+        print(f"  {name:>14}: {ns:7.0f} ns/trame")
+    print(f"  Gain: x{timings['concaténation'] / timings['pack_into']:.1f} "
+          f"(0 objet bytes créé par trame au lieu de 5)")
+    print("=" * 60)
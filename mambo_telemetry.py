@@ -0,0 +1,220 @@
+"""
+Télémétrie Mambo : décodage des notifications ARCommands (BLE)
+
+Le Mambo pousse son état sur deux caractéristiques : avec ACK (état de vol,
+alertes, batterie) et sans ACK (vitesse, altitude, quaternion, jusqu'à
+plusieurs dizaines de messages par seconde). Chaque notification est :
+    type | séquence | projet | classe | commande (2 o) | arguments
+Le décodage se fait directement dans le callback bleak : une recherche dans
+une table (projet, classe, commande) -> struct compilé, un unpack_from sans
+copie, puis un instantané immuable publié comme pour le Tello
+(tello_telemetry.py) : `telemetry.latest` se lit sans verrou.
+
+    telemetry = MamboTelemetry()
+    await client.start_notify(CHAR_RECV_NOACK, telemetry.notification)
+    telemetry.get('altitude'), telemetry.latest.attitude
+
+Mesurer le coût du décodage :
+    python mambo_telemetry.py
+"""
+
+import math
+import struct
+import time
+from collections import deque, namedtuple
+
+from mambo_protocol import HEADER
+
+HISTORY_SIZE = 1200     # ~60 s à 20 notifications/s
+
+FLYING_STATES = ("landed", "takingoff", "hovering", "flying", "landing",
+                 "emergency", "rolling", "init")
+ALERTS = ("none", "user", "cut_out", "critical_battery", "low_battery")
+
+_FIELDS = ('timestamp', 'flying_state', 'alert', 'battery',
+           'speed_x', 'speed_y', 'speed_z', 'altitude',
+           'roll', 'pitch', 'yaw', 'flat_trim')
+
+
+class MamboState(namedtuple('MamboState', _FIELDS)):
+    """Instantané typé de l'état du Mambo (vitesses en m/s, altitude en m, angles en degrés)"""
+
+    __slots__ = ()
+
+    @property
+    def attitude(self):
+        return (self.pitch, self.roll, self.yaw)
+
+    @property
+    def speed(self):
+        return math.sqrt(self.speed_x ** 2 + self.speed_y ** 2 + self.speed_z ** 2)
+
+    @property
+    def height(self):
+        """Altitude en cm, comme `h` côté Tello"""
+        return int(self.altitude * 100)
+
+
+EMPTY_STATE = MamboState(timestamp=0.0, flying_state="unknown", alert="none", battery=0,
+                         speed_x=0.0, speed_y=0.0, speed_z=0.0, altitude=0.0,
+                         roll=0.0, pitch=0.0, yaw=0.0, flat_trim=False)
+
+
+# ============================================================
+#                 TABLE DE DÉCODAGE
+# ============================================================
+
+def _enum(names):
+    return lambda values: (names[values[0]] if values[0] < len(names) else f"unknown({values[0]})",)
+
+
+def _euler(values):
+    """Quaternion (w, x, y, z) -> (roll, pitch, yaw) en degrés"""
+    w, x, y, z = values[:4]
+    roll = math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    pitch = math.asin(max(-1.0, min(1.0, 2 * (w * y - z * x))))
+    yaw = math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return (math.degrees(roll), math.degrees(pitch), math.degrees(yaw))
+
+
+# (projet, classe, commande) -> (nom, struct des arguments, champs, conversion)
+DECODERS = {
+    # common / CommonState / BatteryStateChanged
+    (0, 5, 1): ("batterie", struct.Struct('<B'), ('battery',), None),
+    # minidrone / PilotingState / FlatTrimChanged
+    (2, 3, 0): ("flat trim", struct.Struct('<'), ('flat_trim',), lambda values: (True,)),
+    # minidrone / PilotingState / FlyingStateChanged
+    (2, 3, 1): ("état de vol", struct.Struct('<I'), ('flying_state',), _enum(FLYING_STATES)),
+    # minidrone / PilotingState / AlertStateChanged
+    (2, 3, 2): ("alerte", struct.Struct('<I'), ('alert',), _enum(ALERTS)),
+    # minidrone / NavigationDataState / DroneSpeed (vx, vy, vz, ts)
+    (2, 18, 1): ("vitesse", struct.Struct('<fffH'), ('speed_x', 'speed_y', 'speed_z'), None),
+    # minidrone / NavigationDataState / DroneAltitude (altitude, ts)
+    (2, 18, 2): ("altitude", struct.Struct('<fH'), ('altitude',), None),
+    # minidrone / NavigationDataState / DroneQuaternion (w, x, y, z, ts)
+    (2, 18, 3): ("attitude", struct.Struct('<ffffH'), ('roll', 'pitch', 'yaw'), _euler),
+}
+
+
+# Position de chaque champ dans l'instantané : mise à jour sans _replace(**kwargs)
+_INDICES = {key: tuple(_FIELDS.index(field) for field in entry[2])
+            for key, entry in DECODERS.items()}
+_WATCHED = {"état de vol", "alerte", "batterie"}   # messages rares signalés par on_change
+
+
+def _unpack(data):
+    """(clé, entrée, valeurs converties) ; entrée None si la commande est inconnue"""
+    _, _, project, class_id, cmd = HEADER.unpack_from(data)
+    key = (project, class_id, cmd)
+    entry = DECODERS.get(key)
+    if entry is None:
+        return key, None, None
+    _, args, _, convert = entry
+    values = args.unpack_from(data, HEADER.size)
+    if convert is not None:
+        values = convert(values)
+    return key, entry, values
+
+
+def decode(data):
+    """(nom, {champ: valeur}) d'une notification ; None si la commande est inconnue
+
+    Lève struct.error si la trame est tronquée.
+    """
+    _, entry, values = _unpack(data)
+    if entry is None:
+        return None
+    return entry[0], dict(zip(entry[2], values))
+
+
+class MamboTelemetry:
+    """Décode les notifications du Mambo et garde un historique circulaire"""
+
+    def __init__(self, history_size=HISTORY_SIZE, on_change=None):
+        self.latest = None
+        self.history = deque(maxlen=history_size)
+        self.on_change = on_change      # on_change(nom, champs) : état de vol, alerte, batterie
+
+        self.packets = 0
+        self.unknown = 0
+        self.parse_errors = 0
+
+    def notification(self, sender, data):
+        """Callback bleak (start_notify), valable pour les deux canaux"""
+        self.handle(data)
+
+    def handle(self, data, timestamp=None):
+        try:
+            key, entry, values = _unpack(data)
+        except struct.error:
+            self.parse_errors += 1
+            return
+        if entry is None:
+            self.unknown += 1
+            return
+
+        previous = self.latest if self.latest is not None else EMPTY_STATE
+        fields = list(previous)
+        for index, value in zip(_INDICES[key], values):
+            fields[index] = value
+        fields[0] = time.monotonic() if timestamp is None else timestamp
+        state = MamboState._make(fields)
+
+        self.packets += 1
+        self.history.append(state)
+        self.latest = state
+
+        # Seuls les messages rares (canal avec ACK) sont signalés, et seulement s'ils changent
+        name = entry[0]
+        if self.on_change and name in _WATCHED:
+            changed = dict(zip(entry[2], values))
+            if any(getattr(previous, field) != value for field, value in changed.items()):
+                self.on_change(name, changed)
+
+    def get(self, field, default=None):
+        """Dernière valeur d'un champ (default si aucun état reçu)"""
+        state = self.latest
+        if state is None:
+            return default
+        return getattr(state, field)
+
+    def age(self):
+        """Âge du dernier état en secondes (None si aucun état reçu)"""
+        state = self.latest
+        if state is None:
+            return None
+        return time.monotonic() - state.timestamp
+
+    def recent(self, seconds):
+        """États reçus depuis `seconds` secondes (du plus ancien au plus récent)"""
+        limit = time.monotonic() - seconds
+        return [s for s in list(self.history) if s.timestamp >= limit]
+
+
+def encode(project, class_id, cmd, *args, sequence=0):
+    """Notification factice (tests, benchmark)"""
+    entry = DECODERS[(project, class_id, cmd)]
+    return HEADER.pack(2, sequence, project, class_id, cmd) + entry[1].pack(*args)
+
+
+def benchmark(notifications=100000):
+    """µs par notification décodée et publiée (mélange typique du canal sans ACK)"""
+    frames = [encode(2, 18, 1, 0.4, -0.1, 0.0, 120),
+              encode(2, 18, 2, 1.25, 120),
+              encode(2, 18, 3, 0.98, 0.02, -0.03, 0.17, 120),
+              bytearray(encode(2, 3, 1, 3))]
+    telemetry = MamboTelemetry()
+    start = time.perf_counter()
+    for i in range(notifications):
+        telemetry.handle(frames[i % len(frames)])
+    elapsed = (time.perf_counter() - start) / notifications * 1e6
+    return elapsed, telemetry.latest
+
+
+if __name__ == "__main__":
+    us, state = benchmark()
+    print("=" * 60)
+    print(f"  Décodage Mambo: {us:.2f} µs/notification")
+    print(f"  État: {state.flying_state}, altitude {state.altitude:.2f} m, "
+          f"attitude {tuple(round(a, 1) for a in state.attitude)}, vitesse {state.speed:.2f} m/s")
+    print("=" * 60)
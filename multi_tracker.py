@@ -0,0 +1,304 @@
+"""
+Suivi multi-objets : filtres de Kalman à vitesse constante + affectation optimale
+
+À chaque image :
+1. tous les filtres sont prédits d'un coup (tableaux NumPy, un filtre par ligne)
+   avec le dt réel entre deux images
+2. le coût piste/détection combine IoU et distance des centres ; les paires
+   trop éloignées sont interdites
+3. l'affectation optimale (hongroise) remplace l'appariement glouton :
+   scipy si disponible, sinon une version NumPy
+4. naissance après `min_hits` détections, mort après `max_age` images ratées ;
+   entre deux, la piste garde son numéro et continue sur sa prédiction
+
+    tracker = MultiObjectTracker()
+    for track in tracker.update([(box, info), ...], timestamp):
+        x, y, w, h = track.box
+
+Mesurer sur 50 cibles :
+    python multi_tracker.py
+"""
+
+import time
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+DEFAULT_DT = 1 / 30
+INFEASIBLE = 1e6
+
+
+class Track(namedtuple('Track', 'id box center velocity info hits misses')):
+    """Piste publiée : boîte lissée (x, y, w, h) et vitesse du centre (px/s)"""
+
+    __slots__ = ()
+
+    @property
+    def detected(self):
+        """Vue à cette image (sinon position prédite)"""
+        return self.misses == 0
+
+
+# ============================================================
+#                    AFFECTATION
+# ============================================================
+
+def _hungarian(cost):
+    """Affectation de coût minimal (lignes <= colonnes), renvoie (lignes, colonnes)"""
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, np.int64)       # p[j] = ligne affectée à la colonne j (1-indexé)
+    way = np.zeros(m + 1, np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            used_cols = np.flatnonzero(used)
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Remonter le chemin augmentant
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.flatnonzero(p[1:])
+    return p[1:][cols] - 1, cols
+
+
+def solve_assignment(cost):
+    """(lignes, colonnes) de l'affectation optimale, matrice rectangulaire acceptée"""
+    if cost.size == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = _hungarian(cost.T)
+    else:
+        rows, cols = _hungarian(cost)
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def iou_matrix(a, b):
+    """IoU entre deux séries de boîtes (x, y, w, h) -> (len(a), len(b))"""
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    inter_h = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = inter_w * inter_h
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+# ============================================================
+#                    SUIVI
+# ============================================================
+
+class MultiObjectTracker:
+    """Pistes à numéro stable, état (cx, cy, w, h, vx, vy, vw, vh) par filtre de Kalman"""
+
+    def __init__(self, max_distance=100, min_iou=0.1, min_hits=3, max_age=10,
+                 accel_noise=300.0, measurement_noise=8.0):
+        self.max_distance = max_distance    # px, au-delà une paire sans recouvrement est interdite
+        self.min_iou = min_iou
+        self.min_hits = min_hits            # détections avant publication
+        self.max_age = max_age              # images ratées avant suppression
+        self.accel_noise = accel_noise      # px/s², bruit de modèle
+        self.measurement_noise = measurement_noise  # px
+
+        self.x = np.empty((0, 8))
+        self.P = np.empty((0, 8, 8))
+        self.ids = []
+        self.hits = []
+        self.misses = []
+        self.infos = []
+
+        self.next_id = 1
+        self.last_timestamp = None
+
+    def reset(self):
+        self.x = np.empty((0, 8))
+        self.P = np.empty((0, 8, 8))
+        self.ids, self.hits, self.misses, self.infos = [], [], [], []
+        self.last_timestamp = None
+
+    def update(self, detections, timestamp=None):
+        """detections = [(box(x, y, w, h), info)] ; renvoie les pistes publiées [Track]"""
+        dt = self._dt(timestamp)
+        self._predict(dt)
+
+        boxes = np.array([box for box, _ in detections], np.float64).reshape(-1, 4)
+        rows, cols = self._associate(boxes)
+
+        # Pistes appariées : correction
+        if len(rows):
+            centers = boxes[cols, :2] + boxes[cols, 2:] / 2
+            self._correct(rows, np.hstack([centers, boxes[cols, 2:]]))
+        matched = set(rows.tolist())
+        for row, col in zip(rows, cols):
+            self.hits[row] += 1
+            self.misses[row] = 0
+            self.infos[row] = detections[col][1]
+        for row in range(len(self.ids)):
+            if row not in matched:
+                self.misses[row] += 1
+
+        # Pistes trop longtemps ratées : mort (les pistes jamais confirmées meurent tout de suite)
+        keep = [m <= self.max_age and (h >= self.min_hits or m == 0)
+                for h, m in zip(self.hits, self.misses)]
+        if not all(keep):
+            self._select(np.flatnonzero(keep))
+
+        # Détections libres : naissance
+        free = np.setdiff1d(np.arange(len(boxes)), cols)
+        for col in free:
+            self._spawn(boxes[col], detections[col][1])
+
+        return self.tracks()
+
+    def tracks(self):
+        """Pistes confirmées (y compris celles qui continuent sur leur prédiction)"""
+        result = []
+        for i, track_id in enumerate(self.ids):
+            if self.hits[i] < self.min_hits:
+                continue
+            cx, cy, w, h, vx, vy = self.x[i, :6]
+            w, h = max(w, 1.0), max(h, 1.0)
+            box = (int(cx - w / 2), int(cy - h / 2), int(w), int(h))
+            result.append(Track(track_id, box, (int(cx), int(cy)), (float(vx), float(vy)),
+                                self.infos[i], self.hits[i], self.misses[i]))
+        return result
+
+    # ---------- Kalman ----------
+
+    def _dt(self, timestamp):
+        if timestamp is None:
+            return DEFAULT_DT
+        dt = DEFAULT_DT if self.last_timestamp is None else timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+        return min(max(dt, 1e-3), 1.0)
+
+    def _predict(self, dt):
+        if not self.ids:
+            return
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+
+        # Accélération blanche : Q = G G^T sigma² par axe
+        q = self.accel_noise ** 2
+        Q = np.zeros((8, 8))
+        Q[:4, :4] = np.eye(4) * dt ** 4 / 4 * q
+        Q[:4, 4:] = Q[4:, :4] = np.eye(4) * dt ** 3 / 2 * q
+        Q[4:, 4:] = np.eye(4) * dt ** 2 * q
+
+        self.x = self.x @ F.T
+        self.P = F @ self.P @ F.T + Q
+
+    def _correct(self, rows, measurements):
+        # H sélectionne (cx, cy, w, h) : S = P[:4, :4] + R, K = P[:, :4] S^-1
+        P = self.P[rows]
+        S = P[:, :4, :4] + np.eye(4) * self.measurement_noise ** 2
+        K = P[:, :, :4] @ np.linalg.inv(S)
+        innovation = measurements - self.x[rows, :4]
+        self.x[rows] += np.einsum('nij,nj->ni', K, innovation)
+        self.P[rows] = P - K @ P[:, :4, :]
+
+    # ---------- association ----------
+
+    def _associate(self, boxes):
+        if not self.ids or not len(boxes):
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+
+        predicted = np.hstack([self.x[:, :2] - self.x[:, 2:4] / 2, self.x[:, 2:4]])
+        iou = iou_matrix(predicted, boxes)
+        delta = (self.x[:, None, :2] - (boxes[None, :, :2] + boxes[None, :, 2:] / 2))
+        distance = np.linalg.norm(delta, axis=2) / self.max_distance
+
+        cost = (1 - iou) + distance
+        gated = (iou < self.min_iou) & (distance > 1)
+        cost[gated] = INFEASIBLE
+
+        rows, cols = solve_assignment(cost)
+        valid = cost[rows, cols] < INFEASIBLE
+        return rows[valid], cols[valid]
+
+    # ---------- naissance / mort ----------
+
+    def _spawn(self, box, info):
+        x, y, w, h = box
+        state = np.array([x + w / 2, y + h / 2, w, h, 0, 0, 0, 0], np.float64)
+        # Position connue à la mesure près, vitesse inconnue
+        cov = np.diag([self.measurement_noise ** 2] * 4 + [self.max_distance ** 2] * 4)
+
+        self.x = np.vstack([self.x, state])
+        self.P = np.concatenate([self.P, cov[None]])
+        self.ids.append(self.next_id)
+        self.hits.append(1)
+        self.misses.append(0)
+        self.infos.append(info)
+        self.next_id += 1
+
+    def _select(self, keep):
+        self.x = self.x[keep]
+        self.P = self.P[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.hits = [self.hits[i] for i in keep]
+        self.misses = [self.misses[i] for i in keep]
+        self.infos = [self.infos[i] for i in keep]
+
+
+def benchmark(targets=50, frames=300, seed=0):
+    """ms par update() pour `targets` cibles en mouvement (détections bruitées, 10 % ratées)"""
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(0, 900, (targets, 2))
+    speeds = rng.uniform(-60, 60, (targets, 2))
+    tracker = MultiObjectTracker()
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        positions += speeds * DEFAULT_DT
+        visible = rng.random(targets) > 0.1
+        noisy = positions[visible] + rng.normal(0, 2, (visible.sum(), 2))
+        detections = [((x, y, 40, 40), None) for x, y in noisy]
+        tracks = tracker.update(detections, frame * DEFAULT_DT)
+    elapsed = (time.perf_counter() - start) / frames * 1000
+    return elapsed, len(tracks), tracker.next_id - 1
+
+
+if __name__ == "__main__":
+    solver = 'scipy' if linear_sum_assignment is not None else 'NumPy'
+    print("=" * 60)
+    for targets in (5, 20, 50):
+        ms, alive, created = benchmark(targets)
+        print(f"  {targets:>3} cibles: {ms:6.2f} ms/image, {alive} pistes, {created} créées ({solver})")
+    print("=" * 60)
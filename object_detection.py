@@ -1,10 +1,24 @@
-import socket
 import cv2
 import time
 import threading
 import os
-import sys
-from pynput import keyboard
+try:
+    from pynput import keyboard
+except ImportError:
+    keyboard = None     # station sans écran : touches reçues par le viewer (TELLO_HEADLESS=1)
+
+from control_loop import ControlLoop
+from emergency_stop import stop_tello
+from flight_recorder import create_recorder
+from frame_grabber import create_grabber
+from hud import HudPanel
+from hybrid_detector import HybridDetector
+from multi_tracker import MultiObjectTracker
+from profiler import PROFILE, StageProfiler
+from tello_link import TelloCommandLink
+from tello_telemetry import TelloTelemetry
+from viewer import HEADLESS, create_display, is_escape
+from rc_output import RcOutput
 
 # Masquer les messages d'erreur FFmpeg
 os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;udp'
@@ -14,38 +28,35 @@ print("=" * 60)
 print("  CONTRÔLE TELLO + RECONNAISSANCE D'OBJETS")
 print("=" * 60)
 
-command_socket = None
-socket_lock = threading.Lock()
+# Liaison de commande partagée (socket persistant, rc jamais bloqués)
+link = None
+send_command = None
 
-def init_socket():
-    global command_socket
-    command_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    command_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    command_socket.bind(('', 9000))
-    command_socket.settimeout(2)
+# Journal de vol (TELLO_FLIGHT_LOG=flights -> flights/<date>/, désactivé par défaut)
+recorder = create_recorder()
+
+# Durée de chaque étape du pipeline (HUD avec TELLO_PROFILE=1, CSV avec TELLO_PROFILE_LOG)
+profiler = StageProfiler(recorder=recorder)
 
-def send_command(command, tello_address=('192.168.10.1', 8889), wait_response=True):
-    global command_socket
-    with socket_lock:
-        try:
-            command_socket.sendto(command.encode('utf-8'), tello_address)
-            if wait_response:
-                try:
-                    response, _ = command_socket.recvfrom(1024)
-                    return response.decode('utf-8').strip()
-                except socket.timeout:
-                    return None
-            return None
-        except Exception as e:
-            print(f"Erreur: {e}")
-            return None
+def init_socket():
+    global link, send_command
+    link = TelloCommandLink(recorder=recorder)
+    send_command = link.send_command
 
 # Détection simple de visages (pas de YOLO)
 print("\n📦 Chargement détecteur de visages...")
 face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
 print("✓ Détecteur chargé")
 
+def detect_faces(frame, gray):
+    return [(tuple(box), None) for box in face_cascade.detectMultiScale(gray, 1.3, 5)]
+
+# Détection Haar périodique, flux optique entre deux détections
+face_detector = HybridDetector(detect_faces)
+
 init_socket()
+telemetry = TelloTelemetry(recorder=recorder).start()
+rc_output = RcOutput(profiler.wrap('send', send_command)).start()
 
 print("\n1. Connexion au Tello...")
 response = send_command('command')
@@ -66,24 +77,12 @@ time.sleep(3)
 
 print("\n4. Ouverture du flux...")
 
-# Rediriger stderr pour masquer les erreurs FFmpeg
-stderr_backup = sys.stderr
-sys.stderr = open(os.devnull, 'w')
-
-cap = cv2.VideoCapture('udp://0.0.0.0:11111', cv2.CAP_FFMPEG)
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-
-# Restaurer stderr après l'ouverture
-sys.stderr.close()
-sys.stderr = stderr_backup
+# Décodage dans un thread dédié : on lit toujours la dernière image
+grabber = create_grabber().start()
 
 print("   Attente du flux vidéo...")
-for i in range(30):
-    ret, frame = cap.read()
-    if ret and frame is not None:
-        print("   ✓ Flux vidéo OK !")
-        break
-    time.sleep(0.2)
+if grabber.wait_first_frame():
+    print("   ✓ Flux vidéo OK !")
 
 print("\n" + "=" * 60)
 print("COMMANDES (TYPE FPS):")
@@ -108,7 +107,11 @@ detection_enabled = False
 
 # Stockage des objets trackés
 tracked_objects = []
-max_distance_threshold = 100
+object_tracker = MultiObjectTracker(max_distance=100)
+
+# Panneau d'infos : texte rendu une fois par changement, fond assombri en place
+info_panel = HudPanel((5, 5), (300, 180), alpha=0.7)
+info_panel.text('title', "CONTROLE + DETECTION", (15, 30), 0.6, (0, 255, 255))
 
 keys_pressed = {
     'z': False, 's': False,
@@ -117,9 +120,57 @@ keys_pressed = {
     'a': False, 'e': False
 }
 
+def control_step(now, _):
+    """Consigne rc selon les touches maintenues (30 Hz, même si la vidéo se fige)"""
+    if not ((flying or (taking_off and time.time() - takeoff_start_time > 1)) and not landing):
+        rc_output.release()
+        return
+    
+    if not any(keys_pressed.values()):
+        rc_output.hover()
+        return
+    
+    left_right_velocity = 0
+    for_back_velocity = 0
+    up_down_velocity = 0
+    yaw_velocity = 0
+    
+    if keys_pressed['z']:
+        for_back_velocity = speed
+    if keys_pressed['s']:
+        for_back_velocity = -speed
+    if keys_pressed['q']:
+        left_right_velocity = -speed
+    if keys_pressed['d']:
+        left_right_velocity = speed
+    if keys_pressed['w']:
+        up_down_velocity = speed
+    if keys_pressed['c']:
+        up_down_velocity = -speed
+    if keys_pressed['a']:
+        yaw_velocity = -speed
+    if keys_pressed['e']:
+        yaw_velocity = speed
+    
+    rc_output.set(left_right_velocity, for_back_velocity, up_down_velocity, yaw_velocity)
+
+# Les touches sont lues directement : pas de chien de garde sur une entrée publiée
+control_loop = ControlLoop(profiler.wrap('control', control_step), rate_hz=30, watchdog=None).start()
+
 def on_press(key):
     global flying, taking_off, landing, takeoff_start_time, running, speed, detection_enabled, tracked_objects
     
+    # Touche spéciale : ESC de pynput ou du navigateur (viewer)
+    if is_escape(key):
+        pressed_at = time.monotonic()
+        print("\n⚠️  Sortie...")
+        if flying or taking_off:
+            print("🛬 Atterrissage automatique...")
+            stop_tello(link, pressed_at, control_loop=control_loop, rc_output=rc_output)
+            time.sleep(3)
+        running = False
+        return
+    
     try:
         k = key.char.lower() if hasattr(key, 'char') and key.char else None
         
@@ -135,12 +186,14 @@ def on_press(key):
             
             def land_thread():
                 global flying, landing
+                control_loop.suspend()
+                rc_output.release()
                 send_command('rc 0 0 0 0', wait_response=False)
-                time.sleep(0.3)
                 send_command('land')
                 time.sleep(3)
                 flying = False
                 landing = False
+                control_loop.resume()
                 print("✓ Au sol !")
             
             threading.Thread(target=land_thread, daemon=True).start()
@@ -154,6 +207,8 @@ def on_press(key):
             detection_enabled = not detection_enabled
             if not detection_enabled:
                 tracked_objects = []  # Reset tracking quand désactivé
+                face_detector.reset()
+                object_tracker.reset()
             status = "ACTIVÉE" if detection_enabled else "DÉSACTIVÉE"
             print(f"🔍 Détection: {status}")
         
@@ -188,15 +243,7 @@ def on_press(key):
             keys_pressed['e'] = True
     
     except (AttributeError, TypeError):
-        if key == keyboard.Key.esc:
-            print("\n⚠️  Sortie...")
-            if flying or taking_off:
-                print("🛬 Atterrissage automatique...")
-                send_command('rc 0 0 0 0', wait_response=False)
-                time.sleep(0.3)
-                send_command('land')
-                time.sleep(3)
-            running = False
+        pass
 
 def on_release(key):
     try:
@@ -222,105 +269,78 @@ def on_release(key):
     except (AttributeError, TypeError):
         pass
 
-listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-listener.start()
+# Fenêtre cv2 + pynput, ou viewer web qui fournit aussi les touches (TELLO_HEADLESS=1)
+headless = HEADLESS
+if keyboard is None and not headless:
+    # Sans pynput, la fenêtre cv2 ne donne pas l'appui/relâchement des touches
+    print("⚠️  pynput absent (pip install pynput) : touches et vidéo via le viewer web")
+    headless = True
+display = create_display("Tello - Detection", headless=headless)
+if display.headless:
+    display.listen(on_press, on_release)
+    listener = None
+else:
+    listener = keyboard.Listener(on_press=on_press, on_release=on_release)
+    listener.start()
 
 try:
     print("✓ Système prêt\n")
     
     while running:
-        ret, frame = cap.read()
+        with profiler.stage('capture'):
+            seq, frame_time, frame = grabber.read(timeout=0.1)
         
-        if ret and frame is not None:
+        if frame is not None:
             frame_count += 1
-            frame = cv2.resize(frame, (960, 720))
+            with profiler.stage('resize'):
+                frame = cv2.resize(frame, (960, 720))
             
             # Détection de visages si activée avec tracking continu
             if detection_enabled:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+                with profiler.stage('cvtColor'):
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                with profiler.stage('detect'):
+                    faces = face_detector.update(frame, gray)
                 
-                # Créer les nouvelles détections
-                current_detections = []
-                for (x, y, w, h) in faces:
-                    center = (x + w//2, y + h//2)
-                    current_detections.append({
-                        'box': (x, y, w, h),
-                        'center': center,
-                        'label': "Visage",
-                        'color': (0, 255, 0)
-                    })
-                
-                # Mettre à jour le tracking
-                if len(tracked_objects) > 0 and len(current_detections) > 0:
-                    matched_indices = []
-                    new_tracked = []
-                    
-                    for tracked in tracked_objects:
-                        best_match = None
-                        best_distance = float('inf')
-                        best_idx = -1
-                        
-                        for idx, current in enumerate(current_detections):
-                            if idx in matched_indices:
-                                continue
-                            
-                            # Calculer la distance entre les centres
-                            dx = tracked['center'][0] - current['center'][0]
-                            dy = tracked['center'][1] - current['center'][1]
-                            distance = (dx*dx + dy*dy) ** 0.5
-                            
-                            if distance < best_distance and distance < max_distance_threshold:
-                                best_distance = distance
-                                best_match = current
-                                best_idx = idx
-                        
-                        if best_match:
-                            # Mettre à jour l'objet tracké
-                            new_tracked.append({
-                                'box': best_match['box'],
-                                'center': best_match['center'],
-                                'label': best_match['label'],
-                                'color': best_match['color']
-                            })
-                            matched_indices.append(best_idx)
-                    
-                    # Ajouter les nouvelles détections non matchées
-                    for idx, current in enumerate(current_detections):
-                        if idx not in matched_indices:
-                            new_tracked.append(current)
-                    
-                    tracked_objects = new_tracked
-                else:
-                    # Pas d'objets trackés ou pas de détections, remplacer
-                    tracked_objects = current_detections.copy()
+                # Pistes Kalman : numéro stable, boîte lissée, prédiction si image ratée
+                with profiler.stage('track'):
+                    tracks = object_tracker.update(faces, frame_time)
+                if recorder is not None:
+                    recorder.detections(frame_time, seq, tracks)
+                tracked_objects = [{
+                    'box': track.box,
+                    'center': track.center,
+                    'label': f"Visage #{track.id}",
+                    'color': (0, 255, 0) if track.detected else (0, 200, 255)
+                } for track in tracks]
             
             # Dessiner tous les objets trackés (même si détection désactivée temporairement)
             faces_detected = len(tracked_objects)
-            for obj in tracked_objects:
-                x, y, w, h = obj['box']
-                label = obj['label']
-                color = obj['color']
+            with profiler.stage('draw'):
+                for obj in tracked_objects:
+                    x, y, w, h = obj['box']
+                    label = obj['label']
+                    color = obj['color']
                 
-                # Rectangle épais
-                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 3)
+                    # Rectangle épais
+                    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 3)
                 
-                # Label avec fond
-                label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-                cv2.rectangle(frame, (x, y - label_size[1] - 15), (x + label_size[0] + 10, y), color, -1)
-                cv2.putText(frame, label, (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                    # Label avec fond
+                    label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+                    cv2.rectangle(frame, (x, y - label_size[1] - 15), (x + label_size[0] + 10, y), color, -1)
+                    cv2.putText(frame, label, (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
                 
-                # Point central
-                cv2.circle(frame, obj['center'], 5, color, -1)
+                    # Point central
+                    cv2.circle(frame, obj['center'], 5, color, -1)
             
             # Réinitialiser si détection désactivée
             if not detection_enabled:
                 tracked_objects = []
             
-            if frame_count % 100 == 0:
-                bat = send_command('battery?')
-                if bat:
-                    current_battery = bat
+            # Batterie lue dans la télémétrie (aucune requête UDP)
+            bat = telemetry.get('bat')
+            if bat is not None:
+                current_battery = bat
             
             try:
                 battery_int = int(current_battery)
@@ -333,86 +353,69 @@ try:
             except:
                 battery_color = (255, 255, 255)
             
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (5, 5), (300, 180), (0, 0, 0), -1)
-            frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0)
-            
-            cv2.putText(frame, "CONTROLE + DETECTION", (15, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-            cv2.putText(frame, f"Batterie: {current_battery}%", (15, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, battery_color, 2)
-            
             if taking_off and (time.time() - takeoff_start_time > 3):
                 flying = True
                 taking_off = False
                 print("✓ En vol - Contrôle activé !")
             
-            if taking_off:
-                status, status_color = "DECOLLAGE...", (0, 255, 255)
-            elif landing:
-                status, status_color = "ATTERRISSAGE...", (0, 255, 255)
-            elif flying:
-                status, status_color = "EN VOL", (0, 255, 0)
-            else:
-                status, status_color = "AU SOL", (128, 128, 128)
-            
-            cv2.putText(frame, f"Status: {status}", (15, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
-            
-            detect_color = (0, 255, 0) if detection_enabled else (128, 128, 128)
-            cv2.putText(frame, f"Detection: {'ON' if detection_enabled else 'OFF'} ({faces_detected})", (15, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.5, detect_color, 2)
+            with profiler.stage('hud'):
+                info_panel.text('battery', f"Batterie: {current_battery}%", (15, 60), 0.7, battery_color)
             
-            cv2.putText(frame, f"Vitesse: {speed}", (15, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+                if taking_off:
+                    status, status_color = "DECOLLAGE...", (0, 255, 255)
+                elif landing:
+                    status, status_color = "ATTERRISSAGE...", (0, 255, 255)
+                elif flying:
+                    status, status_color = "EN VOL", (0, 255, 0)
+                else:
+                    status, status_color = "AU SOL", (128, 128, 128)
             
-            left_right_velocity = 0
-            for_back_velocity = 0
-            up_down_velocity = 0
-            yaw_velocity = 0
+                info_panel.text('status', f"Status: {status}", (15, 90), 0.6, status_color)
             
-            if (flying or (taking_off and time.time() - takeoff_start_time > 1)) and not landing:
-                if keys_pressed['z']:
-                    for_back_velocity = speed
-                if keys_pressed['s']:
-                    for_back_velocity = -speed
-                if keys_pressed['q']:
-                    left_right_velocity = -speed
-                if keys_pressed['d']:
-                    left_right_velocity = speed
-                if keys_pressed['w']:
-                    up_down_velocity = speed
-                if keys_pressed['c']:
-                    up_down_velocity = -speed
-                if keys_pressed['a']:
-                    yaw_velocity = -speed
-                if keys_pressed['e']:
-                    yaw_velocity = speed
+                detect_color = (0, 255, 0) if detection_enabled else (128, 128, 128)
+                info_panel.text('detection', f"Detection: {'ON' if detection_enabled else 'OFF'} ({faces_detected})", (15, 120), 0.5, detect_color)
             
-            cv2.imshow("Tello - Detection", frame)
-        
-        if (flying or (taking_off and time.time() - takeoff_start_time > 1)) and not landing:
-            any_key_pressed = any(keys_pressed.values())
+                info_panel.text('speed', f"Vitesse: {speed}", (15, 150), 0.5, (0, 255, 255))
+                info_panel.draw(frame)
             
-            if any_key_pressed:
-                send_command(f'rc {left_right_velocity} {for_back_velocity} {up_down_velocity} {yaw_velocity}', wait_response=False)
-            else:
-                send_command('rc 0 0 0 0', wait_response=False)
+            profiler.draw(frame)
+            with profiler.stage('show'):
+                display.show(frame)
+            profiler.frame()
         
-        cv2.waitKey(1)
+        # Fenêtre cv2 : l'affichage HighGUI se fait réellement ici (touches lues par pynput)
+        with profiler.stage('keys'):
+            display.poll_key()
 
 except KeyboardInterrupt:
+    pressed_at = time.monotonic()
     print("\n\n⚠️ ARRÊT D'URGENCE (Ctrl+C)")
     running = False
     if flying or taking_off:
-        send_command('rc 0 0 0 0', wait_response=False)
-        time.sleep(0.3)
-        send_command('land')
+        stop_tello(link, pressed_at, control_loop=control_loop, rc_output=rc_output)
         time.sleep(3)
+    control_loop.stop()
 
 finally:
     running = False
-    listener.stop()
-    listener.join(timeout=1)
+    if listener is not None:
+        listener.stop()
+        listener.join(timeout=1)
+    control_loop.stop()
+    rc_output.stop()
     send_command('rc 0 0 0 0', wait_response=False)
-    cap.release()
+    grabber.stop()
     send_command('streamoff', wait_response=False)
-    if command_socket:
-        command_socket.close()
-    cv2.destroyAllWindows()
-    print("\n✓ Programme terminé")
\ No newline at end of file
+    telemetry.stop()
+    if link:
+        link.close()
+    if recorder is not None:
+        recorder.close()
+        print(f"📼 Journal de vol: {recorder.describe()}")
+    if PROFILE:
+        print(f"Profil du pipeline: {profiler.describe()}")
+    display.close()
+    print("\n✓ Programme terminé")
+    jitter = control_loop.jitter()
+    print(f"Boucle de contrôle: {control_loop.ticks} ticks, gigue p99 {jitter['p99']:.1f} ms, "
+          f"{control_loop.overruns} dépassements")
\ No newline at end of file
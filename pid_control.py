@@ -0,0 +1,129 @@
+"""
+PID cadencé par le temps réel + suivi de visage sur trois axes
+
+L'ancien `pid[0] * error + pid[1] * (error - pError)` était calculé par image :
+à 15 images/s le terme dérivé valait le double de celui à 30 images/s. Ici
+chaque mise à jour reçoit le dt mesuré (horodatage des images) :
+- intégrale en error x dt, bornée, et gelée quand la sortie sature (anti-windup)
+- dérivée en d(error)/dt, filtrée passe-bas (bruit des boîtes Haar)
+- sortie lissée (constante de temps en secondes, pas en images)
+
+FaceFollowController pilote lacet, montée/descente et avant/arrière à partir
+de la boîte du visage et envoie la consigne à l'étage rc (rc_output.py).
+
+    controller = FaceFollowController(rc_output, (960, 720), target_area=6500)
+    controller.update(box, frame_time)   # à chaque image où le visage est vu
+    controller.lost()                    # visage perdu : stationnaire
+"""
+
+import time
+
+MIN_DT = 1e-3
+MAX_DT = 0.5    # au-delà (pause, image perdue), on repart comme au premier appel
+
+
+class PID:
+    """Régulateur PID sur erreur normalisée, sortie bornée à ±limit"""
+
+    def __init__(self, kp, ki=0.0, kd=0.0, limit=100, integral_limit=None,
+                 derivative_tau=0.1, smoothing=0.1, deadband=0.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.limit = limit
+        self.integral_limit = integral_limit if integral_limit is not None else limit
+        self.derivative_tau = derivative_tau    # s, filtre de la dérivée
+        self.smoothing = smoothing              # s, lissage de la sortie
+        self.deadband = deadband                # |erreur| en dessous : considérée nulle
+
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.derivative = 0.0
+        self.prev_error = None
+        self.output = 0.0
+
+    def update(self, error, dt):
+        if abs(error) < self.deadband:
+            error = 0.0
+
+        if self.prev_error is None or dt > MAX_DT:
+            # Premier appel : pas de dérivée (évite le coup de pied initial)
+            dt = max(min(dt, MAX_DT), MIN_DT)
+            derivative = 0.0
+        else:
+            dt = max(dt, MIN_DT)
+            raw = (error - self.prev_error) / dt
+            alpha = dt / (self.derivative_tau + dt)
+            derivative = self.derivative + alpha * (raw - self.derivative)
+        self.prev_error = error
+        self.derivative = derivative
+
+        # Anti-windup : on n'intègre que si la sortie ne sature pas dans le même sens
+        unsaturated = self.kp * error + self.ki * self.integral + self.kd * derivative
+        saturated = abs(unsaturated) >= self.limit and unsaturated * error > 0
+        if self.ki and not saturated:
+            bound = self.integral_limit / self.ki
+            self.integral = max(-bound, min(bound, self.integral + error * dt))
+
+        raw_output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        raw_output = max(-self.limit, min(self.limit, raw_output))
+
+        alpha = dt / (self.smoothing + dt) if self.smoothing else 1.0
+        self.output += alpha * (raw_output - self.output)
+        return self.output
+
+
+class FaceFollowController:
+    """Boîte du visage -> consigne rc (lacet, montée, avant/arrière)"""
+
+    def __init__(self, rc_output, frame_size, target_area=6500, area_tolerance=0.05,
+                 yaw_pid=None, up_down_pid=None, for_back_pid=None):
+        self.rc_output = rc_output
+        self.width, self.height = frame_size
+        self.target_area = target_area
+
+        # Erreurs normalisées dans [-1, 1] : gains en unités rc par unité d'erreur
+        self.yaw_pid = yaw_pid or PID(kp=80, ki=10, kd=6, limit=100)
+        self.up_down_pid = up_down_pid or PID(kp=60, ki=8, kd=4, limit=60)
+        self.for_back_pid = for_back_pid or PID(kp=60, ki=5, kd=3, limit=40,
+                                                deadband=area_tolerance, smoothing=0.3)
+
+        self.last_time = None
+        self.errors = (0.0, 0.0, 0.0)
+        self.command = (0, 0, 0)
+
+    def update(self, box, timestamp=None):
+        """Nouvelle position du visage (x, y, w, h) ; renvoie (fb, ud, yaw)"""
+        now = timestamp if timestamp is not None else time.monotonic()
+        dt = 1 / 30 if self.last_time is None else now - self.last_time
+        self.last_time = now
+
+        x, y, w, h = box
+        cx, cy = x + w / 2, y + h / 2
+        yaw_error = (cx - self.width / 2) / (self.width / 2)
+        up_down_error = (self.height / 2 - cy) / (self.height / 2)
+        # Racine de l'aire ~ inverse de la distance : positif = trop loin
+        for_back_error = 1 - (w * h / self.target_area) ** 0.5
+        self.errors = (yaw_error, up_down_error, for_back_error)
+
+        yaw = self.yaw_pid.update(yaw_error, dt)
+        up_down = self.up_down_pid.update(up_down_error, dt)
+        for_back = self.for_back_pid.update(for_back_error, dt)
+
+        self.command = (int(for_back), int(up_down), int(yaw))
+        self.rc_output.set(0, *self.command)
+        return self.command
+
+    def lost(self):
+        """Plus de visage : stationnaire et remise à zéro des intégrales"""
+        self.reset()
+        self.rc_output.hover()
+
+    def reset(self):
+        self.yaw_pid.reset()
+        self.up_down_pid.reset()
+        self.for_back_pid.reset()
+        self.last_time = None
+        self.command = (0, 0, 0)
@@ -0,0 +1,206 @@
+"""
+Profileur par étape du pipeline vidéo (capture, cvtColor, détection, dessin, imshow...)
+
+Chaque étape est chronométrée avec perf_counter_ns et garde ses derniers
+échantillons ; on en tire p50 / p95 / p99 glissants pour savoir qui mange
+le budget d'une image :
+- incrustation optionnelle dans l'image (HUD)
+- export CSV périodique (TELLO_PROFILE_LOG=pipeline_profile.csv)
+- chaque mesure peut aussi partir dans le journal de vol (flight_recorder.py)
+
+    profiler = StageProfiler(enabled=True)
+    with profiler.stage('detect'):
+        faces = detector.update(frame, gray)
+    send = profiler.wrap('send', link.send_command)    # fonctions appelées d'autres threads
+    profiler.frame()                                    # fin d'image : période + export
+    profiler.draw(frame)
+
+Désactivé, stage() renvoie un contexte vide partagé et wrap() la fonction
+d'origine : coût quasi nul. Seul TELLO_PROFILE=1 active le profil et le
+HUD (et l'envoi des mesures au journal de vol s'il est ouvert) ; le CSV
+n'est écrit que si TELLO_PROFILE_LOG donne son chemin.
+"""
+
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import cv2
+
+from scheduler import percentile
+
+PROFILE = os.environ.get('TELLO_PROFILE', '') not in ('', '0')
+PROFILE_LOG = os.environ.get('TELLO_PROFILE_LOG', '')   # vide : pas d'export CSV
+HISTORY = 300               # échantillons par étape (~10 s à 30 images/s)
+EXPORT_INTERVAL = 10.0      # s entre deux lignes CSV
+REPORT_INTERVAL = 0.5       # s entre deux recalculs des percentiles affichés
+
+_DISABLED = nullcontext()
+
+
+class _Stage:
+    """Chronomètre réutilisable d'une étape (un seul thread à la fois)"""
+
+    __slots__ = ('name', 'samples', 'profiler', 'start')
+
+    def __init__(self, name, profiler, history):
+        self.name = name
+        self.samples = deque(maxlen=history)
+        self.profiler = profiler
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._add(self, time.perf_counter_ns() - self.start)
+        return False
+
+
+class StageProfiler:
+    """Durées par étape, percentiles glissants, HUD et export CSV"""
+
+    def __init__(self, enabled=PROFILE, history=HISTORY, recorder=None, hud=PROFILE,
+                 export_path=PROFILE_LOG, export_interval=EXPORT_INTERVAL):
+        self.enabled = enabled
+        self.hud = hud
+        self.history = history
+        self.recorder = recorder
+        self.export_path = export_path
+        self.export_interval = export_interval
+
+        self.stages = {}                # nom -> _Stage, dans l'ordre d'apparition
+        self.last_frame = None
+        self.last_export = time.monotonic()
+        self.last_report = 0.0
+        self.cached_report = {}
+
+    def _get(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage(name, self, self.history)
+        return stage
+
+    def _add(self, stage, elapsed_ns):
+        stage.samples.append(elapsed_ns)
+        if self.recorder is not None:
+            self.recorder.timing(stage.name, elapsed_ns / 1e6)
+
+    def stage(self, name):
+        """Contexte chronométrant le bloc (`with profiler.stage('detect'):`)"""
+        if not self.enabled:
+            return _DISABLED
+        return self._get(name)
+
+    def wrap(self, name, function):
+        """Fonction chronométrée à chaque appel, utilisable depuis n'importe quel thread"""
+        if not self.enabled:
+            return function
+        stage = self._get(name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._add(stage, time.perf_counter_ns() - start)
+        return timed
+
+    def frame(self):
+        """À appeler une fois par image : période d'image et export périodique"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self.last_frame is not None:
+            self._add(self._get('frame'), now - self.last_frame)
+        self.last_frame = now
+
+        if self.export_path and time.monotonic() - self.last_export >= self.export_interval:
+            self.export()
+
+    def report(self):
+        """{étape: {'count', 'p50', 'p95', 'p99', 'max'}} en ms"""
+        stats = {}
+        for name, stage in list(self.stages.items()):
+            samples = list(stage.samples)
+            if not samples:
+                continue
+            stats[name] = {'count': len(samples),
+                           'p50': percentile(samples, 50) / 1e6,
+                           'p95': percentile(samples, 95) / 1e6,
+                           'p99': percentile(samples, 99) / 1e6,
+                           'max': max(samples) / 1e6}
+        return stats
+
+    def _report_cached(self):
+        """Percentiles recalculés au plus toutes les REPORT_INTERVAL s (HUD)"""
+        now = time.monotonic()
+        if now - self.last_report >= REPORT_INTERVAL:
+            self.cached_report = self.report()
+            self.last_report = now
+        return self.cached_report
+
+    def draw(self, frame, origin=None):
+        """Tableau p50/p95/p99 par étape dans le coin bas-gauche (ou à `origin`)"""
+        if not (self.enabled and self.hud):
+            return frame
+        stats = self._report_cached()
+        if not stats:
+            return frame
+        line_height = 18
+        x, y = origin if origin is not None else (10, frame.shape[0] - line_height * (len(stats) + 1))
+        cv2.putText(frame, "etape      p50   p95   p99 ms", (x, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+        for i, (name, s) in enumerate(stats.items(), 1):
+            color = (0, 0, 255) if s['p95'] > 33 else (255, 255, 255)
+            cv2.putText(frame, f"{name[:9]:<9} {s['p50']:5.1f} {s['p95']:5.1f} {s['p99']:5.1f}",
+                        (x, y + i * line_height), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+        return frame
+
+    def export(self):
+        """Ajoute les percentiles courants au CSV (une ligne par étape)"""
+        self.last_export = time.monotonic()
+        stats = self.report()
+        if not stats or not self.export_path:
+            return
+        try:
+            new_file = not os.path.exists(self.export_path)
+            with open(self.export_path, 'a', encoding='utf-8') as f:
+                if new_file:
+                    f.write("date,etape,echantillons,p50_ms,p95_ms,p99_ms,max_ms\n")
+                date = time.strftime('%Y-%m-%dT%H:%M:%S')
+                for name, s in stats.items():
+                    f.write(f"{date},{name},{s['count']},{s['p50']:.3f},{s['p95']:.3f},"
+                            f"{s['p99']:.3f},{s['max']:.3f}\n")
+        except OSError as e:
+            print(f"⚠️  Export du profil: {e}")
+
+    def describe(self):
+        stats = self.report()
+        if not stats:
+            return "aucune mesure"
+        return ", ".join(f"{name} p50 {s['p50']:.1f} / p99 {s['p99']:.1f} ms"
+                         for name, s in stats.items())
+
+
+def benchmark(iterations=200000):
+    """Coût d'un `with profiler.stage()` activé et désactivé, en ns"""
+    results = {}
+    for enabled in (False, True):
+        profiler = StageProfiler(enabled=enabled, export_path=None)
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            with profiler.stage('vide'):
+                pass
+        results[enabled] = (time.perf_counter_ns() - start) / iterations
+    return results
+
+
+if __name__ == "__main__":
+    results = benchmark()
+    print("=" * 60)
+    print(f"  Désactivé: {results[False]:.0f} ns par étape")
+    print(f"  Activé:    {results[True]:.0f} ns par étape")
+    print("=" * 60)
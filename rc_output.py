@@ -0,0 +1,110 @@
+"""
+Étage de sortie RC : consigne "latest-wins" émise à fréquence fixe
+
+N'importe quel producteur (clavier, suivi PID, mission) appelle `set()` ;
+seul le dernier point de consigne compte. Le thread d'émission :
+- envoie tout de suite quand la consigne change (au plus `rate_hz` fois/s)
+- supprime les doublons, sauf un rafraîchissement toutes les `keepalive` s
+  (pertes de paquets, timeout de sécurité du Tello)
+"""
+
+import threading
+import time
+
+
+class RcOutput:
+    """Coalesceur de commandes rc à fréquence fixe"""
+
+    def __init__(self, send_command, rate_hz=20, keepalive=0.5):
+        self.send_command = send_command
+        self.period = 1.0 / rate_hz
+        self.keepalive = keepalive
+
+        self.setpoint = None      # None = aucune émission
+        self.last_sent = None
+        self.last_sent_time = 0.0
+
+        self.pending = False      # set() appelé depuis la dernière lecture
+        self.sent = 0
+        self.suppressed = 0       # consignes reçues identiques à la dernière envoyée, non renvoyées
+
+        self.cond = threading.Condition()
+        self.send_lock = threading.Lock()   # tenu de la lecture de la consigne à son envoi
+        self.running = False
+        self.thread = None
+
+    @staticmethod
+    def _clip(value):
+        return max(-100, min(100, int(value)))
+
+    def set(self, left_right, for_back, up_down, yaw):
+        """Nouvelle consigne (latest-wins)"""
+        setpoint = (self._clip(left_right), self._clip(for_back),
+                    self._clip(up_down), self._clip(yaw))
+        with self.cond:
+            changed = setpoint != self.setpoint
+            self.setpoint = setpoint
+            self.pending = True
+            if changed:
+                self.cond.notify()
+
+    def hover(self):
+        """Consigne nulle (vol stationnaire)"""
+        self.set(0, 0, 0, 0)
+
+    def release(self):
+        """Arrête l'émission (au sol, atterrissage en cours...)
+
+        Attend la fin d'un envoi en cours : au retour, plus aucun rc ne peut
+        partir derrière (ex: 'land' envoyé juste après par stop_tello).
+        """
+        with self.send_lock:
+            with self.cond:
+                self.setpoint = None
+                self.last_sent = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="rc-output", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        next_allowed = 0.0
+        while self.running:
+            with self.cond:
+                self.cond.wait(timeout=self.period)
+
+            # Limitation de débit : on attend le créneau avant de lire la consigne
+            now = time.monotonic()
+            if now < next_allowed:
+                time.sleep(next_allowed - now)
+                now = time.monotonic()
+
+            with self.send_lock:
+                with self.cond:
+                    setpoint = self.setpoint
+                    pending, self.pending = self.pending, False
+
+                if setpoint is None:
+                    continue
+
+                if setpoint == self.last_sent and now - self.last_sent_time < self.keepalive:
+                    # Tick sans nouvelle consigne : rien à compter
+                    if pending:
+                        self.suppressed += 1
+                    continue
+
+                self.send_command('rc %d %d %d %d' % setpoint, wait_response=False)
+                self.last_sent = setpoint
+                self.last_sent_time = now
+                next_allowed = now + self.period
+                self.sent += 1
+
+    def stop(self):
+        """Arrête le thread d'émission"""
+        self.running = False
+        with self.cond:
+            self.cond.notify()
+        if self.thread:
+            self.thread.join(timeout=1)
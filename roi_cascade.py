@@ -0,0 +1,82 @@
+"""
+Recherche Haar Cascade limitée à une région autour du dernier visage
+
+Une fois verrouillé sur un visage, inutile de balayer toute l'image à toutes
+les échelles : on cherche dans une fenêtre élargie autour de la boîte
+précédente, avec minSize/maxSize tirés de sa taille. Le balayage complet
+ne revient qu'après `max_misses` recherches ratées d'affilée.
+"""
+
+
+class RoiCascadeSearch:
+    """Détecteur Haar avec verrouillage sur la dernière cible"""
+
+    def __init__(self, cascade, scale_factor=1.3, min_neighbors=5,
+                 margin=0.75, size_range=(0.6, 1.6), max_misses=3):
+        self.cascade = cascade
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.margin = margin            # élargissement de la fenêtre (x taille boîte)
+        self.size_range = size_range    # minSize / maxSize relatifs à la boîte
+        self.max_misses = max_misses
+
+        self.last_box = None
+        self.misses = 0
+        self.full_scans = 0
+        self.roi_scans = 0
+
+    def reset(self):
+        self.last_box = None
+        self.misses = 0
+
+    def detect(self, gray):
+        """Renvoie les boîtes (x, y, w, h) trouvées dans l'image en niveaux de gris"""
+        if self.last_box is not None and self.misses < self.max_misses:
+            box = self._search_roi(gray)
+            if box is not None:
+                self.misses = 0
+                self.last_box = box
+                return [box]
+            self.misses += 1
+            return []
+
+        return self._search_full(gray)
+
+    def _search_full(self, gray):
+        self.full_scans += 1
+        faces = [tuple(int(v) for v in f)
+                 for f in self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)]
+        if faces:
+            # Verrouillage sur le visage le plus proche du centre (comme le suivi)
+            center_x = gray.shape[1] // 2
+            self.last_box = min(faces, key=lambda f: abs(f[0] + f[2] // 2 - center_x))
+            self.misses = 0
+        else:
+            self.last_box = None
+        return faces
+
+    def _search_roi(self, gray):
+        self.roi_scans += 1
+        height, width = gray.shape[:2]
+        x, y, w, h = self.last_box
+
+        pad_x, pad_y = int(w * self.margin), int(h * self.margin)
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+        roi = gray[y0:y1, x0:x1]
+
+        low, high = self.size_range
+        min_size = (int(w * low), int(h * low))
+        max_size = (min(int(w * high), x1 - x0), min(int(h * high), y1 - y0))
+        if roi.size == 0 or min_size[0] >= max_size[0]:
+            return None
+
+        faces = self.cascade.detectMultiScale(roi, self.scale_factor, self.min_neighbors,
+                                              minSize=min_size, maxSize=max_size)
+        if len(faces) == 0:
+            return None
+
+        # Le plus proche de la position précédente
+        cx, cy = x + w / 2 - x0, y + h / 2 - y0
+        fx, fy, fw, fh = min(faces, key=lambda f: (f[0] + f[2] / 2 - cx) ** 2 + (f[1] + f[3] / 2 - cy) ** 2)
+        return (int(fx) + x0, int(fy) + y0, int(fw), int(fh))
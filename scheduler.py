@@ -0,0 +1,190 @@
+"""
+Cadence fixe sans dérive, en version synchrone et asyncio
+
+`time.sleep(0.05)` après le travail donne une période de 50 ms + durée du
+travail : une boucle « 20 Hz » tourne à 17-18 Hz et dérive. Ici chaque tick
+vise une échéance absolue (départ + n x période) :
+- le temps passé dans le travail est déduit de l'attente
+- si une itération déborde sur plusieurs périodes, les ticks manqués sont
+  sautés (ou enchaînés avec skip_overruns=False) et comptés
+- le retard de chaque réveil sur son échéance est mesuré (gigue)
+
+    for deadline in RateScheduler(20).run(duration=5):
+        drone.send_rc_control(-10, -10, 0, 0)
+
+    async for deadline in AsyncRateScheduler(20).run():
+        await client.write_gatt_char(...)
+
+LoopLagMonitor signale les coroutines qui bloquent la boucle asyncio.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+HISTORY = 300   # retards conservés pour les statistiques
+
+
+def percentile(values, q):
+    """Percentile q (0-100) d'une liste non vide, par rang"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class _Schedule:
+    """Grille d'échéances absolues et statistiques, commune aux deux variantes"""
+
+    def __init__(self, rate_hz, skip_overruns=True, history=HISTORY):
+        self.period = 1.0 / rate_hz
+        self.skip_overruns = skip_overruns
+
+        self.deadline = None        # prochaine échéance (time.monotonic())
+        self.ticks = 0
+        self.overruns = 0           # échéances manquées (travail plus long qu'une période)
+        self.lateness = deque(maxlen=history)
+
+    def reset(self):
+        """La prochaine attente repart de maintenant (après une pause)"""
+        self.deadline = None
+
+    def _before(self, end):
+        """La prochaine échéance tombe-t-elle avant `end` ?"""
+        if end is None:
+            return True
+        deadline = self.deadline if self.deadline is not None else time.monotonic()
+        return max(deadline, time.monotonic() - self.period) < end
+
+    def _delay(self):
+        """Temps à attendre avant l'échéance, après avoir sauté les ticks perdus"""
+        now = time.monotonic()
+        if self.deadline is None:
+            self.deadline = now
+        missed = int((now - self.deadline) // self.period)
+        if missed > 0:
+            self.overruns += missed
+            if self.skip_overruns:
+                self.deadline += missed * self.period
+        return self.deadline - now
+
+    def _mark(self):
+        """Tick atteint : mesure du retard et échéance suivante"""
+        deadline = self.deadline
+        self.lateness.append(time.monotonic() - deadline)
+        self.ticks += 1
+        self.deadline += self.period
+        return deadline
+
+    def jitter(self):
+        """Retard des réveils sur leur échéance, en ms"""
+        samples = list(self.lateness)
+        if not samples:
+            return {'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {'mean': sum(samples) / len(samples) * 1000,
+                'p50': percentile(samples, 50) * 1000,
+                'p99': percentile(samples, 99) * 1000,
+                'max': max(samples) * 1000}
+
+    def describe(self):
+        stats = self.jitter()
+        return (f"{self.ticks} ticks, retard moyen {stats['mean']:.1f} ms, "
+                f"p99 {stats['p99']:.1f} ms, {self.overruns} dépassements")
+
+
+class RateScheduler(_Schedule):
+    """Version bloquante (threads, scripts djitellopy)
+
+    `stop_event` (threading.Event) interrompt l'attente en cours.
+    """
+
+    def __init__(self, rate_hz, skip_overruns=True, history=HISTORY, stop_event=None):
+        super().__init__(rate_hz, skip_overruns, history)
+        self.stop_event = stop_event
+
+    def wait(self):
+        """Attend la prochaine échéance et la renvoie (None si `stop_event` l'interrompt)"""
+        delay = self._delay()
+        if delay > 0:
+            if self.stop_event is not None:
+                if self.stop_event.wait(delay):
+                    # Réveil anticipé : ce n'est pas un tick, aucun retard mesuré
+                    return None
+            else:
+                time.sleep(delay)
+        return self._mark()
+
+    def run(self, duration=None):
+        """Itère sur les échéances (celles des `duration` prochaines secondes, ou sans fin)"""
+        end = None if duration is None else time.monotonic() + duration
+        while self._before(end):
+            if self.stop_event is not None and self.stop_event.is_set():
+                return
+            deadline = self.wait()
+            if deadline is None:
+                return
+            yield deadline
+
+
+class AsyncRateScheduler(_Schedule):
+    """Version asyncio (BLE Mambo, contrôle multi-drones)"""
+
+    async def wait(self):
+        delay = self._delay()
+        # sleep(0) même à l'heure : on rend la main aux autres tâches
+        await asyncio.sleep(max(delay, 0))
+        return self._mark()
+
+    async def run(self, duration=None):
+        end = None if duration is None else time.monotonic() + duration
+        while self._before(end):
+            yield await self.wait()
+
+
+# ============================================================
+#                    SURVEILLANCE DE LA BOUCLE ASYNCIO
+# ============================================================
+
+class LoopLagMonitor:
+    """Signale chaque fois qu'une coroutine bloque la boucle plus de `threshold` s
+
+    Une tâche dort `interval` s en boucle : tout retard au réveil est du temps
+    pendant lequel la boucle n'a servi personne (PCMD Mambo, rc Tello...).
+
+        monitor = LoopLagMonitor(threshold=0.05).start()
+        ...
+        monitor.stop(); print(monitor.describe())
+    """
+
+    def __init__(self, threshold=0.05, interval=0.01, history=HISTORY):
+        self.threshold = threshold
+        self.interval = interval
+        self.lags = deque(maxlen=history)
+        self.stalls = 0             # réveils en retard de plus de `threshold`
+        self.worst = 0.0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            self.lags.append(lag)
+            if lag > self.worst:
+                self.worst = lag
+            if lag > self.threshold:
+                self.stalls += 1
+                print(f"⚠️  Boucle asyncio bloquée {lag * 1000:.0f} ms")
+
+    def describe(self):
+        samples = list(self.lags)
+        p99 = percentile(samples, 99) * 1000 if samples else 0.0
+        return (f"boucle asyncio: retard p99 {p99:.1f} ms, max {self.worst * 1000:.1f} ms, "
+                f"{self.stalls} blocages > {self.threshold * 1000:.0f} ms")
@@ -0,0 +1,96 @@
+"""
+Compensation de latence : prédire où est la cible au moment de la commande
+
+Quand le script réagit à une boîte, l'image a déjà voyagé (Wi-Fi, décodage
+H.264) puis été analysée : le correcteur poursuit la position passée de la
+cible, d'où le dépassement dès qu'on monte les gains. On avance donc la
+position jusqu'à l'instant présent :
+- âge = maintenant - (arrivée de l'image - latence vidéo estimée)
+- mouvement propre de la cible = vitesse du tracker (px/s), corrigée de la
+  part due à la rotation du drone au moment de la prise de vue
+- rotation du drone depuis la prise de vue = lacet télémétrie (UDP 8890,
+  bien plus frais que la vidéo) entre la prise de vue et maintenant
+
+    predictor = TargetPredictor(telemetry, frame_width=960)
+    box = predictor.predict_box(track.box, track.velocity, frame_time)
+"""
+
+import time
+
+HORIZONTAL_FOV = 70.0   # degrés, champ horizontal de la caméra Tello (82.6° en diagonale)
+VIDEO_LATENCY = 0.15    # s, capture -> arrivée de l'image (Wi-Fi + décodage)
+MAX_HORIZON = 0.6       # s, au-delà la prédiction n'est plus fiable
+
+
+def _wrap(angle):
+    """Différence d'angle ramenée dans [-180, 180["""
+    return (angle + 180) % 360 - 180
+
+
+class TargetPredictor:
+    """Avance la position image d'une cible jusqu'à l'instant de la commande"""
+
+    def __init__(self, telemetry=None, frame_width=960, horizontal_fov=HORIZONTAL_FOV,
+                 video_latency=VIDEO_LATENCY, max_horizon=MAX_HORIZON):
+        self.telemetry = telemetry
+        self.px_per_degree = frame_width / horizontal_fov
+        self.video_latency = video_latency
+        self.max_horizon = max_horizon
+
+        self.age = 0.0              # s, âge total de la dernière cible prédite
+        self.processing_age = 0.0   # s, arrivée de l'image -> commande
+        self.yaw_shift = 0.0        # px, décalage dû au lacet depuis la prise de vue
+        self.shift = (0.0, 0.0)     # px, correction totale appliquée
+
+    def predict(self, center, velocity, frame_time, now=None):
+        """Centre (x, y) prédit à `now` à partir du centre vu dans l'image `frame_time`"""
+        now = time.monotonic() if now is None else now
+        capture_time = frame_time - self.video_latency
+        self.processing_age = now - frame_time
+        self.age = now - capture_time
+        horizon = min(max(self.age, 0.0), self.max_horizon)
+
+        vx, vy = velocity
+        yaw_shift = 0.0
+        ego_velocity = 0.0
+        if self.telemetry is not None:
+            yaw_then, yaw_rate = self._yaw_at(capture_time, horizon)
+            yaw_now = self.telemetry.get('yaw')
+            if yaw_then is not None and yaw_now is not None:
+                # Lacet vers la droite : la scène glisse vers la gauche dans l'image
+                yaw_shift = _wrap(yaw_now - yaw_then) * self.px_per_degree
+                ego_velocity = yaw_rate * self.px_per_degree
+
+        # Vitesse apparente = mouvement de la cible - rotation du drone
+        target_vx = vx + ego_velocity
+        x = center[0] + target_vx * horizon - yaw_shift
+        y = center[1] + vy * horizon
+
+        self.yaw_shift = yaw_shift
+        self.shift = (x - center[0], y - center[1])
+        return x, y
+
+    def predict_box(self, box, velocity, frame_time, now=None):
+        """Boîte (x, y, w, h) décalée sur le centre prédit"""
+        x, y, w, h = box
+        cx, cy = self.predict((x + w / 2, y + h / 2), velocity, frame_time, now)
+        return (int(cx - w / 2), int(cy - h / 2), w, h)
+
+    def _yaw_at(self, timestamp, horizon):
+        """(lacet, vitesse de lacet en °/s) interpolés à `timestamp` ; (None, 0) sans historique"""
+        states = self.telemetry.recent(horizon + 1.0)
+        if len(states) < 2:
+            return None, 0.0
+
+        before, after = states[0], states[1]
+        for i in range(1, len(states)):
+            before, after = states[i - 1], states[i]
+            if after.timestamp >= timestamp:
+                break
+
+        span = after.timestamp - before.timestamp
+        if span <= 0:
+            return after.yaw, 0.0
+        delta = _wrap(after.yaw - before.yaw)
+        ratio = min(max((timestamp - before.timestamp) / span, 0.0), 1.0)
+        return before.yaw + delta * ratio, delta / span
@@ -0,0 +1,359 @@
+"""
+Liaison de commande Tello partagée (UDP 8889)
+
+- Un seul socket persistant (port local 9000) piloté par une boucle asyncio
+- Les réponses sont associées à la requête en attente (une requête à la fois)
+- Les commandes 'rc' partent immédiatement, sans jamais attendre
+  derrière une requête en cours (ex: 'battery?')
+
+Utilisation depuis un script synchrone :
+
+    link = TelloCommandLink()
+    send_command = link.send_command
+    send_command('command')
+    send_command('rc 0 0 0 0', wait_response=False)
+    link.close()
+
+`TelloCommandLink(recorder=...)` ajoute chaque commande (latence de réponse
+comprise) et chaque consigne rc au journal de vol (flight_recorder.py).
+
+Client asyncio complet (flotte, contrôle multi-drones), sans aucun thread :
+
+    tello = AsyncTello('192.168.10.1')
+    await tello.connect()
+    await tello.takeoff()                   # attend le 'ok' (TimeoutError sinon)
+    tello.rc(0, 20, 0, 0)                   # immédiat
+    await tello.land()
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+# TELLO_IP permet de viser le simulateur local (tello_sim.py)
+TELLO_ADDRESS = (os.environ.get('TELLO_IP', '192.168.10.1'), 8889)
+LOCAL_PORT = 9000
+DEFAULT_TIMEOUT = 2.0
+MOTION_TIMEOUT = 20.0   # takeoff, land, déplacements : 'ok' seulement une fois le mouvement fini
+STALE_GRACE = 0.5       # s après un délai dépassé pendant lesquels sa réponse peut encore arriver
+
+MOTION_COMMANDS = {'takeoff', 'land', 'up', 'down', 'left', 'right', 'forward', 'back',
+                   'cw', 'ccw', 'flip', 'go', 'curve', 'stop'}
+
+
+def is_fire_and_forget(command):
+    """Les commandes 'rc' n'ont pas de réponse : on ne les attend jamais"""
+    return command.startswith('rc ')
+
+
+def reply_matches(command, response):
+    """La réponse a-t-elle la forme attendue ? ('ok'/'error' pour une commande, valeur pour une lecture)"""
+    ack = response.lower() == 'ok' or response.lower().startswith('error')
+    if command.endswith('?'):
+        return response.lower() != 'ok'
+    return ack
+
+
+def command_timeout(command):
+    """Délai de réponse adapté : long pour les mouvements, court pour le reste"""
+    return MOTION_TIMEOUT if command.split(' ', 1)[0] in MOTION_COMMANDS else DEFAULT_TIMEOUT
+
+
+# ============================================================
+#                    PROTOCOLE ASYNCIO
+# ============================================================
+
+class TelloProtocol(asyncio.DatagramProtocol):
+    """Protocole datagramme : remet chaque réponse à la requête en attente"""
+
+    def __init__(self):
+        self.transport = None
+        self.pending = None
+        self.pending_command = None
+        self.discard_until = 0.0    # fin de la fenêtre où la réponse d'une requête expirée peut arriver
+        self.late_command = None    # requête expirée dont la réponse n'est pas encore arrivée
+        self.stale_responses = 0
+        self.late_drops = 0
+        self.closed = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        response = data.decode('utf-8', errors='replace').strip()
+        # Réponse ayant la forme attendue par la requête expirée, dans sa fenêtre : tardive
+        late = (self.late_command is not None and time.monotonic() < self.discard_until
+                and reply_matches(self.late_command, response))
+        if (not late and self.pending is not None and not self.pending.done()
+                and reply_matches(self.pending_command, response)):
+            self.pending.set_result(response)
+        else:
+            # Réponse tardive d'une requête expirée (ou réponse à un 'rc') : une seule écartée
+            if late:
+                self.late_command = None
+                self.late_drops += 1
+            self.stale_responses += 1
+
+    def error_received(self, exc):
+        if self.pending is not None and not self.pending.done():
+            self.pending.set_exception(exc)
+
+    def connection_lost(self, exc):
+        if self.pending is not None and not self.pending.done():
+            self.pending.set_exception(exc or ConnectionError("Socket fermé"))
+        if self.closed is not None and not self.closed.done():
+            self.closed.set_result(None)
+
+
+class TelloLink:
+    """Liaison asyncio vers le Tello (un socket, requêtes sérialisées)"""
+
+    def __init__(self, tello_address=TELLO_ADDRESS, local_port=LOCAL_PORT, timeout=DEFAULT_TIMEOUT):
+        self.tello_address = tello_address
+        self.local_port = local_port
+        self.timeout = timeout
+        self.transport = None
+        self.protocol = None
+        self._query_lock = None
+        self.last_sent = None       # time.monotonic() du dernier datagramme émis
+
+    async def open(self):
+        """Ouvre le socket persistant"""
+        loop = asyncio.get_running_loop()
+        self.transport, self.protocol = await loop.create_datagram_endpoint(
+            TelloProtocol,
+            local_addr=('0.0.0.0', self.local_port),
+            reuse_port=None,
+        )
+        self._query_lock = asyncio.Lock()
+
+    def send_nowait(self, command):
+        """Envoi immédiat sans réponse attendue (rc, led...)"""
+        if self.transport is None or self.transport.is_closing():
+            return None
+        self.transport.sendto(command.encode('utf-8'), self.tello_address)
+        self.last_sent = time.monotonic()
+        return self.last_sent
+
+    async def query(self, command, timeout=None, sent=None):
+        """Envoie une commande et attend sa réponse (None si délai dépassé)
+
+        `sent` (future optionnelle) reçoit l'instant d'émission, une fois le
+        verrou obtenu et le datagramme parti.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        async with self._query_lock:
+            loop = asyncio.get_running_loop()
+            self.protocol.pending = loop.create_future()
+            self.protocol.pending_command = command
+            late_drops = self.protocol.late_drops
+            try:
+                sent_at = self.send_nowait(command)
+                if sent is not None and not sent.done():
+                    sent.set_result(sent_at)
+                return await asyncio.wait_for(self.protocol.pending, timeout)
+            except asyncio.TimeoutError:
+                # La réponse tardive ne doit pas servir à la requête suivante ; sauf si
+                # un datagramme vient d'être écarté comme tardif : c'était peut-être
+                # la réponse de cette requête (requête précédente perdue), pas de cascade
+                if self.protocol.late_drops == late_drops:
+                    self.protocol.discard_until = time.monotonic() + STALE_GRACE
+                    self.protocol.late_command = command
+                return None
+            finally:
+                self.protocol.pending = None
+                self.protocol.pending_command = None
+
+    async def send(self, command, wait_response=True, timeout=None):
+        """Point d'entrée commun : rc en direct, le reste en requête"""
+        if not wait_response or is_fire_and_forget(command):
+            self.send_nowait(command)
+            return None
+        return await self.query(command, timeout)
+
+    async def aclose(self):
+        """Ferme le socket"""
+        if self.transport is not None:
+            self.transport.close()
+            await self.protocol.closed
+            self.transport = None
+
+
+# ============================================================
+#                    CLIENT ASYNCIO
+# ============================================================
+
+class AsyncTello:
+    """Client Tello natif asyncio : commandes attendables avec délai, rc immédiat
+
+    Rien ne bloque la boucle : une commande lente (takeoff ~5 s) n'est qu'un
+    futur en attente, la boucle continue de servir les autres drones.
+    Erreurs : TimeoutError si pas de réponse, RuntimeError si le drone répond 'error'.
+    """
+
+    def __init__(self, host=TELLO_ADDRESS[0], local_port=LOCAL_PORT, timeout=DEFAULT_TIMEOUT,
+                 retries=2):
+        self.host = host
+        self.link = TelloLink((host, TELLO_ADDRESS[1]), local_port, timeout)
+        self.retries = retries      # requêtes sans effet ('command', '...?') seulement
+        self.pending = None         # tâche de la dernière commande lancée par start()
+        self.battery = None
+
+    async def connect(self):
+        """Ouvre le socket, passe en mode SDK et lit la batterie"""
+        await self.link.open()
+        await self.command('command')
+        self.battery = await self.get_battery()
+        return self.battery
+
+    async def command(self, command, timeout=None, sent=None):
+        """Envoie une commande et renvoie sa réponse"""
+        timeout = command_timeout(command) if timeout is None else timeout
+        # Un mouvement n'est jamais renvoyé : il a pu partir même sans réponse
+        attempts = 1 + (self.retries if command == 'command' or command.endswith('?') else 0)
+        for attempt in range(attempts):
+            response = await self.link.query(command, timeout, sent)
+            if response is not None:
+                break
+        else:
+            raise TimeoutError(f"{self.host} '{command}': pas de réponse en {timeout:.1f} s")
+
+        if response.lower().startswith('error'):
+            raise RuntimeError(f"{self.host} '{command}': {response}")
+        return response
+
+    async def start(self, command, timeout=None):
+        """Lance une commande et rend la main dès son émission (instant renvoyé)
+
+        La réponse arrive dans `self.pending` (tâche asyncio).
+        """
+        sent = asyncio.get_running_loop().create_future()
+        self.pending = asyncio.create_task(self.command(command, timeout, sent))
+        self.pending.add_done_callback(self._command_done)
+        # Tâche terminée sans émission (socket fermé...) : on ne reste pas bloqué
+        await asyncio.wait([sent, self.pending], return_when=asyncio.FIRST_COMPLETED)
+        return sent.result() if sent.done() else None
+
+    def _command_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"✗ [TELLO {self.host}] {task.exception()}")
+
+    def send_nowait(self, command):
+        """Envoi immédiat sans réponse ; instant d'émission (None si socket fermé)"""
+        return self.link.send_nowait(command)
+
+    def rc(self, lr=0, fb=0, ud=0, yaw=0):
+        return self.send_nowait(f'rc {int(lr)} {int(fb)} {int(ud)} {int(yaw)}')
+
+    async def get_battery(self):
+        return int(await self.command('battery?'))
+
+    async def takeoff(self):
+        return await self.command('takeoff')
+
+    async def land(self):
+        return await self.command('land')
+
+    def emergency(self):
+        """Coupure moteurs : jamais derrière une requête en cours"""
+        return self.send_nowait('emergency')
+
+    async def close(self):
+        if self.pending is not None and not self.pending.done():
+            self.pending.cancel()
+        await self.link.aclose()
+
+
+# ============================================================
+#                    FAÇADE SYNCHRONE
+# ============================================================
+
+class TelloCommandLink:
+    """Façade synchrone : la boucle asyncio tourne dans un thread dédié"""
+
+    def __init__(self, tello_address=TELLO_ADDRESS, local_port=LOCAL_PORT, timeout=DEFAULT_TIMEOUT,
+                 recorder=None):
+        self.link = TelloLink(tello_address, local_port, timeout)
+        self.recorder = recorder
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="tello-link", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.link.open(), self.loop).result()
+
+    def send_command(self, command, wait_response=True, timeout=None):
+        """Même signature que les anciens send_command des scripts"""
+        if self.loop.is_closed():
+            return None
+
+        if not wait_response or is_fire_and_forget(command):
+            self.loop.call_soon_threadsafe(self._send_nowait, command)
+            return None
+
+        future = asyncio.run_coroutine_threadsafe(self._query(command, timeout), self.loop)
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Erreur: {e}")
+            return None
+
+    def send_now(self, commands, timeout=0.5):
+        """Émet une ou plusieurs commandes d'un bloc, sans attendre de réponse
+
+        Jamais derrière une requête en cours ; renvoie l'instant d'émission
+        du dernier datagramme (None si le lien est fermé).
+        """
+        if self.loop.is_closed():
+            return None
+        if isinstance(commands, str):
+            commands = [commands]
+
+        async def send():
+            sent = None
+            for command in commands:
+                sent = self._send_nowait(command)
+            return sent
+
+        try:
+            return asyncio.run_coroutine_threadsafe(send(), self.loop).result(timeout)
+        except Exception as e:
+            print(f"Erreur: {e}")
+            return None
+
+    def _send_nowait(self, command):
+        sent = self.link.send_nowait(command)
+        if self.recorder is not None and sent is not None:
+            self._record(command, sent)
+        return sent
+
+    async def _query(self, command, timeout):
+        timeout = command_timeout(command) if timeout is None else timeout
+        sent = asyncio.get_running_loop().create_future()
+        response = await self.link.query(command, timeout, sent)
+        if self.recorder is not None and sent.done() and sent.result() is not None:
+            latency = time.monotonic() - sent.result() if response is not None else float('nan')
+            ok = response is not None and not response.lower().startswith('error')
+            self._record(command, sent.result(), latency, ok)
+        return response
+
+    def _record(self, command, sent, latency=float('nan'), ok=False):
+        """Consigne rc vers le flux rc, le reste vers le flux commandes"""
+        if is_fire_and_forget(command):
+            try:
+                self.recorder.rc(sent, *(int(v) for v in command.split()[1:5]))
+                return
+            except (TypeError, ValueError):
+                pass
+        self.recorder.command(command, sent, latency, ok)
+
+    def close(self):
+        """Ferme le socket et arrête la boucle"""
+        if self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.link.aclose(), self.loop).result(timeout=1)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=1)
+        self.loop.close()
@@ -0,0 +1,535 @@
+"""
+Simulateur local du Tello (SDK texte) pour tests et mesures hors ligne
+
+- UDP 8889 : commandes texte (command, takeoff, land, rc, go, battery?...)
+- UDP 8890 : état poussé à 10 Hz, même format que le vrai drone
+- UDP 11111 : flux H.264 (fichier Annex-B enregistré ou mire synthétique)
+- Modèle cinématique simple piloté par rc / takeoff / land / go / déplacements
+- Pertes de paquets et latence configurables
+
+Utilisation :
+    python tello_sim.py                          # simulateur sur 127.0.0.1
+    TELLO_IP=127.0.0.1 python keyboard.py        # dans un autre terminal
+    python tello_sim.py --loss 0.05 --latency 40 --jitter 20
+    python tello_sim.py --video vol.h264         # rejoue un flux enregistré
+    python tello_sim.py --bench 500              # mesure les allers-retours
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from fractions import Fraction
+
+from h264_stream import VIDEO_CHUNK, NalAssembler
+from tello_link import TelloLink
+
+COMMAND_PORT = 8889
+STATE_PORT = 8890
+VIDEO_PORT = 11111
+
+PHYSICS_HZ = 50
+STATE_HZ = 10
+TAKEOFF_HEIGHT = 80        # cm
+CLIMB_SPEED = 60           # cm/s (décollage / atterrissage)
+RC_SPEED_SCALE = 1.0       # cm/s par unité rc
+RC_YAW_SCALE = 1.0         # °/s par unité rc
+VELOCITY_TAU = 0.3         # constante de temps de la réponse en vitesse (s)
+
+
+# ============================================================
+#                    MODÈLE CINÉMATIQUE
+# ============================================================
+
+class SimDrone:
+    """Modèle cinématique du Tello (positions en cm, angles en degrés)"""
+
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.z = 0.0
+        self.yaw = 0.0
+        self.vx = 0.0      # repère monde
+        self.vy = 0.0
+        self.vz = 0.0
+        self.yaw_rate = 0.0
+
+        self.rc = (0, 0, 0, 0)
+        self.mode = "landed"       # landed, takingoff, flying, landing, moving
+        self.target = None         # (x, y, z, yaw, vitesse) pour go / déplacements
+        self.on_done = None        # rappel quand une manœuvre se termine
+
+        self.battery = 100.0
+        self.flight_time = 0.0
+        self.temperature = 60
+
+    def takeoff(self, on_done):
+        if self.mode != "landed":
+            on_done("error")
+            return
+        self.mode = "takingoff"
+        self.on_done = on_done
+
+    def land(self, on_done):
+        if self.mode == "landed":
+            on_done("error")
+            return
+        self.rc = (0, 0, 0, 0)
+        self.target = None
+        self.mode = "landing"
+        self.on_done = on_done
+
+    def emergency(self):
+        self.mode = "landed"
+        self.z = 0.0
+        self.vx = self.vy = self.vz = self.yaw_rate = 0.0
+        self.target = None
+
+    def move_relative(self, dx, dy, dz, dyaw, speed, on_done):
+        """Déplacement relatif dans le repère du drone (go, forward, cw...)"""
+        if self.mode != "flying":
+            on_done("error")
+            return
+        heading = math.radians(self.yaw)
+        wx = dx * math.cos(heading) - dy * math.sin(heading)
+        wy = dx * math.sin(heading) + dy * math.cos(heading)
+        self.target = (self.x + wx, self.y + wy, max(20.0, self.z + dz), self.yaw + dyaw, speed)
+        self.mode = "moving"
+        self.on_done = on_done
+
+    def _finish(self, mode):
+        self.mode = mode
+        if self.on_done:
+            callback, self.on_done = self.on_done, None
+            callback("ok")
+
+    def step(self, dt):
+        """Avance la simulation de dt secondes"""
+        alpha = 1.0 - math.exp(-dt / VELOCITY_TAU)
+
+        if self.mode == "takingoff":
+            self.vx = self.vy = self.yaw_rate = 0.0
+            self.vz = CLIMB_SPEED
+            if self.z >= TAKEOFF_HEIGHT:
+                self.vz = 0.0
+                self._finish("flying")
+
+        elif self.mode == "landing":
+            self.vx = self.vy = self.yaw_rate = 0.0
+            self.vz = -CLIMB_SPEED
+            if self.z <= 0.0:
+                self.z = 0.0
+                self.vz = 0.0
+                self._finish("landed")
+
+        elif self.mode == "moving":
+            tx, ty, tz, tyaw, speed = self.target
+            ex, ey, ez = tx - self.x, ty - self.y, tz - self.z
+            eyaw = tyaw - self.yaw
+            dist = math.sqrt(ex * ex + ey * ey + ez * ez)
+            if dist < 2.0 and abs(eyaw) < 1.0:
+                self.vx = self.vy = self.vz = self.yaw_rate = 0.0
+                self.target = None
+                self._finish("flying")
+            else:
+                scale = speed / dist if dist > 1e-6 else 0.0
+                self.vx, self.vy, self.vz = ex * scale, ey * scale, ez * scale
+                if dist < speed * dt:
+                    self.vx, self.vy, self.vz = ex / dt, ey / dt, ez / dt
+                self.yaw_rate = max(-90.0, min(90.0, eyaw / max(dt, 0.2)))
+
+        elif self.mode == "flying":
+            lr, fb, ud, yaw = self.rc
+            heading = math.radians(self.yaw)
+            bx, by = fb * RC_SPEED_SCALE, lr * RC_SPEED_SCALE
+            target_vx = bx * math.cos(heading) - by * math.sin(heading)
+            target_vy = bx * math.sin(heading) + by * math.cos(heading)
+            self.vx += (target_vx - self.vx) * alpha
+            self.vy += (target_vy - self.vy) * alpha
+            self.vz += (ud * RC_SPEED_SCALE - self.vz) * alpha
+            self.yaw_rate += (yaw * RC_YAW_SCALE - self.yaw_rate) * alpha
+
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.z = max(0.0, self.z + self.vz * dt)
+        self.yaw += self.yaw_rate * dt
+
+        if self.mode != "landed":
+            self.flight_time += dt
+            self.battery = max(0.0, self.battery - dt / 60.0)  # ~1 %/min en vol
+
+    def state_line(self):
+        """Ligne d'état au format du SDK 2.0"""
+        yaw = (self.yaw + 180.0) % 360.0 - 180.0
+        heading = math.radians(self.yaw)
+        # Vitesses dans le repère du drone, en dm/s comme le vrai Tello
+        vgx = (self.vx * math.cos(heading) + self.vy * math.sin(heading)) / 10
+        vgy = (-self.vx * math.sin(heading) + self.vy * math.cos(heading)) / 10
+        return ("mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:%d;"
+                "vgx:%d;vgy:%d;vgz:%d;templ:%d;temph:%d;tof:%d;h:%d;bat:%d;"
+                "baro:%.2f;time:%d;agx:0.00;agy:0.00;agz:-1000.00;\r\n" % (
+                    round(yaw), round(vgx), round(vgy), round(self.vz / 10),
+                    self.temperature, self.temperature + 2, round(self.z) + 10,
+                    round(self.z), int(self.battery), 100.0 + self.z / 100,
+                    int(self.flight_time)))
+
+
+# ============================================================
+#                    SOURCES VIDÉO
+# ============================================================
+
+def annexb_frames(path):
+    """Regroupe les NAL d'un fichier en images, comme le récepteur"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    assembler = NalAssembler()
+    return assembler.feed(data) + assembler.flush()
+
+
+class FileVideoSource:
+    """Rejoue en boucle un flux H.264 enregistré"""
+
+    def __init__(self, path):
+        self.frames = annexb_frames(path)
+        if not self.frames:
+            raise ValueError(f"Aucune image H.264 dans {path}")
+        self.index = 0
+
+    def next_frame(self, drone):
+        data = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.frames)
+        return data
+
+
+class SyntheticVideoSource:
+    """Mire synthétique encodée en H.264 (PyAV) qui réagit au lacet du drone"""
+
+    def __init__(self, width=960, height=720, fps=30):
+        import av
+        import numpy as np
+
+        self.np = np
+        self.av = av
+        self.width = width
+        self.height = height
+        self.codec = av.CodecContext.create('libx264', 'w')
+        self.codec.width = width
+        self.codec.height = height
+        self.codec.pix_fmt = 'yuv420p'
+        self.codec.time_base = Fraction(1, fps)
+        self.codec.framerate = Fraction(fps, 1)
+        self.codec.options = {'preset': 'ultrafast', 'tune': 'zerolatency',
+                              'x264-params': f'keyint={fps}:repeat-headers=1'}
+        self.background = np.zeros((height, width, 3), np.uint8)
+        self.background[..., 0] = np.linspace(40, 200, width, dtype=np.uint8)[None, :]
+        self.background[..., 1] = np.linspace(40, 160, height, dtype=np.uint8)[:, None]
+        self.pts = 0
+
+    def next_frame(self, drone):
+        img = self.background.copy()
+        # Une cible fixe dans le monde : elle se déplace à l'image quand le drone tourne
+        offset = int((-drone.yaw % 360) / 360 * self.width * 4) % self.width
+        size = max(20, int(120 - drone.z / 4))
+        top = self.height // 2 - size // 2
+        img[top:top + size, offset:offset + size] = (0, 0, 255)
+
+        frame = self.av.VideoFrame.from_ndarray(img, format='bgr24')
+        frame.pts = self.pts
+        self.pts += 1
+        return b''.join(bytes(p) for p in self.codec.encode(frame))
+
+
+# ============================================================
+#                    SERVEUR UDP
+# ============================================================
+
+class SimCommandProtocol(asyncio.DatagramProtocol):
+    """Reçoit les commandes texte et y répond comme le Tello"""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.sim.on_command(data.decode('utf-8', errors='replace').strip(), addr)
+
+
+class TelloSimulator:
+    """Assemble le modèle, les ports UDP et la vidéo"""
+
+    def __init__(self, host='127.0.0.1', client=None, loss=0.0, latency_ms=0.0,
+                 jitter_ms=0.0, video_source=None, fps=30,
+                 command_port=COMMAND_PORT, state_port=STATE_PORT, video_port=VIDEO_PORT):
+        self.host = host
+        self.client = client
+        self.loss = loss
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.video_source = video_source
+        self.fps = fps
+        self.command_port = command_port
+        self.state_port = state_port
+        self.video_port = video_port
+
+        self.drone = SimDrone()
+        self.sdk_mode = False
+        self.streaming = False
+        self.transport = None
+        self.out_transport = None
+        self.tasks = []
+
+        self.stats = {'commands': 0, 'dropped_in': 0, 'dropped_out': 0,
+                      'rc': 0, 'invalid': 0, 'state_packets': 0, 'video_frames': 0}
+
+    # ---------- réseau ----------
+
+    def _lost(self):
+        return self.loss > 0 and random.random() < self.loss
+
+    def _delay(self):
+        return self.latency + random.uniform(0.0, self.jitter)
+
+    def _reply(self, text, addr):
+        if self._lost():
+            self.stats['dropped_out'] += 1
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later(self._delay(), self.transport.sendto, text.encode('utf-8'), addr)
+
+    def _push(self, data, port):
+        if self.client is None:
+            return
+        self.out_transport.sendto(data, (self.client, port))
+
+    # ---------- commandes ----------
+
+    def on_command(self, command, addr):
+        if self._lost():
+            self.stats['dropped_in'] += 1
+            return
+        self.stats['commands'] += 1
+        if self.client is None or self.client != addr[0]:
+            self.client = addr[0]
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(self._delay(), self._execute, command, addr)
+
+    def _execute(self, command, addr):
+        try:
+            self._dispatch(command, addr)
+        except ValueError:
+            # Argument non numérique ('rc a b c d'...) : refusé comme le ferait le Tello
+            self.stats['invalid'] += 1
+            self._reply('error', addr)
+
+    def _dispatch(self, command, addr):
+        reply = lambda text: self._reply(text, addr)
+        drone = self.drone
+        parts = command.split()
+        if not parts:
+            return
+        name, args = parts[0], parts[1:]
+
+        if name == 'command':
+            self.sdk_mode = True
+            reply('ok')
+        elif not self.sdk_mode:
+            return
+        elif name == 'rc' and len(args) == 4:
+            self.stats['rc'] += 1
+            drone.rc = tuple(max(-100, min(100, int(a))) for a in args)
+        elif name == 'takeoff':
+            drone.takeoff(reply)
+        elif name == 'land':
+            drone.land(reply)
+        elif name == 'emergency':
+            drone.emergency()
+            reply('ok')
+        elif name == 'stop':
+            drone.rc = (0, 0, 0, 0)
+            reply('ok')
+        elif name == 'streamon':
+            self.streaming = True
+            reply('ok')
+        elif name == 'streamoff':
+            self.streaming = False
+            reply('ok')
+        elif name == 'go' and len(args) >= 4:
+            x, y, z, speed = (int(a) for a in args[:4])
+            drone.move_relative(x, -y, z, 0, speed, reply)
+        elif name in ('forward', 'back', 'left', 'right', 'up', 'down') and args:
+            dist = int(args[0])
+            dx, dy, dz = {'forward': (dist, 0, 0), 'back': (-dist, 0, 0),
+                          'left': (0, -dist, 0), 'right': (0, dist, 0),
+                          'up': (0, 0, dist), 'down': (0, 0, -dist)}[name]
+            drone.move_relative(dx, dy, dz, 0, 50, reply)
+        elif name in ('cw', 'ccw') and args:
+            angle = int(args[0]) if name == 'cw' else -int(args[0])
+            drone.move_relative(0, 0, 0, angle, 50, reply)
+        elif name == 'battery?':
+            reply(str(int(drone.battery)))
+        elif name == 'height?':
+            reply(f"{round(drone.z / 10)}dm")
+        elif name == 'time?':
+            reply(f"{int(drone.flight_time)}s")
+        elif name == 'temp?':
+            reply(f"{drone.temperature}~{drone.temperature + 2}C")
+        elif name == 'speed?':
+            reply("100.0")
+        elif name == 'sdk?':
+            reply("20")
+        elif name in ('EXT', 'speed', 'setfps', 'setresolution', 'setbitrate'):
+            reply('ok')
+        else:
+            reply('error')
+
+    # ---------- tâches périodiques ----------
+
+    async def _physics_loop(self):
+        dt = 1.0 / PHYSICS_HZ
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(dt)
+            now = time.monotonic()
+            self.drone.step(now - last)
+            last = now
+
+    async def _state_loop(self):
+        while True:
+            await asyncio.sleep(1.0 / STATE_HZ)
+            if not self.sdk_mode or self._lost():
+                continue
+            self._push(self.drone.state_line().encode('ascii'), self.state_port)
+            self.stats['state_packets'] += 1
+
+    async def _video_loop(self):
+        period = 1.0 / self.fps
+        next_time = time.monotonic()
+        while True:
+            next_time += period
+            await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+            if not self.streaming or self.video_source is None:
+                continue
+            data = self.video_source.next_frame(self.drone)
+            for i in range(0, len(data), VIDEO_CHUNK):
+                if not self._lost():
+                    self._push(data[i:i + VIDEO_CHUNK], self.video_port)
+            self.stats['video_frames'] += 1
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: SimCommandProtocol(self), local_addr=(self.host, self.command_port))
+        self.out_transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, local_addr=(self.host, 0))
+        self.tasks = [asyncio.create_task(self._physics_loop()),
+                      asyncio.create_task(self._state_loop()),
+                      asyncio.create_task(self._video_loop())]
+        print(f"✓ [SIM] Tello simulé sur {self.host}:{self.command_port}")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.transport.close()
+        self.out_transport.close()
+
+
+# ============================================================
+#                    BENCHMARK
+# ============================================================
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    k = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+async def run_benchmark(sim, count):
+    """Mesure les allers-retours de requêtes et le débit d'envoi rc"""
+    link = TelloLink((sim.host, sim.command_port), local_port=0, timeout=1.0)
+    await link.open()
+    await link.query('command')
+
+    rtts = []
+    timeouts = 0
+    loop = asyncio.get_running_loop()
+    for _ in range(count):
+        # Chronomètre lancé à l'émission réelle (verrou obtenu), comme TelloCommandLink
+        sent = loop.create_future()
+        response = await link.query('battery?', sent=sent)
+        if response is None:
+            timeouts += 1
+        elif sent.done() and sent.result() is not None:
+            rtts.append((time.monotonic() - sent.result()) * 1000)
+
+    start = time.perf_counter()
+    for i in range(count):
+        link.send_nowait(f'rc {i % 100} 0 0 0')
+        await asyncio.sleep(0)
+    rc_rate = count / (time.perf_counter() - start)
+    await asyncio.sleep(0.2 + sim.latency + sim.jitter)
+    await link.aclose()
+
+    print("\n" + "=" * 60)
+    print(f"  Requêtes: {count}  Pertes/timeouts: {timeouts}")
+    print(f"  RTT p50: {percentile(rtts, 50):.2f} ms  "
+          f"p95: {percentile(rtts, 95):.2f} ms  p99: {percentile(rtts, 99):.2f} ms")
+    print(f"  Débit rc côté client: {rc_rate:.0f} paquets/s "
+          f"({sim.stats['rc']} reçus par le simulateur)")
+    print("=" * 60)
+
+
+# ============================================================
+#                         MAIN
+# ============================================================
+
+async def main(args):
+    video_source = None
+    if args.video:
+        video_source = FileVideoSource(args.video)
+    elif not args.no_video:
+        try:
+            video_source = SyntheticVideoSource(fps=args.fps)
+        except ImportError:
+            print("⚠️  [SIM] PyAV/numpy absents : pas de vidéo synthétique (pip install av numpy)")
+
+    sim = TelloSimulator(host=args.host, client=args.client, loss=args.loss,
+                         latency_ms=args.latency, jitter_ms=args.jitter,
+                         video_source=video_source, fps=args.fps)
+    await sim.start()
+
+    try:
+        if args.bench:
+            await run_benchmark(sim, args.bench)
+        else:
+            while True:
+                await asyncio.sleep(3600)
+    finally:
+        await sim.stop()
+        print(f"📊 [SIM] {sim.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulateur local du Tello")
+    parser.add_argument('--host', default='127.0.0.1', help="adresse d'écoute des commandes")
+    parser.add_argument('--client', default=None, help="IP destinataire de l'état et de la vidéo")
+    parser.add_argument('--loss', type=float, default=0.0, help="taux de perte (0-1)")
+    parser.add_argument('--latency', type=float, default=0.0, help="latence ajoutée (ms)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="gigue ajoutée (ms)")
+    parser.add_argument('--video', default=None, help="fichier H.264 Annex-B à rejouer")
+    parser.add_argument('--no-video', action='store_true', help="désactive le flux vidéo")
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--bench', type=int, default=0, help="nombre de requêtes du benchmark")
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        print("\n✓ Simulateur arrêté")
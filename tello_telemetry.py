@@ -0,0 +1,148 @@
+"""
+Télémétrie Tello en arrière-plan (UDP 8890)
+
+Le Tello pousse son état ~10 fois par seconde après la commande 'command' :
+    pitch:0;roll:0;yaw:0;vgx:0;vgy:0;vgz:0;templ:60;temph:62;tof:10;h:0;bat:85;baro:123.45;time:0;agx:0.00;agy:0.00;agz:-1000.00;
+
+Un thread écoute ces datagrammes et publie un instantané immuable :
+la lecture de `telemetry.latest` ne coûte rien et ne bloque jamais
+(simple lecture de référence, pas de verrou).
+
+Avec `recorder=` (flight_recorder.FlightRecorder), chaque état est aussi
+ajouté au journal de vol.
+"""
+
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+
+STATE_PORT = 8890
+HISTORY_SIZE = 600  # ~60 s à 10 Hz
+
+_FIELDS = ('timestamp', 'pitch', 'roll', 'yaw', 'vgx', 'vgy', 'vgz',
+           'templ', 'temph', 'tof', 'h', 'bat', 'baro', 'time',
+           'agx', 'agy', 'agz')
+
+# Conversion de chaque clé du SDK vers son type
+_INT_KEYS = {'pitch', 'roll', 'yaw', 'vgx', 'vgy', 'vgz',
+             'templ', 'temph', 'tof', 'h', 'bat', 'time'}
+_FLOAT_KEYS = {'baro', 'agx', 'agy', 'agz'}
+
+
+class TelloState(namedtuple('TelloState', _FIELDS)):
+    """Instantané typé de l'état du Tello"""
+
+    __slots__ = ()
+
+    @property
+    def battery(self):
+        return self.bat
+
+    @property
+    def height(self):
+        return self.h
+
+    @property
+    def temperature(self):
+        return (self.templ + self.temph) / 2
+
+    @property
+    def attitude(self):
+        return (self.pitch, self.roll, self.yaw)
+
+
+EMPTY_STATE = TelloState(timestamp=0.0, pitch=0, roll=0, yaw=0, vgx=0, vgy=0, vgz=0,
+                         templ=0, temph=0, tof=0, h=0, bat=0, baro=0.0, time=0,
+                         agx=0.0, agy=0.0, agz=0.0)
+
+
+def parse_state(text, timestamp=None):
+    """Décode une ligne d'état Tello ; les clés inconnues sont ignorées"""
+    values = {}
+    for item in text.strip().split(';'):
+        key, sep, value = item.partition(':')
+        if not sep:
+            continue
+        if key in _INT_KEYS:
+            values[key] = int(value)
+        elif key in _FLOAT_KEYS:
+            values[key] = float(value)
+
+    values['timestamp'] = time.monotonic() if timestamp is None else timestamp
+    return EMPTY_STATE._replace(**values)
+
+
+class TelloTelemetry:
+    """Écoute l'état poussé par le Tello et garde un historique circulaire"""
+
+    def __init__(self, port=STATE_PORT, history_size=HISTORY_SIZE, recorder=None):
+        self.port = port
+        self.recorder = recorder
+        self.latest = None
+        self.history = deque(maxlen=history_size)
+        self.packets = 0
+        self.parse_errors = 0
+        self.running = False
+        self.sock = None
+        self.thread = None
+
+    def start(self):
+        """Ouvre le port d'état et lance le thread d'écoute"""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('', self.port))
+        self.sock.settimeout(0.5)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._listen, name="tello-telemetry", daemon=True)
+        self.thread.start()
+        return self
+
+    def _listen(self):
+        while self.running:
+            try:
+                data, _ = self.sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            try:
+                state = parse_state(data.decode('ascii', errors='replace'))
+            except ValueError:
+                self.parse_errors += 1
+                continue
+
+            self.packets += 1
+            self.history.append(state)
+            self.latest = state
+            if self.recorder is not None:
+                self.recorder.telemetry(state)
+
+    def get(self, field, default=None):
+        """Dernière valeur d'un champ (default si aucun état reçu)"""
+        state = self.latest
+        if state is None:
+            return default
+        return getattr(state, field)
+
+    def age(self):
+        """Âge du dernier état en secondes (None si aucun état reçu)"""
+        state = self.latest
+        if state is None:
+            return None
+        return time.monotonic() - state.timestamp
+
+    def recent(self, seconds):
+        """États reçus depuis `seconds` secondes (du plus ancien au plus récent)"""
+        limit = time.monotonic() - seconds
+        return [s for s in list(self.history) if s.timestamp >= limit]
+
+    def stop(self):
+        """Arrête l'écoute et ferme le socket"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        if self.sock:
+            self.sock.close()
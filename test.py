@@ -3,6 +3,8 @@ import time
 import signal
 import sys
 
+from scheduler import RateScheduler
+
 print("=" * 60)
 print("    DÉCOLLAGE - 5 SECONDES - ATTERRISSAGE")
 print("=" * 60)
@@ -44,19 +46,18 @@ def main():
         
         # 5 secondes de stabilisation avec compensation avant-droite
         print("\n🔄 Stabilisation 5 secondes...")
-        start = time.time()
+        schedule = RateScheduler(20)  # 20 Hz sur échéances absolues
         
-        while time.time() - start < 5:
+        for deadline in schedule.run(duration=5):
             # Compensation : arrière (-) et gauche (-)
             drone.send_rc_control(-10, -10, 0, 0)
-            time.sleep(0.05)  # 20 Hz
             
-            # Affichage compte à rebours
-            remaining = 3 - int(time.time() - start)
-            if remaining > 0 and int(time.time() - start * 10) % 10 == 0:
-                print(f"   {remaining}s...")
+            # Affichage compte à rebours (une fois par seconde)
+            if schedule.ticks % 20 == 1:
+                print(f"   {5 - schedule.ticks // 20}s...")
         
         print("✓ Stabilisation terminée")
+        print(f"   Cadence: {schedule.describe()}")
         
     except KeyboardInterrupt:
         pass
@@ -1,131 +1,68 @@
 import cv2
-import socket
+import sys
 import time
 import numpy as np
 
+from detection_pool import DetectionPool
+from detectors import available_detectors
+from frame_grabber import create_grabber
+from hud import HudPanel
+from tello_link import TelloCommandLink
+from viewer import create_display
+
 print("=" * 60)
 print("    TEST VIDÉO TELLO - DÉTECTION D'OBJETS")
 print("=" * 60)
 
-# Charger le modèle YOLO pour la détection d'objets
-print("\nChargement du modèle de détection d'objets...")
+# Modèle choisi par nom : python test_video_objets.py [modèle] [taille]
+model_name = sys.argv[1] if len(sys.argv) > 1 else 'yolov3'
+input_size = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+print(f"\nChargement du modèle de détection d'objets ({model_name})...")
 try:
-    # Utiliser YOLOv3
-    net = cv2.dnn.readNet("yolov3.weights", "yolov3.cfg")
-    
-    # Charger les noms des classes
-    with open("coco.names", "r") as f:
-        classes = [line.strip() for line in f.readlines()]
+    # Détection dans un processus séparé : la boucle vidéo ne l'attend jamais
+    detection_pool = DetectionPool(model_name, input_size=input_size).start()
     
-    layer_names = net.getLayerNames()
-    output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
+    # Couleurs aléatoires par classe
+    colors = np.random.uniform(0, 255, size=(256, 3))
     
-    # Générer des couleurs aléatoires pour chaque classe
-    colors = np.random.uniform(0, 255, size=(len(classes), 3))
-    
-    print("✓ Modèle YOLO chargé avec succès !")
-    print(f"✓ {len(classes)} classes d'objets détectables")
+    print(f"✓ Modèle chargé : {detection_pool.description}")
     detection_enabled = True
     
 except Exception as e:
-    print(f"⚠️  Impossible de charger YOLO: {e}")
+    print(f"⚠️  Impossible de charger {model_name}: {e}")
     print("⚠️  Le test continuera sans détection d'objets")
-    print("\n📥 Pour activer la détection, téléchargez:")
-    print("   1. https://pjreddie.com/media/files/yolov3.weights")
-    print("   2. https://github.com/pjreddie/darknet/blob/master/cfg/yolov3.cfg")
-    print("   3. https://github.com/pjreddie/darknet/blob/master/data/coco.names")
-    print("   Placez ces fichiers dans le même dossier que test_video.py\n")
+    print(f"   Modèles disponibles: {', '.join(available_detectors())}\n")
     detection_enabled = False
 
 
-def send_command(command, tello_address=('192.168.10.1', 8889)):
-    """Envoie une commande au Tello"""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(('', 9000))
-    sock.sendto(command.encode('utf-8'), tello_address)
-    
-    try:
-        response, _ = sock.recvfrom(1024)
-        sock.close()
-        return response.decode('utf-8').strip()
-    except:
-        sock.close()
-        return None
-
-
-def detect_objects(frame):
-    """Détecte les objets dans la frame avec YOLO"""
-    if not detection_enabled:
-        return frame, []
-    
-    height, width, channels = frame.shape
-    
-    # Préparer l'image pour YOLO
-    blob = cv2.dnn.blobFromImage(frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-    net.setInput(blob)
-    outs = net.forward(output_layers)
-    
-    # Informations de détection
-    class_ids = []
-    confidences = []
-    boxes = []
-    
-    # Parcourir les détections
-    for out in outs:
-        for detection in out:
-            scores = detection[5:]
-            class_id = np.argmax(scores)
-            confidence = scores[class_id]
-            
-            # Filtrer les détections faibles
-            if confidence > 0.5:
-                # Coordonnées du rectangle
-                center_x = int(detection[0] * width)
-                center_y = int(detection[1] * height)
-                w = int(detection[2] * width)
-                h = int(detection[3] * height)
-                
-                # Coin supérieur gauche
-                x = int(center_x - w / 2)
-                y = int(center_y - h / 2)
-                
-                boxes.append([x, y, w, h])
-                confidences.append(float(confidence))
-                class_ids.append(class_id)
-    
-    # Appliquer la suppression des non-maximums pour éliminer les doublons
-    indexes = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
-    
-    detected_objects = []
-    
-    # Dessiner les rectangles et labels
-    if len(indexes) > 0:
-        for i in indexes.flatten():
-            x, y, w, h = boxes[i]
-            label = str(classes[class_ids[i]])
-            confidence = confidences[i]
-            color = colors[class_ids[i]]
-            
-            # Dessiner le rectangle
-            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 3)
-            
-            # Préparer le texte
-            text = f"{label}: {confidence:.2f}"
-            
-            # Fond pour le texte
-            (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-            cv2.rectangle(frame, (x, y - text_height - 10), (x + text_width, y), color, -1)
-            
-            # Écrire le texte
-            cv2.putText(frame, text, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            detected_objects.append({
-                'label': label,
-                'confidence': confidence,
-                'box': (x, y, w, h)
-            })
+# Liaison de commande partagée (un seul socket sur le port 9000)
+link = TelloCommandLink()
+send_command = link.send_command
+
+
+def draw_objects(frame, objects):
+    """Dessine les objets détectés sur la frame"""
+    for obj in objects:
+        x, y, w, h = obj['box']
+        label = obj['label']
+        confidence = obj['confidence']
+        color = colors[obj['class_id'] % len(colors)]
+        
+        # Dessiner le rectangle
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, 3)
+        
+        # Préparer le texte
+        text = f"{label}: {confidence:.2f}"
+        
+        # Fond pour le texte
+        (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        cv2.rectangle(frame, (x, y - text_height - 10), (x + text_width, y), color, -1)
+        
+        # Écrire le texte
+        cv2.putText(frame, text, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
     
-    return frame, detected_objects
+    return frame
 
 
 # Connexion
@@ -143,8 +80,7 @@ print(f"   Réponse: {response}")
 time.sleep(3)
 
 print("\n4. Ouverture du flux avec OpenCV...")
-cap = cv2.VideoCapture('udp://0.0.0.0:11111', cv2.CAP_FFMPEG)
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+grabber = create_grabber().start()
 
 print("\n5. Affichage vidéo avec détection d'objets...")
 if detection_enabled:
@@ -155,31 +91,48 @@ print("   Appuyez sur 'q' pour quitter\n")
 
 frame_count = 0
 total_detections = 0
+last_result_seq = 0
+detected_objects = []
+result_lag = 0
+
+# Panneau d'infos : seul le compteur d'images est redessiné à chaque image
+info_panel = HudPanel((5, 5), (400, 160), alpha=0.7)
 last_battery_check = time.time()
 current_battery = battery
 
+# Fenêtre cv2, ou viewer web sans écran (TELLO_HEADLESS=1)
+display = create_display("Tello - Detection d'objets ('q' pour quitter)")
+
 try:
     while True:
-        ret, frame = cap.read()
+        seq, frame_time, frame = grabber.read(timeout=1.0)
         
-        if ret and frame is not None:
+        if frame is not None:
             frame_count += 1
             
             # Redimensionner si nécessaire
             if frame.shape[0] != 720 or frame.shape[1] != 960:
                 frame = cv2.resize(frame, (960, 720))
             
-            # Détection d'objets (toutes les 3 frames pour les performances)
-            detected_objects = []
-            if detection_enabled and frame_count % 3 == 0:
-                frame, detected_objects = detect_objects(frame)
+            # Détection asynchrone : l'image part si un worker est libre,
+            # on affiche le dernier résultat disponible
+            if detection_enabled:
+                detection_pool.submit(seq, frame_time, frame)
+                result = detection_pool.latest(newer_than=last_result_seq)
                 
-                if detected_objects:
-                    total_detections += len(detected_objects)
-                    # Afficher dans le terminal
-                    print(f"Frame {frame_count}:")
-                    for obj in detected_objects:
-                        print(f"  🎯 {obj['label']} ({obj['confidence']:.2%})")
+                if result is not None:
+                    last_result_seq = result.seq
+                    detected_objects = result.detections
+                    result_lag = seq - result.seq
+                    
+                    if detected_objects:
+                        total_detections += len(detected_objects)
+                        # Afficher dans le terminal
+                        print(f"Frame {result.seq} (retard {result_lag} images, {result.age * 1000:.0f} ms):")
+                        for obj in detected_objects:
+                            print(f"  🎯 {obj['label']} ({obj['confidence']:.2%})")
+                
+                frame = draw_objects(frame, detected_objects)
             
             # Mettre à jour la batterie toutes les 3 secondes
             if time.time() - last_battery_check > 3:
@@ -194,28 +147,25 @@ try:
             else:
                 battery_color = (0, 0, 255)
             
-            # Fond pour texte
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (5, 5), (400, 160), (0, 0, 0), -1)
-            frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0)
-            
             # Texte infos
-            cv2.putText(frame, f"Frame: {frame_count}", 
-                       (15, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-            cv2.putText(frame, f"Batterie: {current_battery}%", 
-                       (15, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.8, battery_color, 2)
+            info_panel.text('frame', f"Frame: {frame_count}", (15, 40), 0.8, (255, 255, 255))
+            info_panel.text('battery', f"Batterie: {current_battery}%", (15, 75), 0.8, battery_color)
             
             # Statut détection
             if detection_enabled:
-                cv2.putText(frame, f"Objets: {len(detected_objects)}", 
-                           (15, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-                cv2.putText(frame, f"Total: {total_detections}", 
-                           (15, 145), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                info_panel.remove('off')
+                info_panel.text('objects', f"Objets: {len(detected_objects)}", (15, 110), 0.8, (0, 255, 255))
+                info_panel.text('total', f"Total: {total_detections} - retard {result_lag} img",
+                                (15, 145), 0.7, (0, 255, 255))
             else:
-                cv2.putText(frame, "Detection: OFF", 
-                           (15, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (128, 128, 128), 2)
+                info_panel.remove('objects')
+                info_panel.remove('total')
+                info_panel.text('off', "Detection: OFF", (15, 110), 0.8, (128, 128, 128))
             
-            cv2.imshow("Tello - Detection d'objets ('q' pour quitter)", frame)
+            # Fond assombri et texte, sur la seule zone du panneau
+            info_panel.draw(frame)
+            
+            display.show(frame)
             
             if frame_count == 1:
                 print("✓ PREMIÈRE FRAME AFFICHÉE !")
@@ -225,7 +175,7 @@ try:
         else:
             print("⚠️  Pas de frame reçue")
         
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if display.poll_key() == ord('q'):
             break
 
 except KeyboardInterrupt:
@@ -233,13 +183,19 @@ except KeyboardInterrupt:
 
 finally:
     print("\n6. Arrêt...")
-    cap.release()
-    cv2.destroyAllWindows()
+    grabber.stop()
+    if detection_enabled:
+        detection_pool.stop()
+    display.close()
     send_command('streamoff')
+    link.close()
     
     print("\n" + "=" * 60)
     print(f"✓ Test terminé")
     print(f"  - {frame_count} frames affichées")
+    print(f"  - {grabber.dropped} frames sautées (dernière image uniquement)")
     if detection_enabled:
         print(f"  - {total_detections} objets détectés au total")
+        print(f"  - {detection_pool.description}")
+        print(f"  - {detection_pool.completed} images analysées, {detection_pool.skipped} sautées (worker occupé)")
     print("=" * 60)
\ No newline at end of file
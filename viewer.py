@@ -0,0 +1,394 @@
+"""
+Affichage sans écran : flux MJPEG / WebSocket local au lieu de cv2.imshow
+
+Les scripts liaient leur boucle à cv2.imshow + cv2.waitKey(1) : impossible
+de tourner sur une station sol sans écran, et les appels HighGUI ajoutent
+de la gigue à la boucle. Avec TELLO_HEADLESS=1 :
+- show() copie l'image (HUD compris) dans un tampon et rend la main
+- un thread encode en JPEG la plus récente ; si l'encodeur est en retard,
+  les images intermédiaires sont abandonnées
+- chaque client reçoit toujours la dernière image encodée : un client
+  lent saute des images sans ralentir les autres ni la boucle de vol
+- les touches du navigateur reviennent par le même WebSocket
+
+    display = create_display("Tello - Detection")   # fenêtre cv2, ou serveur web si TELLO_HEADLESS=1
+    display.show(frame)
+    key = display.poll_key()                        # comme cv2.waitKey(1) & 0xFF, -1 si rien
+    display.close()
+
+Navigateur : http://127.0.0.1:8080/ (vidéo + clavier par WebSocket)
+VLC / autre lecteur : http://127.0.0.1:8080/stream (MJPEG seul)
+TELLO_VIEWER_HOST=0.0.0.0 pour l'ouvrir au réseau local (aucune authentification).
+"""
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+from collections import deque, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+HEADLESS = os.environ.get('TELLO_HEADLESS', '') not in ('', '0')
+VIEWER_HOST = os.environ.get('TELLO_VIEWER_HOST', '127.0.0.1')
+VIEWER_PORT = int(os.environ.get('TELLO_VIEWER_PORT', '8080'))
+JPEG_QUALITY = 80
+KEY_QUEUE = 32
+
+_WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_BOUNDARY = b'frame'
+
+# Touche reçue du navigateur, au format attendu par les gestionnaires pynput
+# (key.char pour les caractères, key.name pour les touches spéciales)
+ViewerKey = namedtuple('ViewerKey', 'char name')
+_SPECIAL_KEYS = {'Escape': ('esc', 27), 'Enter': ('enter', 13), ' ': ('space', 32)}
+
+
+def is_escape(key):
+    """ESC, qu'elle vienne de pynput (Key.esc) ou du viewer"""
+    return getattr(key, 'name', None) == 'esc'
+
+
+# ============================================================
+#                    FENÊTRE CLASSIQUE
+# ============================================================
+
+class WindowDisplay:
+    """cv2.imshow / cv2.waitKey, comme avant"""
+
+    headless = False
+
+    def __init__(self, title, topmost=False):
+        self.title = title
+        self.topmost = topmost
+
+    def show(self, frame):
+        cv2.imshow(self.title, frame)
+        if self.topmost:
+            cv2.setWindowProperty(self.title, cv2.WND_PROP_TOPMOST, 1)
+
+    def poll_key(self):
+        key = cv2.waitKey(1)
+        return -1 if key < 0 else key & 0xFF
+
+    def describe(self):
+        return "fenêtre cv2"
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+# ============================================================
+#                    SERVEUR WEB
+# ============================================================
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{margin:0;background:#111;color:#ccc;font:14px sans-serif;text-align:center}}
+img{{max-width:100vw;max-height:94vh}}</style></head>
+<body><img id="video" alt="en attente du flux..."><div id="status">connexion...</div>
+<script>
+const video = document.getElementById('video'), status = document.getElementById('status');
+const ws = new WebSocket(`ws://${{location.host}}/ws`);
+ws.binaryType = 'blob';
+ws.onopen = () => status.textContent = 'clavier actif (cliquer sur la page si besoin)';
+ws.onclose = () => status.textContent = 'déconnecté';
+ws.onmessage = (e) => {{
+  const url = URL.createObjectURL(e.data);
+  video.onload = () => URL.revokeObjectURL(url);
+  video.src = url;
+}};
+function send(type, e) {{
+  if (e.repeat || ws.readyState !== 1) return;
+  ws.send(JSON.stringify({{type: type, key: e.key}}));
+  e.preventDefault();
+}}
+addEventListener('keydown', (e) => send('down', e));
+addEventListener('keyup', (e) => send('up', e));
+</script></body></html>
+"""
+
+
+class WebViewer:
+    """Serveur HTTP local : page + WebSocket (images et touches), flux MJPEG"""
+
+    headless = True
+
+    def __init__(self, title, host=VIEWER_HOST, port=VIEWER_PORT, quality=JPEG_QUALITY):
+        self.title = title
+        self.host = host
+        self.port = port
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+        # Double tampon : show() remplit `back`, l'encodeur lit `front`
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.back = None
+        self.front = None
+        self.pending = False
+
+        # Dernière image encodée, partagée par tous les clients
+        self.jpeg_ready = threading.Condition()
+        self.jpeg = None
+        self.jpeg_seq = 0
+
+        self.keys = deque(maxlen=KEY_QUEUE)     # codes façon waitKey, pour poll_key()
+        self.on_press = None
+        self.on_release = None
+
+        self.clients = 0
+        self.encoded = 0
+        self.dropped = 0                # images écrasées avant encodage
+        self.client_skips = 0           # images sautées par des clients lents
+
+        self.running = True
+        self.encoder = threading.Thread(target=self._encode_loop, name="viewer-encoder", daemon=True)
+        self.encoder.start()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.server_thread = threading.Thread(target=self.server.serve_forever, name="viewer-http",
+                                              daemon=True)
+        self.server_thread.start()
+        print(f"🌐 Viewer: http://{host}:{port}/ (MJPEG seul: /stream)")
+
+    # --- côté boucle de vol ------------------------------------------------
+
+    def show(self, frame):
+        """Publie l'image (copie dans un tampon réutilisé), sans jamais attendre l'encodage"""
+        if self.clients == 0:
+            return
+        with self.lock:
+            if self.back is None or self.back.shape != frame.shape:
+                self.back = np.empty_like(frame)
+            np.copyto(self.back, frame)
+            if self.pending:
+                self.dropped += 1
+            self.pending = True
+            self.frame_ready.notify()
+
+    def poll_key(self):
+        """Prochaine touche appuyée dans le navigateur (-1 si aucune), sans attendre"""
+        try:
+            return self.keys.popleft()
+        except IndexError:
+            return -1
+
+    def listen(self, on_press, on_release=None):
+        """Gestionnaires façon pynput (appelés depuis le thread du client)"""
+        self.on_press = on_press
+        self.on_release = on_release
+
+    # --- encodage ----------------------------------------------------------
+
+    def _encode_loop(self):
+        while True:
+            with self.lock:
+                self.frame_ready.wait_for(lambda: self.pending or not self.running)
+                if not self.running:
+                    return
+                self.back, self.front = self.front, self.back
+                self.pending = False
+                frame = self.front
+
+            ok, jpeg = cv2.imencode('.jpg', frame, self.encode_params)
+            if not ok:
+                continue
+            with self.jpeg_ready:
+                self.jpeg = jpeg.tobytes()
+                self.jpeg_seq += 1
+                self.encoded += 1
+                self.jpeg_ready.notify_all()
+
+    def _next_jpeg(self, last_seq, timeout=1.0):
+        """Dernière image encodée plus récente que `last_seq` (None si rien de neuf)"""
+        with self.jpeg_ready:
+            self.jpeg_ready.wait_for(lambda: self.jpeg_seq > last_seq or not self.running, timeout)
+            if self.jpeg_seq <= last_seq or not self.running:
+                return last_seq, None
+            if last_seq and self.jpeg_seq > last_seq + 1:
+                self.client_skips += self.jpeg_seq - last_seq - 1
+            return self.jpeg_seq, self.jpeg
+
+    # --- touches -----------------------------------------------------------
+
+    def _key_event(self, message):
+        try:
+            event = json.loads(message)
+            name, pressed = event['key'], event['type'] == 'down'
+        except (ValueError, KeyError, TypeError):
+            return
+        if name in _SPECIAL_KEYS:
+            key_name, code = _SPECIAL_KEYS[name]
+            key = ViewerKey(' ' if name == ' ' else None, key_name)
+        elif len(name) == 1:
+            code = ord(name) & 0xFF
+            key = ViewerKey(name, None)
+        else:
+            return
+
+        if pressed:
+            self.keys.append(code)
+        callback = self.on_press if pressed else self.on_release
+        if callback is not None:
+            try:
+                callback(key)
+            except Exception as e:
+                print(f"⚠️  Viewer: touche {name}: {e}")
+
+    # --- HTTP / WebSocket --------------------------------------------------
+
+    def _handler_class(self):
+        viewer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == '/':
+                    body = _PAGE.format(title=viewer.title).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif self.path == '/stream':
+                    viewer._serve_mjpeg(self)
+                elif self.path == '/ws' and self.headers.get('Upgrade', '').lower() == 'websocket':
+                    viewer._serve_websocket(self)
+                else:
+                    self.send_error(404)
+
+        return Handler
+
+    def _serve_mjpeg(self, handler):
+        handler.send_response(200)
+        handler.send_header('Content-Type', f"multipart/x-mixed-replace; boundary={_BOUNDARY.decode()}")
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+        self._count_client(1)
+        seq = 0
+        try:
+            while self.running:
+                seq, jpeg = self._next_jpeg(seq)
+                if jpeg is None:
+                    continue
+                handler.wfile.write(b'--' + _BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n'
+                                    b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n')
+                handler.wfile.write(jpeg)
+                handler.wfile.write(b'\r\n')
+        except (BrokenPipeError, ConnectionError, OSError):
+            pass
+        finally:
+            self._count_client(-1)
+            handler.close_connection = True
+
+    def _serve_websocket(self, handler):
+        key = handler.headers.get('Sec-WebSocket-Key', '').encode()
+        accept = base64.b64encode(hashlib.sha1(key + _WS_GUID).digest()).decode()
+        handler.send_response(101)
+        handler.send_header('Upgrade', 'websocket')
+        handler.send_header('Connection', 'Upgrade')
+        handler.send_header('Sec-WebSocket-Accept', accept)
+        handler.end_headers()
+        handler.close_connection = True
+
+        closed = threading.Event()
+        send_lock = threading.Lock()
+        reader = threading.Thread(target=self._ws_read, args=(handler, closed, send_lock),
+                                  name="viewer-ws-read", daemon=True)
+        reader.start()
+        self._count_client(1)
+        seq = 0
+        try:
+            while self.running and not closed.is_set():
+                seq, jpeg = self._next_jpeg(seq, timeout=0.5)
+                if jpeg is not None:
+                    with send_lock:
+                        _ws_send(handler.wfile, 0x2, jpeg)
+        except (BrokenPipeError, ConnectionError, OSError):
+            pass
+        finally:
+            self._count_client(-1)
+            closed.set()
+
+    def _count_client(self, delta):
+        with self.lock:
+            self.clients += delta
+
+    def _ws_read(self, handler, closed, send_lock):
+        """Messages du navigateur : touches (texte JSON), ping, fermeture"""
+        try:
+            while not closed.is_set():
+                opcode, payload = _ws_receive(handler.rfile)
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode == 0x1:
+                    self._key_event(payload.decode('utf-8', errors='replace'))
+                elif opcode == 0x9:
+                    with send_lock:
+                        _ws_send(handler.wfile, 0xA, payload)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            closed.set()
+
+    def describe(self):
+        return (f"viewer: {self.encoded} images encodées, {self.dropped} abandonnées avant encodage, "
+                f"{self.client_skips} sautées par des clients lents")
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            self.frame_ready.notify_all()
+        with self.jpeg_ready:
+            self.jpeg_ready.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+        self.encoder.join(timeout=1)
+
+
+def _ws_send(wfile, opcode, payload):
+    """Trame WebSocket serveur -> client (non masquée)"""
+    size = len(payload)
+    if size < 126:
+        header = struct.pack('!BB', 0x80 | opcode, size)
+    elif size < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, size)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, size)
+    wfile.write(header)
+    wfile.write(payload)
+    wfile.flush()
+
+
+def _ws_receive(rfile):
+    """Trame WebSocket client -> serveur (masquée) ; (None, b'') si connexion fermée"""
+    header = rfile.read(2)
+    if len(header) < 2:
+        return None, b''
+    opcode = header[0] & 0x0F
+    size = header[1] & 0x7F
+    if size == 126:
+        size = struct.unpack('!H', rfile.read(2))[0]
+    elif size == 127:
+        size = struct.unpack('!Q', rfile.read(8))[0]
+    mask = rfile.read(4) if header[1] & 0x80 else None
+    payload = rfile.read(size)
+    if mask:
+        payload = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(mask, np.uint8), size)).tobytes()
+    return opcode, payload
+
+
+def create_display(title, headless=HEADLESS, topmost=False):
+    """Fenêtre cv2, ou viewer web si TELLO_HEADLESS=1"""
+    if headless:
+        return WebViewer(title)
+    return WindowDisplay(title, topmost)
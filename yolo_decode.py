@@ -0,0 +1,125 @@
+"""
+Décodage vectorisé des sorties YOLO (cv2.dnn) + NMS par classe
+
+Chaque couche de sortie YOLO est un tableau (N, 5 + nb_classes) :
+    cx, cy, w, h, objectness, score_classe_0, score_classe_1, ...
+Pour yolov3 en 416x416, cela fait 10 647 lignes par image : au lieu d'une
+boucle Python avec un np.argmax par ligne, on concatène les couches, on
+filtre en une passe puis on convertit toutes les boîtes d'un coup.
+
+    boxes, confidences, class_ids = decode_yolo_outputs(outs, width, height)
+
+Comparer avec l'ancienne boucle :
+    python yolo_decode.py
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+def class_aware_nms(boxes, confidences, class_ids, conf_threshold, nms_threshold):
+    """NMS séparée par classe ; renvoie les indices conservés"""
+    if len(boxes) == 0:
+        return np.empty(0, np.int64)
+
+    if hasattr(cv2.dnn, 'NMSBoxesBatched'):
+        keep = cv2.dnn.NMSBoxesBatched(boxes.tolist(), confidences.tolist(), class_ids.tolist(),
+                                       conf_threshold, nms_threshold)
+    else:
+        # Décaler chaque classe hors de portée des autres : une seule NMS suffit
+        offset = (boxes[:, :2].max() + boxes[:, 2:].max() + 1) * class_ids[:, None]
+        shifted = boxes.copy()
+        shifted[:, :2] += offset
+        keep = cv2.dnn.NMSBoxes(shifted.tolist(), confidences.tolist(), conf_threshold, nms_threshold)
+    return np.asarray(keep, np.int64).reshape(-1)
+
+
+def decode_yolo_outputs(outs, width, height, conf_threshold=0.5, nms_threshold=0.4):
+    """Sorties brutes YOLO -> (boxes[x, y, w, h] int32, confidences, class_ids) après NMS"""
+    preds = np.concatenate([out.reshape(-1, out.shape[-1]) for out in outs])
+    scores = preds[:, 5:]
+
+    # Une seule passe pour filtrer, argmax uniquement sur les lignes retenues
+    candidates = np.flatnonzero(scores.max(axis=1) > conf_threshold)
+    if candidates.size == 0:
+        return np.empty((0, 4), np.int32), np.empty(0, np.float32), np.empty(0, np.int64)
+
+    kept_scores = scores[candidates]
+    class_ids = kept_scores.argmax(axis=1)
+    confidences = kept_scores[np.arange(candidates.size), class_ids]
+
+    # cx, cy, w, h relatifs -> x, y, w, h en pixels
+    geometry = preds[candidates, :4] * np.array([width, height, width, height], np.float32)
+    boxes = np.empty((candidates.size, 4), np.int32)
+    boxes[:, 0] = geometry[:, 0] - geometry[:, 2] / 2
+    boxes[:, 1] = geometry[:, 1] - geometry[:, 3] / 2
+    boxes[:, 2] = geometry[:, 2]
+    boxes[:, 3] = geometry[:, 3]
+
+    keep = class_aware_nms(boxes, confidences, class_ids, conf_threshold, nms_threshold)
+    return boxes[keep], confidences[keep], class_ids[keep]
+
+
+def decode_yolo_outputs_loop(outs, width, height, conf_threshold=0.5, nms_threshold=0.4):
+    """Ancienne version (boucle par ligne), gardée pour le benchmark"""
+    class_ids, confidences, boxes = [], [], []
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > conf_threshold:
+                center_x = int(detection[0] * width)
+                center_y = int(detection[1] * height)
+                w = int(detection[2] * width)
+                h = int(detection[3] * height)
+                boxes.append([int(center_x - w / 2), int(center_y - h / 2), w, h])
+                confidences.append(float(confidence))
+                class_ids.append(class_id)
+
+    indexes = cv2.dnn.NMSBoxes(boxes, confidences, conf_threshold, nms_threshold)
+    indexes = np.asarray(indexes, np.int64).reshape(-1)
+    return ([boxes[i] for i in indexes], [confidences[i] for i in indexes],
+            [class_ids[i] for i in indexes])
+
+
+def benchmark(outs, width, height, repeat=20):
+    """Temps moyen (ms) : boucle Python vs version vectorisée"""
+    results = {}
+    for name, fn in (('boucle', decode_yolo_outputs_loop), ('vectorisé', decode_yolo_outputs)):
+        fn(outs, width, height)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(outs, width, height)
+        results[name] = (time.perf_counter() - start) / repeat * 1000
+    return results
+
+
+def synthetic_outputs(input_size=416, num_classes=80, objects=15, seed=0):
+    """Sorties factices au format yolov3 (3 échelles, 3 ancres par cellule)"""
+    rng = np.random.default_rng(seed)
+    outs = []
+    for stride in (32, 16, 8):
+        rows = (input_size // stride) ** 2 * 3
+        out = np.zeros((rows, 5 + num_classes), np.float32)
+        out[:, :4] = rng.random((rows, 4), np.float32) * [1, 1, 0.3, 0.3]
+        out[:, 5:] = rng.random((rows, num_classes), np.float32) * 0.3
+        hits = rng.choice(rows, objects, replace=False)
+        out[hits, 4] = 0.9
+        out[hits, 5 + rng.integers(0, num_classes, objects)] = 0.9
+        outs.append(out)
+    return outs
+
+
+if __name__ == "__main__":
+    outs = synthetic_outputs()
+    rows = sum(len(o) for o in outs)
+    timings = benchmark(outs, 960, 720)
+    print("=" * 60)
+    print(f"  Décodage YOLO - {rows} lignes par image")
+    for name, ms in timings.items():
+        print(f"  {name:>10}: {ms:7.2f} ms")
+    print(f"  Gain: x{timings['boucle'] / timings['vectorisé']:.1f}")
+    print("=" * 60)